@@ -1,8 +1,12 @@
 from django.contrib import admin
+from django.db import transaction
 from unfold.admin import ModelAdmin
-from .models import Post, Category, Comment
+from .models import Post, Category, Comment, AuditRecord, OutboxEvent, Task
+from django.utils import timezone
 from django.utils.html import format_html
 
+from . import images
+
 
 @admin.register(Category)
 class CategoryAdmin(ModelAdmin):
@@ -44,8 +48,8 @@ class PostAdmin(ModelAdmin):
     def image_preview(self, obj):
         if obj.get_featured_image:
             return format_html(
-                '<img src="{}" style="max-height: 50px; max-width: 50px; border-radius: 4px; object-fit: cover;" />', 
-                obj.get_featured_image
+                '<img src="{}" style="max-height: 50px; max-width: 50px; border-radius: 4px; object-fit: cover;" loading="lazy" />',
+                images.smallest_url(obj)
             )
         return "🖼️"
     image_preview.short_description = 'Изобр.'
@@ -66,13 +70,14 @@ class PostAdmin(ModelAdmin):
                 '''
                 <div style="margin-top: 10px; padding: 15px; background: #1a1a1a; border-radius: 8px;">
                     <strong style="color: #fff;">Предпросмотр изображения:</strong><br>
-                    <img src="{}" style="max-height: 300px; max-width: 100%; margin-top: 10px; border-radius: 8px;" />
+                    <img src="{}" srcset="{}" sizes="600px" style="max-height: 300px; max-width: 100%; margin-top: 10px; border-radius: 8px;" />
                     <div style="margin-top: 10px; color: #888; font-size: 12px;">
                         {} • Приоритет: {}
                     </div>
                 </div>
                 ''', 
                 obj.get_featured_image,
+                images.srcset(obj, 'webp'),
                 obj.image_source,
                 "Ссылка" if obj.featured_image_url else "Загруженный файл"
             )
@@ -93,4 +98,62 @@ class CommentAdmin(ModelAdmin):
     
     @admin.action(description='Одобрить выбранные комментарии')
     def approve_comments(self, request, queryset):
-        queryset.update(is_approved=True)
+        # Через save(): каждое одобрение пишет событие в outbox
+        with transaction.atomic():
+            for comment in queryset.filter(is_approved=False):
+                comment.is_approved = True
+                comment.save(update_fields=['is_approved'])
+
+
+@admin.register(AuditRecord)
+class AuditRecordAdmin(ModelAdmin):
+    list_display = ['created_at', 'username', 'action', 'model', 'object_id', 'ip']
+    list_filter = ['action', 'model', 'created_at']
+    search_fields = ['username', 'object_id', 'details']
+    date_hierarchy = 'created_at'
+
+    # Журнал только для чтения
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Task)
+class TaskAdmin(ModelAdmin):
+    list_display = ['name', 'status', 'key', 'attempts', 'run_at', 'finished_at', 'locked_by']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'key', 'last_error']
+    readonly_fields = [field.name for field in Task._meta.fields]
+    actions = ['retry_tasks']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry_tasks(self, request, queryset):
+        queryset.filter(status=Task.FAILED).update(
+            status=Task.QUEUED, attempts=0, run_at=timezone.now(), finished_at=None,
+        )
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(ModelAdmin):
+    list_display = ['id', 'event_type', 'aggregate', 'created_at', 'attempts', 'dispatched_at', 'failed_at']
+    list_filter = ['event_type', 'dispatched_at', 'failed_at']
+    search_fields = ['aggregate', 'uuid', 'last_error']
+    readonly_fields = [field.name for field in OutboxEvent._meta.fields]
+    actions = ['retry_events']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Повторить доставку выбранных событий')
+    def retry_events(self, request, queryset):
+        queryset.filter(failed_at__isnull=False).update(
+            failed_at=None, attempts=0, next_attempt_at=timezone.now(), locked_until=None,
+        )
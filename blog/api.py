@@ -33,6 +33,13 @@ class PostViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Post.objects.filter(status='published')
     serializer_class = PostSerializer
     lookup_field = 'slug'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Связанные объекты нужны только там, где сериализуется сама статья
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.select_related('author', 'category').prefetch_related('tags')
+        return queryset
     
     @action(detail=True, methods=['post'])
     def comment(self, request, slug=None):
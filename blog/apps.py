@@ -8,4 +8,6 @@ class BlogConfig(AppConfig):
     def ready(self):
         # Импортируем сигналы для их активации
         import blog.signals
+        # Регистрируем фоновые задачи (blog/taskqueue.py)
+        import blog.tasks
         print("Сигналы логирования админки активированы")
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Буферизованная запись журнала аудита.
+
+Обработчики сигналов не пишут в базу напрямую: они кладут запись в буфер,
+а буфер сбрасывается одним bulk_create — при заполнении пачки, в конце
+запроса, по таймеру фонового потока и при завершении процесса. Пачка,
+которую не удалось записать, возвращается в буфер и пишется при следующем
+сбросе; буфер ограничен AUDIT_MAX_PENDING записями (лишние — самые старые —
+отбрасываются с ошибкой в логе).
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_MAX_PENDING = 10000
+
+
+class AuditWriter:
+    """Накопитель записей аудита с пакетным сбросом в базу"""
+
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'AUDIT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'AUDIT_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+    @property
+    def max_pending(self):
+        return getattr(settings, 'AUDIT_MAX_PENDING', DEFAULT_MAX_PENDING)
+
+    def add(self, username, action, model='', object_id='', details='', ip=None):
+        """Добавляет запись в буфер; при заполнении пачки сбрасывает её"""
+        record = {
+            'created_at': timezone.now(),
+            'username': str(username)[:150],
+            'action': str(action)[:20],
+            'model': str(model or '')[:100],
+            'object_id': str(object_id if object_id is not None else '')[:64],
+            'details': str(details or '')[:255],
+            'ip': ip or None,
+        }
+        with self._lock:
+            self._buffer.append(record)
+            pending = len(self._buffer)
+
+        if pending >= self.batch_size:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def reset(self):
+        """Отбрасывает накопленные записи, не записывая их (для тестов). Возвращает их число"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        return len(batch)
+
+    def flush(self):
+        """Записывает накопленные записи одним запросом. Возвращает их число"""
+        from .models import AuditRecord
+
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+
+        try:
+            AuditRecord.objects.bulk_create(
+                [AuditRecord(**record) for record in batch],
+                batch_size=self.batch_size,
+            )
+        except Exception:
+            logger.exception('Не удалось записать %s записей аудита, повтор при следующем сбросе', len(batch))
+            self._requeue(batch)
+            return 0
+        return len(batch)
+
+    def _requeue(self, batch):
+        """Возвращает пачку в начало буфера, не превышая max_pending"""
+        with self._lock:
+            self._buffer = batch + self._buffer
+            dropped = len(self._buffer) - self.max_pending
+            if dropped > 0:
+                del self._buffer[:dropped]
+        if dropped > 0:
+            logger.error('Буфер аудита переполнен, потеряно записей: %s', dropped)
+
+    def _ensure_thread(self):
+        if self.flush_interval <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='audit-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(max(self.flush_interval, 0.1))
+            if self.pending():
+                close_old_connections()
+                self.flush()
+                close_old_connections()
+
+
+writer = AuditWriter()
+
+
+def record(username, action, **kwargs):
+    """Короткий доступ к общему писателю аудита"""
+    writer.add(username, action, **kwargs)
+
+
+def _flush_on_request_finished(sender, **kwargs):
+    if writer.pending():
+        writer.flush()
+
+
+request_finished.connect(_flush_on_request_finished, dispatch_uid='blog.audit.flush')
+atexit.register(writer.flush)
@@ -0,0 +1,240 @@
+"""
+Замеры скорости горячих страниц блога через тестовый клиент Django.
+
+Для каждого маршрута считаются медиана и p95 времени ответа, число SQL-запросов
+на один запрос и размер ответа в байтах. Результат — JSON-отчёт, который удобно
+сравнивать между коммитами.
+"""
+import gzip
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from taggit.models import Tag
+
+from . import htmlmin, pagecache
+from .models import Category, Post
+from .seed import seed_blog
+
+
+def percentile(values, pct):
+    """Перцентиль с линейной интерполяцией (pct — от 0 до 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def seed_dataset(posts=200, categories=5, tags=20, authors=3, comments_per_post=3, seed=42):
+    """Заполняет базу детерминированным набором данных для замеров"""
+    return seed_blog(
+        seed=seed,
+        posts=posts,
+        categories=categories,
+        tags=tags,
+        authors=authors,
+        comments=posts * comments_per_post,
+    )
+
+
+def default_routes():
+    """Маршруты для замеров: (имя, URL), построенные по данным из базы"""
+    post = Post.objects.filter(status='published').order_by('-published_at').first()
+    if post is None:
+        raise ValueError('В базе нет опубликованных статей для замеров')
+    category = post.category or Category.objects.first()
+    tag = post.tags.first() or Tag.objects.first()
+
+    routes = [
+        ('post_list', reverse('blog:post_list')),
+        ('post_list_page_2', reverse('blog:post_list') + '?page=2'),
+        ('post_detail', reverse('blog:post_detail', kwargs={'slug': post.slug})),
+        ('search', reverse('blog:search') + '?q=python'),
+        ('api_post_list', reverse('post-list')),
+        ('api_post_detail', reverse('post-detail', kwargs={'slug': post.slug})),
+        ('api_category_list', reverse('category-list')),
+    ]
+    if category is not None:
+        routes.append(
+            ('category_posts', reverse('blog:category_posts', kwargs={'slug': category.slug}))
+        )
+    if tag is not None:
+        routes.append(('tag_posts', reverse('blog:tag_posts', kwargs={'tag_name': tag.name})))
+    return routes
+
+
+def measure(client, url, iterations=20, warmup=2):
+    """Замеряет один URL: время каждого запроса, число запросов к БД, размер ответа"""
+    for _ in range(warmup):
+        client.get(url, secure=True)
+
+    timings = []
+    queries = []
+    status_code = None
+    size = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url, secure=True)
+            content = b''.join(response) if response.streaming else response.content
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured.captured_queries))
+        status_code = response.status_code
+        size = len(content)
+
+    return {
+        'url': url,
+        'status': status_code,
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': max(queries),
+        'bytes': size,
+    }
+
+
+def git_revision():
+    """Текущий коммит (если проект лежит в git-репозитории)"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmark(routes=None, iterations=20, warmup=2, dataset=None, only=None):
+    """Прогоняет все маршруты и возвращает отчёт в виде словаря"""
+    client = Client()
+    routes = routes or default_routes()
+    if only:
+        routes = [(name, url) for name, url in routes if name in only]
+
+    report = {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': iterations,
+            'dataset': dataset or {},
+        },
+        'routes': {},
+    }
+    # Замеряется рендер страниц: из кэша страниц все запросы, кроме первого, были бы попаданиями
+    with override_settings(PAGE_CACHE=False):
+        for name, url in routes:
+            report['routes'][name] = measure(client, url, iterations=iterations, warmup=warmup)
+    return report
+
+
+def _consume(response):
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    response.close()
+    return size
+
+
+def compare_media_serving(path, iterations=20):
+    """
+    Сравнение blog.views.serve_media с django.views.static.serve на файле
+    MEDIA_ROOT/path: полная отдача, повторный запрос с If-None-Match и
+    Range-запрос первых 64 КБ. Время — до конца чтения тела ответа.
+    """
+    from django.views.static import serve
+
+    from .views import serve_media
+
+    factory = RequestFactory()
+    etag = serve_media(factory.get('/'), path)['ETag']
+    scenarios = {
+        'full': {},
+        'revalidate': {'HTTP_IF_NONE_MATCH': etag},
+        'range': {'HTTP_RANGE': 'bytes=0-65535'},
+    }
+    views = {
+        'serve_media': lambda request: serve_media(request, path),
+        'static_serve': lambda request: serve(request, path, document_root=settings.MEDIA_ROOT),
+    }
+    report = {}
+    for scenario, headers in scenarios.items():
+        row = report[scenario] = {}
+        for name, view in views.items():
+            timings = []
+            for _ in range(iterations):
+                request = factory.get('/', **headers)
+                started = time.perf_counter()
+                response = view(request)
+                size = _consume(response)
+                timings.append((time.perf_counter() - started) * 1000)
+            row[name] = {
+                'status': response.status_code,
+                'bytes': size,
+                'median_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+            }
+    return report
+
+
+def _timed_get(client, url):
+    started = time.perf_counter()
+    response = client.get(url, secure=True)
+    return response, (time.perf_counter() - started) * 1000
+
+
+def compare_html_minify(iterations=20, routes=('post_list', 'post_detail')):
+    """
+    Минификация HTML на страницах блога: размер до и после (и после gzip),
+    время минификации и время ответа без кэша страниц и с ним (минифицированная
+    страница из кэша против рендера с минификацией).
+    """
+    client = Client()
+    urls = dict(default_routes())
+    report = {}
+    for name in routes:
+        url = urls[name]
+        with override_settings(PAGE_CACHE=False, HTML_MINIFY=False):
+            raw = client.get(url, secure=True).content
+        html = raw.decode()
+        minify_timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            minified = htmlmin.minify(html).encode()
+            minify_timings.append((time.perf_counter() - started) * 1000)
+
+        with override_settings(PAGE_CACHE=True, HTML_MINIFY=True):
+            miss_timings, hit_timings = [], []
+            for _ in range(iterations):
+                pagecache.invalidate()
+                miss_timings.append(_timed_get(client, url)[1])
+                hit_timings.append(_timed_get(client, url)[1])
+            pagecache.invalidate()
+
+        report[name] = {
+            'url': url,
+            'bytes': len(raw),
+            'minified_bytes': len(minified),
+            'saved_bytes': len(raw) - len(minified),
+            'gzip_bytes': len(gzip.compress(raw)),
+            'gzip_minified_bytes': len(gzip.compress(minified)),
+            'minify_ms': round(statistics.median(minify_timings), 3),
+            'miss_ms': round(statistics.median(miss_timings), 3),
+            'hit_ms': round(statistics.median(hit_timings), 3),
+        }
+    return report
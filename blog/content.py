@@ -0,0 +1,262 @@
+"""
+Предварительная отрисовка содержимого статьи при сохранении.
+
+HTML из CKEditor проходит один раз через html.parser и превращается в
+Post.content_html: разрешены только теги и атрибуты из списков ниже,
+блоки <pre><code class="language-…"> подсвечиваются Pygments, заголовки
+h2–h3 получают id и ссылку-якорь и попадают в оглавление (Post.content_toc),
+картинкам добавляются loading="lazy" и размеры, если файл лежит в медиа.
+Страница статьи просто выводит готовую колонку, а highlight.js не нужен.
+"""
+import html
+import logging
+import math
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import TextLexer, get_lexer_by_name
+from pygments.util import ClassNotFound
+from slugify import slugify
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup', 'mark', 'span', 'code', 'pre',
+    'a', 'ul', 'ol', 'li', 'blockquote', 'figure', 'figcaption', 'img',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'caption',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'code': {'class'},
+    'figure': {'class'},
+    'ol': {'start'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Содержимое этих тегов выбрасывается вместе с ними
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'svg', 'math'}
+SAFE_SCHEMES = {'', 'http', 'https', 'mailto'}
+TOC_LEVELS = {'h2', 'h3'}
+
+FORMATTER = HtmlFormatter(nowrap=True)
+
+
+def safe_url(value):
+    value = (value or '').strip()
+    try:
+        scheme = urlsplit(value).scheme.lower()
+    except ValueError:
+        return None
+    return value if scheme in SAFE_SCHEMES else None
+
+
+def highlight_code(code, language):
+    """HTML подсветки Pygments (без обёртки); неизвестный язык — просто текст"""
+    try:
+        lexer = get_lexer_by_name(language) if language else TextLexer()
+    except ClassNotFound:
+        lexer = TextLexer()
+    return highlight(code, lexer, FORMATTER)
+
+
+def image_size(src):
+    """Размеры локального медиафайла (читается только заголовок)"""
+    media_url = settings.MEDIA_URL
+    path = urlsplit(src).path
+    if not media_url or not path.startswith(media_url):
+        return None
+    try:
+        with default_storage.open(path[len(media_url):], 'rb') as f:
+            return Image.open(f).size
+    except Exception as e:
+        logger.debug('Не удалось прочитать размеры %s: %s', src, e)
+        return None
+
+
+class ContentRenderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.stack = []
+        self.drop_depth = 0
+        self.toc = []
+        self.slugs = set()
+        self.code = None        # [язык, [текст]] внутри <pre>
+        self.heading = None     # [тег, атрибуты, [html], [текст]]
+
+    # Вывод
+
+    def emit(self, chunk, text=None):
+        if self.heading is not None:
+            self.heading[2].append(chunk)
+            if text is not None:
+                self.heading[3].append(text)
+        else:
+            self.out.append(chunk)
+
+    def start(self, tag, attrs):
+        rendered = ''.join(f' {name}="{html.escape(value, quote=True)}"' for name, value in attrs)
+        return f'<{tag}{rendered}>'
+
+    # Разбор
+
+    def handle_starttag(self, tag, attrs):
+        if self.drop_depth or tag in DROP_CONTENT_TAGS:
+            if tag in DROP_CONTENT_TAGS:
+                self.drop_depth += 1
+            return
+        if self.code is not None:
+            if tag == 'code':
+                self.code[0] = self.language(attrs) or self.code[0]
+            return
+        if tag not in ALLOWED_TAGS:
+            return
+
+        attrs = self.clean_attrs(tag, attrs)
+        if tag == 'pre':
+            self.code = ['', []]
+            return
+        if tag == 'img':
+            self.emit(self.start(tag, self.image_attrs(attrs)))
+            return
+        if tag in VOID_TAGS:
+            self.emit(self.start(tag, attrs))
+            return
+        if tag in TOC_LEVELS and self.heading is None:
+            self.stack.append(tag)
+            self.heading = [tag, attrs, [], []]
+            return
+        if tag == 'a':
+            attrs.append(('rel', 'noopener nofollow'))
+        self.stack.append(tag)
+        self.emit(self.start(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS and self.drop_depth:
+            self.drop_depth -= 1
+            return
+        if self.drop_depth:
+            return
+        if self.code is not None:
+            if tag == 'pre':
+                language, parts = self.code
+                self.code = None
+                css = f' class="language-{html.escape(language)}"' if language else ''
+                self.emit(f'<pre class="highlight"><code{css}>{highlight_code("".join(parts), language)}</code></pre>')
+            return
+        if tag not in self.stack:
+            return
+        # Закрываем всё, что осталось открытым внутри
+        while self.stack:
+            open_tag = self.stack.pop()
+            self.close_tag(open_tag)
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.drop_depth:
+            return
+        if self.code is not None:
+            self.code[1].append(data)
+            return
+        self.emit(html.escape(data, quote=False), data)
+
+    def close_tag(self, tag):
+        if self.heading is not None and tag == self.heading[0]:
+            self.finish_heading()
+        else:
+            self.emit(f'</{tag}>')
+
+    def finish_heading(self):
+        tag, attrs, parts, text = self.heading
+        self.heading = None
+        title = ' '.join(''.join(text).split())
+        anchor = self.unique_slug(title)
+        attrs = [(name, value) for name, value in attrs if name != 'id'] + [('id', anchor)]
+        self.out.append(
+            f'{self.start(tag, attrs)}{"".join(parts)}'
+            f'<a class="heading-anchor" href="#{anchor}" aria-hidden="true">#</a></{tag}>'
+        )
+        self.toc.append({'level': int(tag[1]), 'id': anchor, 'title': title})
+
+    def close_all(self):
+        if self.code is not None:
+            self.handle_endtag('pre')
+        while self.stack:
+            self.close_tag(self.stack.pop())
+
+    # Атрибуты
+
+    def clean_attrs(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set())
+        cleaned = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in ('href', 'src'):
+                value = safe_url(value)
+                if value is None:
+                    continue
+            if name == 'class' and tag == 'code' and not value.startswith('language-'):
+                continue
+            cleaned.append((name, value))
+        return cleaned
+
+    def language(self, attrs):
+        for name, value in attrs:
+            if name == 'class' and value:
+                for css in value.split():
+                    if css.startswith('language-'):
+                        return css[len('language-'):]
+        return ''
+
+    def image_attrs(self, attrs):
+        names = {name for name, _ in attrs}
+        if 'src' not in names:
+            return attrs
+        if not {'width', 'height'} <= names:
+            size = image_size(dict(attrs)['src'])
+            if size:
+                attrs = [(n, v) for n, v in attrs if n not in ('width', 'height')]
+                attrs += [('width', str(size[0])), ('height', str(size[1]))]
+        return attrs + [('loading', 'lazy'), ('decoding', 'async')]
+
+    def unique_slug(self, title):
+        base = slugify(title) or 'section'
+        anchor, n = base, 2
+        while anchor in self.slugs:
+            anchor, n = f'{base}-{n}', n + 1
+        self.slugs.add(anchor)
+        return anchor
+
+
+def render_content(source):
+    """(content_html, content_toc) для HTML из редактора"""
+    renderer = ContentRenderer()
+    renderer.feed(source or '')
+    renderer.close()
+    renderer.close_all()
+    return ''.join(renderer.out), renderer.toc
+
+
+def reading_time(source):
+    """Минуты чтения: слова исходника по 200 в минуту, с округлением вверх и запасом в минуту"""
+    return math.ceil(len((source or '').split()) / 200) + 1
+
+
+def pygments_css(style='github-dark'):
+    """CSS для классов подсветки внутри .highlight"""
+    return HtmlFormatter(style=style).get_style_defs('.highlight')
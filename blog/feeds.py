@@ -0,0 +1,209 @@
+"""
+Ленты RSS, Atom и JSON Feed: общая, по категории и по тегу.
+
+/feed.xml, /feed.atom, /feed.json и то же под /category/<slug>/ и
+/tag/<имя>/. Ленты строятся фреймворком django.contrib.syndication, JSON
+Feed 1.1 — своим генератором. В описание статьи идёт готовый excerpt, а
+не content: тело статьи для ленты не загружается и не рендерится.
+
+Агрегаторы опрашивают ленты часто и почти всегда впустую, поэтому готовое
+тело лежит в кэше страниц под его поколением (меняется с любым
+изменением контента, см. signals.py), а ответ несёт ETag (хэш тела) и
+Last-Modified (самая свежая статья). Условный запрос при неизменной ленте
+получает 304 без единого обращения к БД; после инвалидации лента
+собирается заново, но тот же ETag всё равно даёт 304.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed, SyndicationFeed
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from taggit.models import Tag
+
+from . import pagecache
+from .models import Category, Post
+
+
+class JSONFeed(SyndicationFeed):
+    """JSON Feed 1.1 (https://jsonfeed.org/version/1.1)"""
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def write(self, outfile, encoding):
+        data = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.feed['title'],
+            'home_page_url': self.feed['link'],
+            'feed_url': self.feed['feed_url'],
+            'description': self.feed['description'],
+            'language': self.feed['language'],
+            'items': [self.item_data(item) for item in self.items],
+        }
+        outfile.write(json.dumps(data, ensure_ascii=False).encode(encoding))
+
+    def item_data(self, item):
+        data = {
+            'id': item['unique_id'] or item['link'],
+            'url': item['link'],
+            'title': item['title'],
+            'content_text': item['description'],
+            'summary': item['description'],
+        }
+        if item['pubdate']:
+            data['date_published'] = item['pubdate'].isoformat()
+        if item['updateddate']:
+            data['date_modified'] = item['updateddate'].isoformat()
+        if item['author_name']:
+            data['authors'] = [{'name': item['author_name']}]
+        if item['categories']:
+            data['tags'] = list(item['categories'])
+        return data
+
+
+# Расширение адреса -> генератор
+FEED_TYPES = {
+    'xml': Rss201rev2Feed,
+    'atom': Atom1Feed,
+    'json': JSONFeed,
+}
+
+
+def feed_posts():
+    """Опубликованные статьи для ленты: без content и content_html, они там не нужны"""
+    return (
+        Post.objects.filter(status='published')
+        .select_related('author', 'category')
+        .prefetch_related('tags')
+        .defer('content', 'content_html', 'content_toc')
+    )
+
+
+class PostsFeed(Feed):
+    """Общая лента: последние FEED_ITEMS опубликованных статей"""
+    title = settings.PWA_NAME
+    description = settings.PWA_DESCRIPTION
+
+    def link(self, obj):
+        return reverse('blog:post_list')
+
+    def items(self, obj):
+        return feed_posts()[:settings.FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.published_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return [tag.name for tag in item.tags.all()]
+
+
+class CategoryFeed(PostsFeed):
+    """Лента категории"""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Category, slug=slug)
+
+    def title(self, obj):
+        return f'{obj.name} | {settings.PWA_NAME}'
+
+    def description(self, obj):
+        return obj.description or f'Статьи категории «{obj.name}»'
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=[obj.slug])
+
+    def items(self, obj):
+        return feed_posts().filter(category=obj)[:settings.FEED_ITEMS]
+
+
+class TagFeed(PostsFeed):
+    """Лента тега"""
+
+    def get_object(self, request, tag_name):
+        return get_object_or_404(Tag, name=tag_name)
+
+    def title(self, obj):
+        return f'#{obj.name} | {settings.PWA_NAME}'
+
+    def description(self, obj):
+        return f'Статьи с тегом #{obj.name}'
+
+    def link(self, obj):
+        return reverse('blog:tag_posts', args=[obj.name])
+
+    def items(self, obj):
+        return feed_posts().filter(tags=obj)[:settings.FEED_ITEMS]
+
+
+def etag(content):
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def _render(feed, request, kwargs):
+    response = feed(request, **kwargs)
+    return {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'etag': etag(response.content),
+        'last_modified': parse_http_date_safe(response.get('Last-Modified', '')),
+    }
+
+
+def feed_view(feed_class):
+    """
+    Представление ленты во всех форматах (формат — из адреса) с кэшем
+    тела по поколению контента и условными запросами.
+    """
+    feeds = {fmt: type(feed_class.__name__, (feed_class,), {'feed_type': feed_type})()
+             for fmt, feed_type in FEED_TYPES.items()}
+
+    @require_safe
+    def view(request, fmt, **kwargs):
+        feed = feeds.get(fmt)
+        if feed is None:
+            raise Http404('Нет такого формата ленты')
+
+        if settings.PAGE_CACHE:
+            cache = pagecache.get_cache()
+            url = f'{request.scheme}://{request.get_host()}{request.path}'
+            key = f'feed:{pagecache.generation()}:{hashlib.sha256(url.encode()).hexdigest()}'
+            entry = cache.get(key)
+            if entry is None:
+                entry = _render(feed, request, kwargs)
+                cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+        else:
+            entry = _render(feed, request, kwargs)
+
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        if entry['last_modified'] is not None:
+            response['Last-Modified'] = http_date(entry['last_modified'])
+        response['Cache-Control'] = f'public, max-age={settings.FEED_MAX_AGE}'
+        # 304, если у клиента та же версия (If-None-Match / If-Modified-Since)
+        return get_conditional_response(
+            request, etag=entry['etag'], last_modified=entry['last_modified'], response=response,
+        )
+
+    return view
+
+
+posts_feed = feed_view(PostsFeed)
+category_feed = feed_view(CategoryFeed)
+tag_feed = feed_view(TagFeed)
@@ -0,0 +1,131 @@
+"""
+Подсказки загрузки: заголовок Link (preload, preconnect, prefetch) и
+103 Early Hints.
+
+Браузер узнаёт о site.css, шрифте и обложке статьи, только разобрав <head>
+из base.html. Заголовок Link приходит вместе со статусом ответа, и загрузка
+начинается раньше. Если сервер умеет отправлять 103 Early Hints (кладёт
+функцию в environ под ключом EARLY_HINTS_ENVIRON_KEY), те же ссылки уходят
+ещё до того, как представление начнёт работать.
+
+Ссылки складываются из двух частей:
+  - манифест маршрута: PRELOAD_ASSETS для всех страниц ('*') и для url name,
+    адреса статики с хэшем из manifest collectstatic, вычисляются один раз;
+  - подсказки, которые представление добавляет через add() из уже
+    загруженных объектов: обложка статьи, следующая страница списка.
+Запросов к БД ни то, ни другое не добавляет. Для 103 вторая часть берётся
+из прошлого ответа на тот же адрес (запоминается в кэше страниц до смены
+поколения).
+"""
+import hashlib
+import logging
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import Resolver404, resolve
+from django.utils.encoding import iri_to_uri
+
+from . import pagecache
+from .templatetags.static_tags import static_url
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[\w!#$%&'*+.^`|~-]+")
+
+
+def link(url, rel='preload', **params):
+    """
+    Значение для заголовка Link:
+    link('/static/a.css', as_='style') -> '</static/a.css>; rel=preload; as=style'.
+    True — параметр без значения (crossorigin), пустые значения пропускаются.
+    """
+    parts = [f'<{iri_to_uri(url)}>', f'rel={rel}']
+    for name, value in params.items():
+        name = name.rstrip('_')
+        if value is True:
+            parts.append(name)
+        elif value:
+            value = str(value)
+            parts.append(f'{name}={value}' if TOKEN.fullmatch(value) else f'{name}="{value}"')
+    return '; '.join(parts)
+
+
+@lru_cache(maxsize=None)
+def route_links(view_name):
+    """Ссылки из манифеста для маршрута: общие ресурсы и ресурсы этого url name"""
+    links = [link(origin, 'preconnect', crossorigin=True) for origin in settings.PRELOAD_PRECONNECT]
+    assets = settings.PRELOAD_ASSETS.get('*', []) + settings.PRELOAD_ASSETS.get(view_name, [])
+    for asset in assets:
+        params = {name: value for name, value in asset.items() if name not in ('path', 'rel')}
+        links.append(link(static_url(asset['path']), asset.get('rel', 'preload'), **params))
+    return tuple(links)
+
+
+@receiver(setting_changed)
+def clear_route_links(setting, **kwargs):
+    if setting.startswith('PRELOAD_') or setting in ('STATIC_URL', 'STORAGES'):
+        route_links.cache_clear()
+
+
+def enabled(request):
+    return (
+        settings.PRELOAD_HINTS
+        and request.method in ('GET', 'HEAD')
+        and not request.path.startswith(tuple(settings.PRELOAD_EXCLUDE))
+    )
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+    return match.view_name
+
+
+def add(request, url, rel='preload', **params):
+    """Подсказка от представления для текущего ответа"""
+    request.preload_links = request_links(request) + [link(url, rel, **params)]
+
+
+def request_links(request):
+    return list(getattr(request, 'preload_links', ()))
+
+
+def response_links(request):
+    return list(route_links(view_name(request))) + request_links(request)
+
+
+# 103 Early Hints
+
+def _remembered_key(request):
+    digest = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+    return f'earlyhints:{pagecache.generation()}:{digest}'
+
+
+def early_links(request):
+    """Ссылки до работы представления: манифест и то, что представление добавило в прошлый раз"""
+    remembered = pagecache.get_cache().get(_remembered_key(request)) or []
+    return list(route_links(view_name(request))) + remembered
+
+
+def remember(request):
+    links = request_links(request)
+    if links:
+        pagecache.get_cache().set(_remembered_key(request), links, settings.PAGE_CACHE_TIMEOUT)
+
+
+def send_early_hints(request, send):
+    links = early_links(request)
+    if not links:
+        return
+    try:
+        send([('Link', ', '.join(links))])
+    except Exception as e:
+        # Подсказка необязательна: ответ уйдёт и без неё
+        logger.debug('103 Early Hints не отправлены: %s', e)
@@ -0,0 +1,172 @@
+"""
+Минификация HTML-ответов.
+
+Шаблоны blog/ отдают много отступов и переводов строк, а классы Tailwind
+в атрибутах разбиты по строкам. Минификатор:
+
+  - схлопывает пробельные последовательности в тексте до одного пробела и
+    убирает пробелы между тегами, если хотя бы один из них блочный (там
+    пробел не влияет на отрисовку);
+  - нормализует пробелы внутри тегов и в значениях class;
+  - удаляет HTML-комментарии (кроме условных <!--[if ...]>);
+  - не трогает содержимое <pre>, <code>, <textarea>, <script> и <style>.
+
+Работает потоково: feed() принимает очередной кусок и возвращает то, что
+уже можно отдать; незаконченный тег или комментарий на границе кусков
+остаётся в буфере до следующего вызова, close() отдаёт остаток.
+"""
+import codecs
+import re
+
+RAW_TAGS = {'pre', 'code', 'textarea', 'script', 'style'}
+BLOCK_TAGS = {
+    'html', 'head', 'body', 'title', 'meta', 'link', 'script', 'style', 'noscript', 'base',
+    'div', 'p', 'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'nav', 'header', 'footer', 'main', 'section',
+    'article', 'aside', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'form', 'fieldset', 'table', 'thead',
+    'tbody', 'tfoot', 'tr', 'td', 'th', 'caption', 'br', 'hr', 'figure', 'figcaption', 'blockquote',
+    'pre', 'picture', 'source', 'option', '!doctype',
+}
+
+TAG = re.compile(r'<(?:[a-zA-Z]|/[a-zA-Z]|!)(?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+TAG_NAME = re.compile(r'<(/?)(!?[a-zA-Z][\w:-]*)')
+QUOTED = re.compile(r'("[^"]*"|\'[^\']*\')')
+WHITESPACE = re.compile(r'\s+')
+# Незакрытый тег дольше этого считается текстом (например, «a < b» в тексте)
+MAX_PENDING = 64 * 1024
+
+
+def minify_tag(tag):
+    """Пробелы между атрибутами — один пробел, значение class — без лишних пробелов"""
+    parts = QUOTED.split(tag)
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            part = WHITESPACE.sub(' ', part)
+            parts[i] = re.sub(r' ?(/?>)$', r'\1', part) if i == len(parts) - 1 else part
+        elif parts[i - 1].rstrip().lower().endswith('class='):
+            quote = part[0]
+            parts[i] = quote + ' '.join(part[1:-1].split()) + quote
+    return ''.join(parts)
+
+
+class HTMLMinifier:
+    def __init__(self):
+        self.buffer = ''
+        self.raw = None             # имя тега, содержимое которого копируется как есть
+        self.space = False          # между последним выведенным и следующим был пробел
+        self.after_block = True     # последним выведен блочный тег (или это начало документа)
+
+    def feed(self, data):
+        self.buffer += data
+        return self._process(final=False)
+
+    def close(self):
+        return self._process(final=True)
+
+    def _separator(self, block):
+        sep = ' ' if self.space and not (self.after_block or block) else ''
+        self.space = False
+        return sep
+
+    def _text(self, text, out):
+        if not text:
+            return
+        collapsed = WHITESPACE.sub(' ', text)
+        if collapsed == ' ':
+            self.space = True
+            return
+        if collapsed.startswith(' '):
+            self.space = True
+            collapsed = collapsed[1:]
+        trailing = collapsed.endswith(' ')
+        if trailing:
+            collapsed = collapsed[:-1]
+        out.append(self._separator(False) + collapsed)
+        self.after_block = False
+        self.space = trailing
+
+    def _tag(self, tag, out):
+        if tag.startswith('<!--'):
+            if tag.startswith('<!--['):
+                out.append(tag)
+            return
+        match = TAG_NAME.match(tag)
+        closing, name = (match.group(1), match.group(2).lower()) if match else ('', '')
+        block = name in BLOCK_TAGS
+        out.append(self._separator(block) + minify_tag(tag))
+        self.after_block = block
+        if not closing and name in RAW_TAGS and not tag.endswith('/>'):
+            self.raw = name
+
+    def _process(self, final):
+        out = []
+        buf, pos = self.buffer, 0
+        while pos < len(buf):
+            if self.raw:
+                end = re.compile(rf'</{self.raw}\s*>', re.I).search(buf, pos)
+                if end is None:
+                    # Конец может прийти в следующем куске: придерживаем хвост длиной с закрывающий тег
+                    keep = len(buf) if final else max(pos, len(buf) - len(self.raw) - 16)
+                    out.append(buf[pos:keep])
+                    pos = keep
+                    break
+                out.append(buf[pos:end.start()] + end.group())
+                self.raw = None
+                self.after_block = end.group()[2:-1].strip().lower() in BLOCK_TAGS
+                self.space = False
+                pos = end.end()
+                continue
+
+            lt = buf.find('<', pos)
+            if lt == -1:
+                self._text(buf[pos:], out)
+                pos = len(buf)
+                break
+            self._text(buf[pos:lt], out)
+            pos = lt
+
+            if buf.startswith('<!--', pos):
+                end = buf.find('-->', pos + 4)
+                if end == -1:
+                    if final:
+                        self._text(buf[pos:], out)
+                        pos = len(buf)
+                    break
+                self._tag(buf[pos:end + 3], out)
+                pos = end + 3
+                continue
+
+            match = TAG.match(buf, pos)
+            if match:
+                self._tag(match.group(), out)
+                pos = match.end()
+                continue
+            # Тег может продолжиться в следующем куске
+            tag_start = len(buf) - pos < 2 or re.match(r'<[a-zA-Z/!]', buf[pos:pos + 2])
+            if tag_start and not final and len(buf) - pos < MAX_PENDING:
+                break
+            # Одиночный «<» в тексте
+            self._text('<', out)
+            pos += 1
+
+        self.buffer = buf[pos:]
+        if final and self.space and not self.after_block:
+            out.append(' ')
+        return ''.join(out)
+
+
+def minify(html):
+    minifier = HTMLMinifier()
+    return minifier.feed(html) + minifier.close()
+
+
+def minify_stream(chunks, charset='utf-8'):
+    """Минификация потока байтов (StreamingHttpResponse) без сборки целого ответа"""
+    decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+    minifier = HTMLMinifier()
+    for chunk in chunks:
+        text = minifier.feed(decoder.decode(chunk))
+        if text:
+            yield text.encode(charset)
+    tail = minifier.feed(decoder.decode(b'', final=True)) + minifier.close()
+    if tail:
+        yield tail.encode(charset)
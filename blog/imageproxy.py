@@ -0,0 +1,238 @@
+"""
+Кэширующий прокси для внешних обложек (Post.featured_image_url).
+
+Вместо хотлинка на чужой хост страница ссылается на /img-proxy/<token>/, где
+token — подписанные django.core.signing адрес и ширина. Прокси один раз
+скачивает оригинал, нормализует его (поворот по EXIF, RGB, уменьшение до
+ширины, JPEG) и кладёт результат в ограниченный по размеру дисковый кэш с
+вытеснением давно не читанных файлов.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import urllib.request
+from contextlib import contextmanager
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+try:
+    import fcntl
+except ImportError:  # Windows: остаётся только блокировка внутри процесса
+    fcntl = None
+
+SALT = 'blog.imageproxy'
+
+
+class ProxyError(Exception):
+    """Не удалось получить или разобрать внешнее изображение"""
+
+
+class DiskLRUCache:
+    """
+    Файловый кэш с ограничением суммарного размера. Время последнего чтения
+    хранится в mtime файла; при переполнении удаляются самые старые записи.
+    Запись атомарна: временный файл в том же каталоге и os.replace.
+
+    Суммарный размер процесс ведёт сам, прибавляя записанное: каталог
+    обходится только при переполнении (вытеснение до EVICT_TARGET от
+    max_bytes) и раз в RESCAN_EVERY записей — чтобы учесть файлы, записанные
+    другими воркерами.
+
+    get_or_create объединяет одновременные промахи по одному ключу: строит
+    значение только первый запрос, остальные ждут и читают готовый файл.
+    Блокировки полосатые (256 полос по первым символам ключа) — потоками
+    и, через fcntl.flock, между воркерами gunicorn.
+    """
+
+    EVICT_TARGET = 0.9
+    RESCAN_EVERY = 256
+
+    _thread_locks = {}
+    _thread_locks_guard = threading.Lock()
+    # каталог -> (оценка суммарного размера, записей с последнего обхода)
+    _sizes = {}
+    _sizes_guard = threading.Lock()
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def set(self, key, data):
+        path = self.path(key)
+        try:
+            previous = os.stat(path).st_size
+        except FileNotFoundError:
+            previous = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if self._grow(len(data) - previous):
+            self.evict()
+
+    def _grow(self, delta):
+        """Учитывает запись; True, если пора обойти каталог"""
+        with self._sizes_guard:
+            total, writes = self._sizes.get(self.directory, (None, 0))
+            if total is None:
+                return True
+            total += delta
+            writes += 1
+            self._sizes[self.directory] = (total, writes)
+        return total > self.max_bytes or writes >= self.RESCAN_EVERY
+
+    @contextmanager
+    def lock(self, key):
+        stripe = key[:2]
+        with self._thread_locks_guard:
+            thread_lock = self._thread_locks.setdefault((self.directory, stripe), threading.Lock())
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            lock_dir = os.path.join(self.directory, '.locks')
+            os.makedirs(lock_dir, exist_ok=True)
+            with open(os.path.join(lock_dir, f'{stripe}.lock'), 'a') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get_or_create(self, key, build):
+        """Значение из кэша или результат build(), построенный один раз"""
+        data = self.get(key)
+        if data is not None:
+            return data
+        with self.lock(key):
+            data = self.get(key)
+            if data is None:
+                data = build()
+                self.set(key, data)
+        return data
+
+    def entries(self):
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            for name in files:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Обходит каталог и, если он переполнен, удаляет старые записи с запасом"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * self.EVICT_TARGET
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+        with self._sizes_guard:
+            self._sizes[self.directory] = (total, 0)
+
+
+def get_cache():
+    return DiskLRUCache(settings.IMAGE_PROXY_CACHE_DIR, settings.IMAGE_PROXY_CACHE_SIZE)
+
+
+def proxy_url(url, width):
+    """Адрес картинки через прокси; ширина и адрес защищены подписью"""
+    token = signing.dumps({'u': url, 'w': int(width)}, salt=SALT, compress=True)
+    return reverse('image_proxy', kwargs={'token': token})
+
+
+def unsign(token):
+    """(url, width) из токена; signing.BadSignature при подделке"""
+    payload = signing.loads(token, salt=SALT)
+    return payload['u'], int(payload['w'])
+
+
+def cache_key(url, width):
+    return hashlib.sha256(f'{width}:{url}'.encode()).hexdigest()
+
+
+def fetch(url):
+    """Скачивает оригинал, ограничивая время и размер ответа"""
+    if urlsplit(url).scheme not in ('http', 'https'):
+        raise ProxyError(f'Неподдерживаемая схема: {url}')
+    limit = settings.IMAGE_PROXY_MAX_SOURCE_BYTES
+    request = urllib.request.Request(url, headers={'User-Agent': 'codewithbrain-image-proxy'})
+    try:
+        with urllib.request.urlopen(request, timeout=settings.IMAGE_PROXY_TIMEOUT) as response:
+            data = response.read(limit + 1)
+    except (OSError, ValueError) as e:
+        raise ProxyError(f'{url}: {e}')
+    if len(data) > limit:
+        raise ProxyError(f'{url}: больше {limit} байт')
+    return data
+
+
+def normalize(data, width):
+    """Поворот по EXIF, RGB, уменьшение до width (без увеличения), JPEG"""
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ProxyError(f'Не изображение: {e}')
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=settings.IMAGE_VARIANT_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def get_image(url, width, cache=None):
+    """Нормализованная картинка из кэша или, при промахе, из сети"""
+    cache = cache or get_cache()
+    return cache.get_or_create(cache_key(url, width), lambda: normalize(fetch(url), width))
+
+
+def etag(data):
+    return '"%s"' % hashlib.sha256(data).hexdigest()[:32]
@@ -0,0 +1,199 @@
+"""
+Адаптивные варианты обложек статей.
+
+При сохранении Post.featured_image из оригинала строятся уменьшенные копии
+фиксированной ширины в WebP и JPEG, а в Post.featured_image_variants
+записываются их размеры и крошечная размытая заглушка (data URI), которую
+шаблон показывает, пока грузится картинка.
+"""
+import base64
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageFilter, ImageOps
+
+from . import imageproxy
+from .storage import PreparedFile
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+PLACEHOLDER_WIDTH = 16
+
+
+def variant_widths():
+    return sorted(getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 960, 1280]))
+
+
+def variant_name(source, width, fmt):
+    """posts/2024/01/cat.png -> posts/2024/01/variants/cat-640w.webp"""
+    folder, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    ext = 'jpg' if fmt == 'jpeg' else fmt
+    return posixpath.join(folder, 'variants', f'{stem}-{width}w.{ext}')
+
+
+def _encode(image, fmt, quality):
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # У JPEG нет прозрачности — кладём на белый фон
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, FORMATS[fmt][0], quality=quality, optimize=fmt == 'jpeg', progressive=fmt == 'jpeg')
+    return buffer.getvalue()
+
+
+def placeholder(image):
+    """Размытая миниатюра шириной 16px в виде data URI (сотни байт)"""
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    small = image.convert('RGB').resize((PLACEHOLDER_WIDTH, height), Image.Resampling.BILINEAR)
+    small = small.filter(ImageFilter.GaussianBlur(1))
+    data = _encode(small, 'jpeg', 40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(data).decode('ascii')
+
+
+def build_variants(source, storage=None):
+    """
+    Читает оригинал из хранилища, сохраняет варианты рядом с ним и возвращает
+    описание для Post.featured_image_variants. Не увеличивает изображения:
+    если оригинал уже всех ширин, остаётся один вариант его собственной ширины.
+    """
+    storage = storage or default_storage
+    quality = getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+
+    with storage.open(source, 'rb') as f:
+        image = Image.open(f)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    widths = [w for w in variant_widths() if w < image.width] or [image.width]
+    if image.width not in widths and image.width < max(variant_widths()):
+        widths.append(image.width)
+
+    variants = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in FORMATS:
+            name = variant_name(source, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, PreparedFile(_encode(resized, fmt, quality)))
+            variants.append({'name': name, 'format': fmt, 'width': width, 'height': height})
+
+    return {
+        'source': source,
+        'width': image.width,
+        'height': image.height,
+        'placeholder': placeholder(image),
+        'variants': variants,
+    }
+
+
+def delete_variants(data, storage=None):
+    storage = storage or default_storage
+    for variant in (data or {}).get('variants', []):
+        try:
+            storage.delete(variant['name'])
+        except Exception:
+            logger.warning('Не удалось удалить вариант %s', variant['name'])
+
+
+def needs_variants(post):
+    """Варианты построены не для текущего файла обложки (или остались от удалённого)"""
+    source = post.featured_image.name if post.featured_image else None
+    return (post.featured_image_variants or {}).get('source') != source
+
+
+def shared_source(post, source):
+    """Тот же файл обложки (после дедупликации) используют другие статьи"""
+    return type(post).objects.filter(featured_image=source).exclude(pk=post.pk).exists()
+
+
+def update_variants(post):
+    """Перестраивает варианты обложки статьи и сохраняет их без повторного post_save"""
+    storage = post.featured_image.storage
+    old = post.featured_image_variants or {}
+    data = build_variants(post.featured_image.name, storage) if post.featured_image else {}
+    if old and old.get('source') != data.get('source') and not shared_source(post, old['source']):
+        delete_variants(old, storage)
+    type(post).objects.filter(pk=post.pk).update(featured_image_variants=data)
+    post.featured_image_variants = data
+    return data
+
+
+def proxied(post):
+    """Внешняя обложка отдаётся через кэширующий прокси"""
+    return bool(post.featured_image_url) and settings.IMAGE_PROXY_ENABLED
+
+
+def srcset(post, fmt='jpeg'):
+    """Строка srcset для формата fmt; пустая, если вариантов нет"""
+    data = post.featured_image_variants or {}
+    # Ссылка на внешнее изображение важнее загруженного файла (см. Post.get_featured_image)
+    if post.featured_image_url:
+        if not proxied(post) or fmt != 'jpeg':
+            return ''
+        return ', '.join(
+            f'{imageproxy.proxy_url(post.featured_image_url, width)} {width}w'
+            for width in variant_widths()
+        )
+    if needs_variants(post):
+        return ''
+    storage = post.featured_image.storage
+    return ', '.join(
+        f'{storage.url(v["name"])} {v["width"]}w'
+        for v in data.get('variants', []) if v['format'] == fmt
+    )
+
+
+def closest_variant(post, fmt, width=640):
+    """Вариант формата fmt с шириной ближе всего к width — src для браузеров без srcset"""
+    data = post.featured_image_variants or {}
+    return min(
+        (v for v in data.get('variants', []) if v['format'] == fmt),
+        key=lambda v: abs(v['width'] - width),
+    )
+
+
+def preload(post, sizes):
+    """
+    Параметры подсказки preload для обложки (см. blog/hints.py): та же
+    картинка, которую выберет {% responsive_image %} с теми же sizes.
+    None, если обложки нет.
+    """
+    src = post.get_featured_image
+    if not src:
+        return None
+    if proxied(post):
+        return {
+            'url': imageproxy.proxy_url(post.featured_image_url, 960),
+            'imagesrcset': srcset(post, 'jpeg'), 'imagesizes': sizes,
+        }
+    webp = srcset(post, 'webp')
+    if not (webp and srcset(post, 'jpeg')):
+        return {'url': src}
+    return {
+        'url': post.featured_image.storage.url(closest_variant(post, 'webp')['name']),
+        'imagesrcset': webp, 'imagesizes': sizes, 'type': 'image/webp',
+    }
+
+
+def smallest_url(post, fmt='webp'):
+    """Адрес самого узкого варианта — для превью в админке"""
+    if proxied(post):
+        return imageproxy.proxy_url(post.featured_image_url, variant_widths()[0])
+    data = post.featured_image_variants or {}
+    candidates = [v for v in data.get('variants', []) if v['format'] == fmt]
+    if not candidates or not srcset(post, fmt):
+        return post.get_featured_image
+    return post.featured_image.storage.url(min(candidates, key=lambda v: v['width'])['name'])
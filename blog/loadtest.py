@@ -0,0 +1,368 @@
+"""
+Генератор HTTP-нагрузки на asyncio-потоках без внешних зависимостей.
+
+Два режима:
+  * смесь маршрутов (список, статья, поиск, API) с заданной конкуренцией;
+  * воспроизведение access-лога gunicorn/nginx с исходными интервалами.
+
+Результат — словарь с пропускной способностью, перцентилями задержек и
+счётчиками ошибок; его можно сохранить в JSON и сравнить с другими прогонами.
+"""
+import asyncio
+import json
+import random
+import re
+import ssl
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from .benchmark import percentile
+
+
+DEFAULT_MIX = {'list': 5, 'detail': 3, 'search': 1, 'api': 1}
+
+SEARCH_TERMS = ['python', 'django', 'asyncio', 'postgres', 'кэш', 'api', 'тест']
+
+# Combined Log Format: так пишут и gunicorn (по умолчанию), и nginx
+ACCESS_LOG_RE = re.compile(
+    r'^\S+ \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" (?P<status>\d{3})'
+)
+ACCESS_LOG_TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpConnection:
+    """Одно keep-alive соединение HTTP/1.1 поверх asyncio.open_connection"""
+
+    def __init__(self, host, port, use_ssl=False, host_header=None, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.host_header = host_header or host
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        context = ssl.create_default_context() if self.use_ssl else None
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context), self.timeout
+        )
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None):
+        """Отправляет запрос и читает ответ целиком. Возвращает (статус, тело)"""
+        if self.writer is None:
+            await self.connect()
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host_header}',
+            'User-Agent: codewithbrain-loadtest',
+            'Accept: */*',
+            'Connection: keep-alive',
+        ]
+        lines.extend(f'{key}: {value}' for key, value in (headers or {}).items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await self.writer.drain()
+        return await asyncio.wait_for(self._read_response(method), self.timeout)
+
+    async def _read_response(self, method):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HttpError('Соединение закрыто сервером')
+        parts = status_line.decode('latin-1').split(' ', 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise HttpError(f'Некорректная строка статуса: {status_line!r}')
+        status = int(parts[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked()
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, body
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size_line = await self.reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                # Завершающие заголовки (trailers) и пустая строка
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+
+class ConnectionPool:
+    """Пул keep-alive соединений; размер пула ограничивает конкуренцию"""
+
+    def __init__(self, base_url, size, host_header=None, timeout=10.0):
+        parts = urlsplit(base_url)
+        use_ssl = parts.scheme == 'https'
+        port = parts.port or (443 if use_ssl else 80)
+        self.prefix = parts.path.rstrip('/')
+        self.queue = asyncio.Queue()
+        for _ in range(size):
+            self.queue.put_nowait(HttpConnection(
+                parts.hostname, port, use_ssl=use_ssl,
+                host_header=host_header or parts.netloc, timeout=timeout,
+            ))
+
+    async def request(self, path, method='GET'):
+        connection = await self.queue.get()
+        try:
+            return await connection.request(method, self.prefix + path)
+        except Exception:
+            # Сломанное соединение не возвращаем в работу как есть
+            await connection.close()
+            raise
+        finally:
+            self.queue.put_nowait(connection)
+
+    async def close(self):
+        while not self.queue.empty():
+            await self.queue.get_nowait().close()
+
+
+class Stats:
+    """Накопитель результатов: задержки, статусы и ошибки по группам маршрутов"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, group, latency_ms, status=None, size=0, error=None):
+        if error is not None:
+            self.errors[error] += 1
+            return
+        self.latencies[group].append(latency_ms)
+        self.statuses[str(status)] += 1
+        self.bytes += size
+        if status >= 500:
+            self.errors[f'HTTP {status}'] += 1
+
+    def summary(self, latencies):
+        return {
+            'requests': len(latencies),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p90_ms': round(percentile(latencies, 90), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(max(latencies), 3) if latencies else 0.0,
+        }
+
+    def report(self, meta=None):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        everything = [value for values in self.latencies.values() for value in values]
+        total = len(everything)
+        return {
+            'meta': dict(meta or {}, created_at=datetime.now().astimezone().isoformat()),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(total / elapsed, 2) if elapsed > 0 else 0.0,
+            'bytes': self.bytes,
+            'statuses': dict(self.statuses),
+            'errors': dict(self.errors),
+            'error_count': sum(self.errors.values()),
+            'latency': self.summary(everything),
+            'groups': {group: self.summary(values) for group, values in sorted(self.latencies.items())},
+        }
+
+
+async def timed_request(pool, stats, group, path, method='GET'):
+    started = time.perf_counter()
+    try:
+        status, body = await pool.request(path, method=method)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError) as e:
+        stats.add(group, 0, error=type(e).__name__)
+        return None
+    stats.add(group, (time.perf_counter() - started) * 1000, status=status, size=len(body))
+    return status, body
+
+
+async def discover_slugs(pool, pages=3):
+    """Собирает slug'и статей через API, чтобы было что запрашивать в detail"""
+    slugs = []
+    for page in range(1, pages + 1):
+        try:
+            status, body = await pool.request(f'/api/posts/?page={page}')
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError):
+            break
+        if status != 200:
+            break
+        data = json.loads(body)
+        slugs.extend(post['slug'] for post in data.get('results', []))
+        if not data.get('next'):
+            break
+    return slugs
+
+
+def route_for(group, rng, slugs, list_pages=3):
+    """URL для группы маршрутов из смеси"""
+    if group == 'list':
+        page = rng.randint(1, list_pages)
+        return '/' if page == 1 else f'/?page={page}'
+    if group == 'detail':
+        return f'/post/{rng.choice(slugs)}/' if slugs else '/'
+    if group == 'search':
+        return f'/search/?q={rng.choice(SEARCH_TERMS)}'
+    if group == 'api':
+        if slugs and rng.random() < 0.3:
+            return f'/api/posts/{rng.choice(slugs)}/'
+        return '/api/posts/'
+    raise ValueError(f'Неизвестная группа маршрутов: {group}')
+
+
+def parse_mix(value):
+    """'list=5,detail=3' -> {'list': 5, 'detail': 3}"""
+    mix = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f'Неизвестная группа маршрутов: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run_mix(base_url, concurrency=10, duration=10.0, requests=None, mix=None,
+                  seed=1, host_header=None, timeout=10.0):
+    """Закрытая модель нагрузки: concurrency воркеров шлют запросы без пауз"""
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    pool = ConnectionPool(base_url, concurrency, host_header=host_header, timeout=timeout)
+    slugs = await discover_slugs(pool) if mix.get('detail') or mix.get('api') else []
+    groups, weights = zip(*mix.items())
+
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+    remaining = [requests] if requests else None
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            group = rng.choices(groups, weights=weights)[0]
+            await timed_request(pool, stats, group, route_for(group, rng, slugs))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats.finished = time.perf_counter()
+    await pool.close()
+    return stats.report({
+        'mode': 'mix', 'url': base_url, 'concurrency': concurrency,
+        'duration_s': duration, 'mix': dict(mix), 'detail_slugs': len(slugs),
+    })
+
+
+def parse_access_log(lines):
+    """Достаёт (время в секундах, метод, путь) из строк access-лога"""
+    entries = []
+    for line in lines:
+        match = ACCESS_LOG_RE.match(line)
+        if not match or match['method'] not in ('GET', 'HEAD'):
+            continue
+        try:
+            moment = datetime.strptime(match['time'], ACCESS_LOG_TIME_FORMAT)
+        except ValueError:
+            continue
+        entries.append((moment.timestamp(), match['method'], match['path']))
+    entries.sort(key=lambda entry: entry[0])
+    return entries
+
+
+def group_for_path(path):
+    if path.startswith('/api/'):
+        return 'api'
+    if path.startswith('/search/'):
+        return 'search'
+    if path.startswith('/post/'):
+        return 'detail'
+    return 'list'
+
+
+async def run_replay(base_url, entries, speed=1.0, concurrency=50, host_header=None, timeout=10.0):
+    """
+    Открытая модель: запросы уходят в исходные моменты времени (с ускорением
+    speed), независимо от того, успел ли сервер ответить на предыдущие.
+    """
+    pool = ConnectionPool(base_url, concurrency, host_header=host_header, timeout=timeout)
+    stats = Stats()
+    if not entries:
+        stats.finished = time.perf_counter()
+        return stats.report({'mode': 'replay', 'url': base_url, 'entries': 0})
+
+    loop = asyncio.get_running_loop()
+    origin = entries[0][0]
+    start = loop.time()
+    lag = []
+    tasks = []
+    for moment, method, path in entries:
+        due = start + (moment - origin) / speed
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lag.append(max(loop.time() - due, 0) * 1000)
+        tasks.append(asyncio.create_task(
+            timed_request(pool, stats, group_for_path(path), path, method=method)
+        ))
+    await asyncio.gather(*tasks)
+    stats.finished = time.perf_counter()
+    await pool.close()
+    return stats.report({
+        'mode': 'replay', 'url': base_url, 'entries': len(entries), 'speed': speed,
+        'concurrency': concurrency, 'schedule_lag_p99_ms': round(percentile(lag, 99), 3),
+    })
+
+
+def compare_reports(reports):
+    """Таблица «метрика × прогон» для нескольких сохранённых отчётов"""
+    rows = [
+        ('throughput_rps', lambda r: r['throughput_rps']),
+        ('p50_ms', lambda r: r['latency']['p50_ms']),
+        ('p95_ms', lambda r: r['latency']['p95_ms']),
+        ('p99_ms', lambda r: r['latency']['p99_ms']),
+        ('errors', lambda r: r['error_count']),
+        ('requests', lambda r: r['latency']['requests']),
+    ]
+    groups = sorted({group for _, report in reports for group in report.get('groups', {})})
+    for group in groups:
+        rows.append((
+            f'{group} p95_ms',
+            lambda r, g=group: r.get('groups', {}).get(g, {}).get('p95_ms', '-'),
+        ))
+    return [(label, [getter(report) for _, report in reports]) for label, getter in rows]
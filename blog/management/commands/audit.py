@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog.audit import writer
+from blog.models import AuditRecord
+
+
+class Command(BaseCommand):
+    help = 'Поиск по журналу аудита: пользователь, действие, модель, период'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Имя пользователя')
+        parser.add_argument('--action', help='Действие: ADDITION, CHANGE, DELETION, LOGIN, ...')
+        parser.add_argument('--model', help='Имя модели, например post')
+        parser.add_argument('--since', help='Начало периода: YYYY-MM-DD, ISO-время или 7d/12h')
+        parser.add_argument('--until', help='Конец периода: YYYY-MM-DD или ISO-время')
+        parser.add_argument('--limit', type=int, default=50, help='Максимум записей (по умолчанию 50)')
+        parser.add_argument('--json', action='store_true', help='Вывод в формате JSON Lines')
+
+    def handle(self, *args, **options):
+        # Досбрасываем буфер текущего процесса, чтобы не потерять свежие записи
+        writer.flush()
+
+        queryset = AuditRecord.objects.all()
+        if options['user']:
+            queryset = queryset.filter(username=options['user'])
+        if options['action']:
+            queryset = queryset.filter(action=options['action'].upper())
+        if options['model']:
+            queryset = queryset.filter(model=options['model'].lower())
+        if options['since']:
+            queryset = queryset.filter(created_at__gte=self.parse_moment(options['since']))
+        if options['until']:
+            queryset = queryset.filter(created_at__lt=self.parse_moment(options['until'], end=True))
+
+        records = queryset.order_by('-created_at')[:options['limit']]
+
+        count = 0
+        for record in records:
+            count += 1
+            if options['json']:
+                self.stdout.write(json.dumps({
+                    'created_at': record.created_at.isoformat(),
+                    'user': record.username,
+                    'action': record.action,
+                    'model': record.model,
+                    'object_id': record.object_id,
+                    'details': record.details,
+                    'ip': record.ip,
+                }, ensure_ascii=False))
+            else:
+                created = timezone.localtime(record.created_at).strftime('%Y-%m-%d %H:%M:%S')
+                self.stdout.write(
+                    f'{created}  {record.username:<20} {record.action:<14} '
+                    f'{record.model or "-":<12} {record.object_id or "-":<8} {record.details}'
+                )
+
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS(f'Найдено записей: {count}'))
+
+    def parse_moment(self, value, end=False):
+        """Разбирает дату, дату-время или относительный интервал (7d, 12h, 30m)"""
+        units = {'d': 'days', 'h': 'hours', 'm': 'minutes'}
+        if value[-1:] in units and value[:-1].isdigit():
+            return timezone.now() - timedelta(**{units[value[-1]]: int(value[:-1])})
+
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f'Не удалось разобрать дату: {value}')
+            # Для --until дата включает весь день
+            if end:
+                day += timedelta(days=1)
+            moment = datetime.combine(day, time.min)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
@@ -0,0 +1,120 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from blog import perfhistory
+from blog.benchmark import compare_html_minify, compare_media_serving, run_benchmark, seed_dataset
+
+
+class Command(BaseCommand):
+    help = 'Замеры скорости страниц блога и API (медиана, p95, запросы к БД, байты)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200, help='Сколько статей создать')
+        parser.add_argument('--categories', type=int, default=5, help='Сколько категорий создать')
+        parser.add_argument('--tags', type=int, default=20, help='Сколько тегов создать')
+        parser.add_argument('--iterations', type=int, default=20, help='Запросов на маршрут')
+        parser.add_argument('--warmup', type=int, default=2, help='Прогревочных запросов на маршрут')
+        parser.add_argument('--route', action='append', dest='routes', help='Замерить только этот маршрут')
+        parser.add_argument('--output', '-o', help='Сохранить JSON-отчёт в файл')
+        parser.add_argument(
+            '--history', action='store_true',
+            help='Дописать результат в историю замеров (для perfcheck)'
+        )
+        parser.add_argument('--history-file', help='Файл истории (по умолчанию PERF_HISTORY_FILE)')
+        parser.add_argument(
+            '--existing-db', action='store_true',
+            help='Замерять на текущей базе без создания тестовой и без заполнения'
+        )
+        parser.add_argument(
+            '--html', action='store_true',
+            help='Замерить минификацию HTML и кэш страниц на post_list и post_detail'
+        )
+        parser.add_argument(
+            '--media', metavar='PATH',
+            help='Сравнить отдачу файла MEDIA_ROOT/PATH через serve_media и django.views.static.serve'
+        )
+
+    def handle(self, *args, **options):
+        if options['media']:
+            self.print_media(compare_media_serving(options['media'], iterations=options['iterations']))
+            return
+
+        if options['html']:
+            if options['existing_db']:
+                report = compare_html_minify(iterations=options['iterations'])
+            else:
+                report = self.run_on_test_database(options, compare_html_minify, iterations=options['iterations'])
+            self.print_html(report)
+            return
+
+        if options['existing_db']:
+            report = run_benchmark(
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                only=options['routes'],
+            )
+        else:
+            report = self.run_on_test_database(
+                options, run_benchmark,
+                iterations=options['iterations'], warmup=options['warmup'], only=options['routes'],
+            )
+
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Отчёт сохранён в {options["output"]}'))
+        else:
+            self.stdout.write(payload)
+        if options['history']:
+            path = perfhistory.append(report, options['history_file'])
+            self.stderr.write(f'Результат добавлен в историю {path}')
+
+        self.print_summary(report)
+
+    def run_on_test_database(self, options, run, **kwargs):
+        """Создаёт отдельную тестовую базу, заполняет её и удаляет после замеров"""
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            dataset = seed_dataset(
+                posts=options['posts'],
+                categories=options['categories'],
+                tags=options['tags'],
+            )
+            if run is run_benchmark:
+                kwargs['dataset'] = dataset
+            return run(**kwargs)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def print_summary(self, report):
+        self.stderr.write(f'{"маршрут":<20} {"медиана":>9} {"p95":>9} {"запросы":>8} {"байты":>9}')
+        for name, row in report['routes'].items():
+            self.stderr.write(
+                f'{name:<20} {row["median_ms"]:>7.2f}ms {row["p95_ms"]:>7.2f}ms '
+                f'{row["queries"]:>8} {row["bytes"]:>9}'
+            )
+
+    def print_media(self, report):
+        self.stdout.write(f'{"сценарий":<12} {"view":<14} {"статус":>6} {"медиана":>10} {"p95":>10} {"байты":>10}')
+        for scenario, views in report.items():
+            for name, row in views.items():
+                self.stdout.write(
+                    f'{scenario:<12} {name:<14} {row["status"]:>6} {row["median_ms"]:>8.3f}ms '
+                    f'{row["p95_ms"]:>8.3f}ms {row["bytes"]:>10}'
+                )
+
+    def print_html(self, report):
+        self.stdout.write(
+            f'{"маршрут":<12} {"байты":>8} {"после":>8} {"gzip":>7} {"gzip после":>10} '
+            f'{"минификация":>12} {"без кэша":>10} {"из кэша":>9}'
+        )
+        for name, row in report.items():
+            self.stdout.write(
+                f'{name:<12} {row["bytes"]:>8} {row["minified_bytes"]:>8} {row["gzip_bytes"]:>7} '
+                f'{row["gzip_minified_bytes"]:>10} {row["minify_ms"]:>10.3f}ms '
+                f'{row["miss_ms"]:>8.2f}ms {row["hit_ms"]:>7.2f}ms'
+            )
@@ -0,0 +1,47 @@
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import tailwind
+
+
+class Command(BaseCommand):
+    help = 'Сборка static/css/site.css standalone-бинарником Tailwind по шаблонам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help='Каталог для CSS (по умолчанию CSS_OUTPUT_DIR)')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Ничего не записывать; ошибка, если site.css устарел'
+        )
+
+    def handle(self, *args, **options):
+        templates = sorted(
+            path for directory in settings.CSS_CONTENT_DIRS for path in Path(directory).rglob('*.html')
+        )
+        if not templates:
+            raise CommandError('Шаблоны не найдены: проверьте CSS_CONTENT_DIRS')
+
+        path = Path(options['output_dir'] or settings.CSS_OUTPUT_DIR) / 'site.css'
+        try:
+            cli = tailwind.install()
+            with tempfile.TemporaryDirectory() as tmp:
+                built = Path(tmp) / 'site.css'
+                tailwind.build(cli, built, templates)
+                css = built.read_bytes()
+        except tailwind.TailwindError as e:
+            raise CommandError(str(e))
+
+        size = f'{len(css) / 1024:.1f} КБ'
+        stale = not path.exists() or path.read_bytes() != css
+        if options['check']:
+            if stale:
+                raise CommandError(f'{path} устарел: выполните manage.py build_css')
+            self.stdout.write(self.style.SUCCESS(f'CSS актуален: {path.name} {size}'))
+            return
+        if stale:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(css)
+        self.stdout.write(self.style.SUCCESS(f'Записано: {path} {size}'))
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog import images
+from blog.models import Post
+
+
+def _build(pk, source):
+    """Выполняется в дочернем процессе: только работа с файлами, без БД"""
+    try:
+        return pk, images.build_variants(source), None
+    except Exception as e:
+        return pk, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Построение вариантов обложек для уже загруженных изображений (параллельно)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', '-j', type=int, default=os.cpu_count() or 1,
+            help='Число процессов (по умолчанию — по числу ядер)'
+        )
+        parser.add_argument('--force', action='store_true', help='Перестроить даже актуальные варианты')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, сколько статей требуют обработки')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(featured_image='').exclude(featured_image__isnull=True)
+        pending = [
+            (post.pk, post.featured_image.name, post.featured_image_variants)
+            for post in posts.only('pk', 'featured_image', 'featured_image_variants').iterator()
+            if options['force'] or images.needs_variants(post)
+        ]
+        self.stdout.write(f'Статей с обложками для обработки: {len(pending)}')
+        if options['dry_run'] or not pending:
+            return
+
+        done = failed = 0
+        old_variants = {pk: variants for pk, _, variants in pending}
+        for pk, data, error in self.build(pending, options['workers']):
+            if error:
+                failed += 1
+                self.stderr.write(f'Статья {pk}: {error}')
+                continue
+            old = old_variants[pk] or {}
+            # Как в images.update_variants: прежний файл может быть общим (дедупликация)
+            if (old.get('source') and old['source'] != data['source']
+                    and not images.shared_source(Post(pk=pk), old['source'])):
+                images.delete_variants(old)
+            Post.objects.filter(pk=pk).update(featured_image_variants=data)
+            done += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: {done}, ошибок: {failed}'))
+
+    def build(self, pending, workers):
+        if workers <= 1:
+            for pk, source, _ in pending:
+                yield _build(pk, source)
+            return
+
+        # Соединения с БД не должны наследоваться дочерними процессами
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_build, pk, source) for pk, source, _ in pending]
+            for future in as_completed(futures):
+                yield future.result()
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import staticsite
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка публичных страниц блога в статические файлы (инкрементально, в несколько процессов)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=settings.STATIC_SITE_DIR, help='Каталог для страниц')
+        parser.add_argument('--full', action='store_true', help='Перерисовать все страницы, а не только изменённые')
+        parser.add_argument('--workers', type=int, default=None, help='Число процессов (по умолчанию — по числу ядер)')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, какие страницы изменятся')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            report = staticsite.build(
+                options['output_dir'], full=options['full'],
+                workers=options['workers'], dry_run=options['dry_run'],
+            )
+        except staticsite.StaticSiteError as e:
+            raise CommandError(str(e))
+
+        if options['verbosity'] > 1 or options['dry_run']:
+            for url in report['rendered']:
+                self.stdout.write(f'  + {url}')
+            for url in report['deleted']:
+                self.stdout.write(f'  - {url}')
+        verb = 'Будет отрисовано' if options['dry_run'] else 'Отрисовано'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} страниц: {len(report["rendered"])} из {report["total"]}, '
+            f'удалено: {len(report["deleted"])} ({time.perf_counter() - started:.1f} с)'
+        ))
@@ -0,0 +1,61 @@
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import MediaBlob, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт ссылок на медиафайлы и удаление тех, на которые не ссылается ни одна статья'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=float, default=settings.MEDIA_GC_GRACE_HOURS,
+            help='Сколько часов файл может пролежать без ссылок (загружен, но статья ещё не сохранена)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет удалено')
+
+    def handle(self, *args, **options):
+        references = self.count_references()
+        now = timezone.now()
+        deadline = now - timedelta(hours=options['grace'])
+        deleted = freed = 0
+
+        for blob in MediaBlob.objects.iterator():
+            count = references.get(blob.sha256, 0)
+            if count:
+                if blob.refcount != count or blob.unreferenced_since:
+                    MediaBlob.objects.filter(pk=blob.pk).update(refcount=count, unreferenced_since=None)
+                continue
+
+            since = blob.unreferenced_since or now
+            if since > deadline:
+                if not blob.unreferenced_since:
+                    MediaBlob.objects.filter(pk=blob.pk).update(refcount=0, unreferenced_since=now)
+                continue
+
+            self.stdout.write(f'Удаление {blob.name} ({blob.size} байт)')
+            if not options['dry_run']:
+                # Сначала запись: без неё delete() хранилища не смотрит на счётчик ссылок
+                MediaBlob.objects.filter(pk=blob.pk).delete()
+                default_storage.delete(blob.name)
+            deleted += 1
+            freed += blob.size
+
+        prefix = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{prefix} файлов: {deleted}, освобождено байт: {freed}'))
+
+    def count_references(self):
+        """sha256 блоба -> число статей, которые ссылаются на него обложкой или в тексте"""
+        # Имена файлов содержат sha256; Cloudinary может дописать к нему суффикс
+        pattern = re.compile(r'(?<![0-9a-f])([0-9a-f]{64})(?![0-9a-f])')
+        references = {}
+        rows = Post.objects.values_list('featured_image', 'content').iterator(chunk_size=500)
+        for featured_image, content in rows:
+            for sha256 in set(pattern.findall(f'{featured_image or ""}\n{content or ""}')):
+                references[sha256] = references.get(sha256, 0) + 1
+        return references
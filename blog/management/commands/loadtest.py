@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.loadtest import (
+    DEFAULT_MIX, compare_reports, parse_access_log, parse_mix, run_mix, run_replay,
+)
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный прогон запущенного сервера (gunicorn/uvicorn) и воспроизведение access-логов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Адрес сервера')
+        parser.add_argument('--host-header', help='Значение заголовка Host, если отличается от --url')
+        parser.add_argument('--concurrency', '-c', type=int, default=20, help='Одновременных соединений')
+        parser.add_argument('--duration', '-d', type=float, default=30.0, help='Длительность прогона, секунды')
+        parser.add_argument('--requests', '-n', type=int, help='Остановиться после N запросов')
+        parser.add_argument(
+            '--mix', default=','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items()),
+            help='Веса групп маршрутов: list=5,detail=3,search=1,api=1'
+        )
+        parser.add_argument('--replay', help='Воспроизвести access-лог (Combined Log Format)')
+        parser.add_argument('--speed', type=float, default=1.0, help='Ускорение воспроизведения лога')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Таймаут одного запроса, секунды')
+        parser.add_argument('--seed', type=int, default=1, help='Зерно выбора маршрутов')
+        parser.add_argument('--output', '-o', help='Сохранить JSON-отчёт в файл')
+        parser.add_argument(
+            '--compare', nargs='+', metavar='REPORT',
+            help='Не нагружать, а сравнить сохранённые отчёты бок о бок'
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            self.compare(options['compare'])
+            return
+
+        if options['replay']:
+            if not os.path.exists(options['replay']):
+                raise CommandError(f'Файл не найден: {options["replay"]}')
+            with open(options['replay'], encoding='utf-8', errors='replace') as f:
+                entries = parse_access_log(f)
+            self.stdout.write(f'Запросов в логе: {len(entries)}')
+            report = asyncio.run(run_replay(
+                options['url'], entries, speed=options['speed'],
+                concurrency=options['concurrency'], host_header=options['host_header'],
+                timeout=options['timeout'],
+            ))
+        else:
+            try:
+                mix = parse_mix(options['mix'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            report = asyncio.run(run_mix(
+                options['url'], concurrency=options['concurrency'],
+                duration=options['duration'], requests=options['requests'], mix=mix,
+                seed=options['seed'], host_header=options['host_header'],
+                timeout=options['timeout'],
+            ))
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Отчёт сохранён в {options["output"]}'))
+
+    def print_report(self, report):
+        latency = report['latency']
+        self.stdout.write(
+            f'Запросов: {latency["requests"]} за {report["elapsed_s"]} с, '
+            f'{report["throughput_rps"]} RPS, ошибок: {report["error_count"]}'
+        )
+        self.stdout.write(
+            f'Задержка: p50 {latency["p50_ms"]} мс, p90 {latency["p90_ms"]} мс, '
+            f'p99 {latency["p99_ms"]} мс, max {latency["max_ms"]} мс'
+        )
+        for group, row in report['groups'].items():
+            self.stdout.write(f'  {group:<8} {row["requests"]:>7}  p50 {row["p50_ms"]:>8} мс  p99 {row["p99_ms"]:>8} мс')
+        if report['errors']:
+            self.stdout.write(self.style.WARNING(f'Ошибки: {report["errors"]}'))
+
+    def compare(self, paths):
+        reports = []
+        for path in paths:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    reports.append((os.path.basename(path), json.load(f)))
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Не удалось прочитать {path}: {e}')
+
+        width = max(14, *(len(name) for name, _ in reports))
+        self.stdout.write(f'{"":<16}' + ''.join(f'{name:>{width + 2}}' for name, _ in reports))
+        for label, values in compare_reports(reports):
+            self.stdout.write(f'{label:<16}' + ''.join(f'{str(value):>{width + 2}}' for value in values))
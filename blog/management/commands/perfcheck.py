@@ -0,0 +1,63 @@
+import json
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import perfhistory
+
+
+class Command(BaseCommand):
+    help = 'Сравнение последнего замера со скользящей базой; ненулевой код выхода при регрессии'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history-file', help='Файл истории (по умолчанию PERF_HISTORY_FILE)')
+        parser.add_argument('--report', help='Проверить этот JSON-отчёт вместо последней записи истории')
+        parser.add_argument(
+            '--run', action='store_true',
+            help='Сначала выполнить benchmark и дописать результат в историю'
+        )
+        parser.add_argument('--route', action='append', dest='routes', help='Проверяемый маршрут')
+        parser.add_argument('--window', type=int, default=10, help='Размер скользящей базы')
+        parser.add_argument('--min-runs', type=int, default=3, help='Минимум прогонов в базе')
+        parser.add_argument('--tolerance', type=float, default=0.15, help='Относительный допуск по времени')
+        parser.add_argument('--mad-k', type=float, default=3.0, help='Сколько MAD допускается сверх медианы')
+
+    def handle(self, *args, **options):
+        path = options['history_file']
+        if options['run']:
+            call_command('benchmark', '--history', *(['--history-file', path] if path else []),
+                         stdout=self.stderr, stderr=self.stderr)
+
+        history = perfhistory.load(path)
+        if options['report']:
+            with open(options['report'], encoding='utf-8') as f:
+                current = json.load(f)
+        elif history:
+            current, history = history[-1], history[:-1]
+        else:
+            raise CommandError(f'История замеров пуста: {perfhistory.history_path(path)}')
+
+        routes = options['routes'] or getattr(settings, 'PERFCHECK_ROUTES', perfhistory.DEFAULT_ROUTES)
+        rows, regressions = perfhistory.check(
+            current, history, routes=routes, window=options['window'],
+            min_runs=options['min_runs'], tolerance=options['tolerance'],
+            mad_k=options['mad_k'],
+        )
+
+        if not rows:
+            self.stdout.write(self.style.WARNING(
+                f'Недостаточно сопоставимых прогонов для сравнения (нужно {options["min_runs"]})'
+            ))
+            return
+
+        self.stdout.write(f'{"маршрут":<16} {"метрика":<10} {"база":>10} {"предел":>10} {"сейчас":>10}')
+        for route, metric, center, limit, value in rows:
+            line = f'{route:<16} {metric:<10} {center:>10.2f} {limit:>10.2f} {value:>10.2f}'
+            if (route, metric, center, limit, value) in regressions:
+                line = self.style.ERROR(line + '  РЕГРЕССИЯ')
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f'Найдено регрессий: {len(regressions)}')
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено'))
@@ -0,0 +1,133 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import AuditRecord
+
+
+TARGETS = ['admin_log', 'audit', 'sessions']
+
+
+class Command(BaseCommand):
+    help = 'Удаление старых записей django_admin_log, журнала аудита и истёкших сессий пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets',
+            nargs='*',
+            help='Что чистить (по умолчанию всё): admin_log, audit, sessions'
+        )
+        parser.add_argument(
+            '--days', type=int,
+            default=getattr(settings, 'PRUNE_RETENTION_DAYS', 180),
+            help='Хранить записи журналов за последние N дней'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=getattr(settings, 'PRUNE_BATCH_SIZE', 1000),
+            help='Размер диапазона первичных ключей на одну транзакцию'
+        )
+        parser.add_argument(
+            '--sleep', type=float,
+            default=getattr(settings, 'PRUNE_SLEEP', 0.1),
+            help='Пауза между пачками, секунды'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, что будет удалено'
+        )
+
+    def handle(self, *args, **options):
+        targets = options['targets'] or TARGETS
+        unknown = set(targets) - set(TARGETS)
+        if unknown:
+            raise CommandError(f'Неизвестные цели: {", ".join(sorted(unknown))}')
+        self.batch_size = max(options['batch_size'], 1)
+        self.sleep = max(options['sleep'], 0)
+        self.dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        total = 0
+        if 'admin_log' in targets:
+            total += self.prune_by_pk_range(
+                'django_admin_log', LogEntry.objects.filter(action_time__lt=cutoff)
+            )
+        if 'audit' in targets:
+            total += self.prune_by_pk_range(
+                'журнал аудита', AuditRecord.objects.filter(created_at__lt=cutoff)
+            )
+        if 'sessions' in targets:
+            total += self.prune_sessions(Session.objects.filter(expire_date__lt=timezone.now()))
+
+        verb = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{verb} записей: {total}'))
+
+    def prune_by_pk_range(self, label, queryset):
+        """
+        Удаляет строки диапазонами первичного ключа [lo, lo + batch_size).
+        Каждая пачка — отдельная короткая транзакция; пустые диапазоны
+        (разреженные id) пропускаются переходом к следующему подходящему pk.
+        """
+        bounds = queryset.order_by('pk').values_list('pk', flat=True)
+        first = bounds.first()
+        if first is None:
+            self.stdout.write(f'{label}: нечего удалять')
+            return 0
+        last = bounds.last()
+
+        if self.dry_run:
+            count = queryset.count()
+            self.stdout.write(f'{label}: будет удалено {count} (pk {first}..{last})')
+            return count
+
+        deleted = 0
+        lo = first
+        while lo <= last:
+            hi = lo + self.batch_size
+            with transaction.atomic():
+                batch_deleted, _ = queryset.filter(pk__gte=lo, pk__lt=hi).delete()
+            deleted += batch_deleted
+            self.stdout.write(f'{label}: pk {lo}..{min(hi, last + 1) - 1}, удалено {deleted}')
+            lo = bounds.filter(pk__gte=hi).first()
+            if lo is None:
+                break
+            if self.sleep:
+                time.sleep(self.sleep)
+        return deleted
+
+    def prune_sessions(self, queryset):
+        """
+        У сессий строковый ключ, поэтому идём по нему keyset-пагинацией:
+        пачка ключей после последнего обработанного, затем DELETE по ним.
+        """
+        if self.dry_run:
+            count = queryset.count()
+            self.stdout.write(f'django_session: будет удалено {count}')
+            return count
+
+        deleted = 0
+        last_key = ''
+        while True:
+            keys = list(
+                queryset.filter(session_key__gt=last_key)
+                .order_by('session_key')
+                .values_list('session_key', flat=True)[:self.batch_size]
+            )
+            if not keys:
+                break
+            with transaction.atomic():
+                batch_deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            deleted += batch_deleted
+            last_key = keys[-1]
+            self.stdout.write(f'django_session: удалено {deleted}')
+            if len(keys) < self.batch_size:
+                break
+            if self.sleep:
+                time.sleep(self.sleep)
+        return deleted
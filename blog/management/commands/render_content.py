@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from blog.content import reading_time, render_content
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Перестроение готового HTML, оглавления и времени чтения статей (после миграции или смены правил отрисовки)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Сколько статей обновлять за один запрос')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, сколько статей изменится')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        changed, batch = 0, []
+        fields = ['content_html', 'content_toc', 'reading_time']
+        posts = Post.objects.only('pk', 'content', *fields).order_by('pk')
+        for post in posts.iterator(chunk_size=batch_size):
+            html, toc = render_content(post.content)
+            minutes = reading_time(post.content)
+            if (html, toc, minutes) == (post.content_html, post.content_toc, post.reading_time):
+                continue
+            post.content_html, post.content_toc, post.reading_time = html, toc, minutes
+            changed += 1
+            if options['dry_run']:
+                continue
+            batch.append(post)
+            if len(batch) >= batch_size:
+                Post.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            Post.objects.bulk_update(batch, fields)
+
+        verb = 'Будет обновлено' if options['dry_run'] else 'Обновлено'
+        self.stdout.write(self.style.SUCCESS(f'{verb} статей: {changed}'))
@@ -0,0 +1,41 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import taskqueue
+
+
+class Command(BaseCommand):
+    help = 'Воркер фоновых задач: очередь в основной БД, повторы с паузой, периодические задачи'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Выйти, когда готовых задач не останется')
+        parser.add_argument('--max-tasks', type=int, default=None, help='Выйти после N задач')
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.TASK_POLL_INTERVAL,
+            help='Пауза при пустой очереди, секунды',
+        )
+        parser.add_argument('--name', help='Имя воркера в задачах (по умолчанию хост:pid)')
+
+    def handle(self, *args, **options):
+        if settings.TASKS_EAGER:
+            raise CommandError('TASKS_EAGER включён: задачи выполняются сразу, воркер не нужен')
+
+        stopping = []
+
+        def stop(signum, frame):
+            # Текущая задача доводится до конца, новая не берётся
+            stopping.append(signum)
+            self.stdout.write('Завершение после текущей задачи…')
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        name = options['name'] or taskqueue.worker_name()
+        self.stdout.write(f'Воркер {name}: задачи {", ".join(sorted(taskqueue.REGISTRY))}')
+        done = taskqueue.work(
+            worker=name, burst=options['burst'], max_tasks=options['max_tasks'],
+            poll_interval=options['poll_interval'], should_stop=lambda: bool(stopping),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Post
+from blog.seed import SEED_PREFIX, BlogSeeder, clear_seeded
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических статей, тегов и комментариев (детерминированно по seed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000, help='Число статей')
+        parser.add_argument('--tags', type=int, default=3000, help='Число тегов (распределение Ципфа)')
+        parser.add_argument('--comments', type=int, default=1_000_000, help='Число комментариев')
+        parser.add_argument('--authors', type=int, default=20, help='Число авторов')
+        parser.add_argument('--categories', type=int, default=12, help='Число категорий')
+        parser.add_argument('--seed', type=int, default=42, help='Зерно генератора')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Размер пачки bulk_create')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Показатель распределения тегов')
+        parser.add_argument('--clear', action='store_true', help='Сначала удалить ранее сгенерированные данные')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear_seeded()
+            self.stdout.write('Ранее сгенерированные данные удалены')
+        elif Post.objects.filter(slug__startswith=SEED_PREFIX).exists():
+            raise CommandError('Сгенерированные данные уже есть в базе. Используйте --clear')
+
+        started = time.monotonic()
+        seeder = BlogSeeder(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            zipf_exponent=options['zipf'],
+            log=lambda message: self.stdout.write(f'  {message}'),
+        )
+        sizes = seeder.run(
+            posts=options['posts'],
+            tags=options['tags'],
+            comments=options['comments'],
+            authors=options['authors'],
+            categories=options['categories'],
+        )
+
+        elapsed = time.monotonic() - started
+        summary = ', '.join(f'{key}: {value}' for key, value in sizes.items())
+        self.stdout.write(self.style.SUCCESS(f'Готово за {elapsed:.1f} с — {summary}'))
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import vendor
+
+
+class Command(BaseCommand):
+    help = 'Скачивание закреплённых сторонних ресурсов (шрифт Inter) в static/vendor'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            help='Брать файлы из этого каталога (те же относительные пути), а не из сети'
+        )
+        parser.add_argument('--static-dir', help='Куда складывать (по умолчанию первый из STATICFILES_DIRS)')
+        parser.add_argument('--force', action='store_true', help='Скачать заново, даже если файл уже есть')
+
+    def handle(self, *args, **options):
+        static_dir = Path(options['static_dir'] or settings.STATICFILES_DIRS[0])
+        unpinned = []
+        for asset in settings.VENDOR_ASSETS:
+            try:
+                status, digest = vendor.install(asset, static_dir, options['source'], options['force'])
+            except vendor.VendorError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f'{asset["path"]}: {status}')
+            if not asset.get('sha256'):
+                unpinned.append((asset['path'], digest))
+
+        css = vendor.font_face_css(settings.VENDOR_ASSETS)
+        css_path = static_dir / settings.VENDOR_FONT_CSS
+        if not css_path.exists() or css_path.read_text(encoding='utf-8') != css:
+            vendor.write_atomic(css_path, css.encode())
+            self.stdout.write(f'{settings.VENDOR_FONT_CSS}: записан')
+
+        for path, digest in unpinned:
+            self.stderr.write(f'Хэш не закреплён: {path} sha256={digest} (добавьте в VENDOR_ASSETS)')
+        self.stdout.write(self.style.SUCCESS(f'Готово: {len(settings.VENDOR_ASSETS)} файлов в {static_dir / "vendor"}'))
@@ -0,0 +1,75 @@
+"""
+Отдача локальных медиафайлов самим приложением (Railway без nginx).
+
+В отличие от django.views.static.serve файл не читается в Python целиком:
+FileResponse отдаёт его через wsgi.file_wrapper, и gunicorn использует
+sendfile. Для Range-запросов файл открывается с нужного смещения и
+оборачивается в RangeFile, который ограничивает длину: gunicorn шлёт ровно
+Content-Length байт с текущей позиции, а серверы без sendfile читают через
+read() не дальше конца диапазона.
+"""
+import os
+import re
+
+HASHED_NAME = re.compile(r'(?:^|/)[0-9a-f]{64}(?:-\d+w)?\.[0-9a-z]+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Файл, читаемый не дальше length байт от текущей позиции"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def is_hashed(path):
+    """Имена по содержимому (дедупликация, варианты обложек) не меняются никогда"""
+    return bool(HASHED_NAME.search(path))
+
+
+def etag(path, stat):
+    """Сильный ETag: хэш из имени файла или mtime+размер"""
+    match = HASHED_NAME.search(path)
+    if match:
+        return '"%s"' % os.path.splitext(match.group(0).lstrip('/'))[0]
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def parse_range(header, size):
+    """
+    (start, end) включительно для одиночного диапазона, None — отдать файл
+    целиком, ValueError — диапазон невыполним (416).
+    Несколько диапазонов не поддерживаются: RFC 9110 разрешает ответить 200.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
@@ -1,6 +1,11 @@
 import time
 import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import hints, htmlmin, pagecache
 
 access_logger = logging.getLogger('access_logger')
 
@@ -40,4 +45,127 @@ class AdminAccessLogMiddleware(MiddlewareMixin):
             except Exception as e:
                 access_logger.error(f'Ошибка при логировании доступа: {e}')
 
-        return response
\ No newline at end of file
+        return response
+
+
+class AsyncCapableMiddleware:
+    """
+    Основа middleware, которое работает и под WSGI, и под ASGI: в цепочке
+    с асинхронным get_response оно само асинхронно, и Django не гоняет
+    запрос через поток ради одного синхронного звена. Наследники
+    переопределяют process(request, response).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def process(self, request, response):
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, пригодный для ASGI. Исходный WhiteNoiseMiddleware только
+    синхронный, и под uvicorn Django держал бы поток на каждый запрос, даже
+    не к статике. В продакшене /static/ отдаёт nginx, сюда доходят редкие
+    запросы мимо него.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class HTMLMinifyMiddleware(AsyncCapableMiddleware):
+    """
+    Минификация HTML-ответов, которые не прошли через кэш страниц
+    (тот минифицирует сам и сохраняет уже готовый результат).
+    Потоковые ответы минифицируются по кускам.
+    """
+
+    def process(self, request, response):
+        if (
+            not settings.HTML_MINIFY
+            or getattr(response, 'html_minified', False)
+            or not response.get('Content-Type', '').startswith('text/html')
+            or response.has_header('Content-Encoding')
+            or request.path.startswith(tuple(settings.HTML_MINIFY_EXCLUDE))
+        ):
+            return response
+        if response.streaming:
+            response.streaming_content = htmlmin.minify_stream(response.streaming_content, response.charset)
+            del response['Content-Length']
+            response.html_minified = True
+            return response
+        return pagecache.minify_response(response)
+
+
+class PreloadHintsMiddleware(AsyncCapableMiddleware):
+    """
+    Заголовок Link с preload/preconnect/prefetch для HTML-страниц и, если
+    сервер это поддерживает, 103 Early Hints до вызова представления
+    (см. blog/hints.py). В ASGI промежуточных ответов нет, там остаётся
+    только заголовок Link.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not hints.enabled(request):
+            return self.get_response(request)
+
+        send = request.META.get(settings.EARLY_HINTS_ENVIRON_KEY)
+        if callable(send):
+            hints.send_early_hints(request, send)
+
+        response = self.get_response(request)
+        if callable(send) and self.html_page(response):
+            hints.remember(request)
+        return self.process(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if not hints.enabled(request):
+            return response
+        return self.process(request, response)
+
+    @staticmethod
+    def html_page(response):
+        return response.status_code == 200 and response.get('Content-Type', '').startswith('text/html')
+
+    def process(self, request, response):
+        if not self.html_page(response):
+            return response
+        links = hints.response_links(request)
+        if links:
+            response['Link'] = ', '.join(([response['Link']] if response.has_header('Link') else []) + links)
+        return response
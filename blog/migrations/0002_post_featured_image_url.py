@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='featured_image_url',
+            field=models.URLField(blank=True, help_text='Вставьте прямую ссылку на изображение из Sora или интернета', null=True, verbose_name='Ссылка на изображение (Sora/Интернет)'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='featured_image',
+            field=models.ImageField(blank=True, help_text='Загрузите JPG/PNG файл с вашего компьютера', null=True, upload_to='posts/%Y/%m/', verbose_name='Загрузить изображение с компьютера'),
+        ),
+    ]
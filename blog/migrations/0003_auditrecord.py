@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_featured_image_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время')),
+                ('username', models.CharField(max_length=150, verbose_name='Пользователь')),
+                ('action', models.CharField(max_length=20, verbose_name='Действие')),
+                ('model', models.CharField(blank=True, max_length=100, verbose_name='Модель')),
+                ('object_id', models.CharField(blank=True, max_length=64, verbose_name='ID объекта')),
+                ('details', models.CharField(blank=True, max_length=255, verbose_name='Детали')),
+                ('ip', models.GenericIPAddressField(blank=True, null=True, verbose_name='IP')),
+            ],
+            options={
+                'verbose_name': 'Запись аудита',
+                'verbose_name_plural': 'Журнал аудита',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='audit_created_idx'), models.Index(fields=['username', 'created_at'], name='audit_user_idx'), models.Index(fields=['action', 'created_at'], name='audit_action_idx'), models.Index(fields=['model', 'created_at'], name='audit_model_idx')],
+            },
+        ),
+    ]
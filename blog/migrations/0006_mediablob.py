@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_featured_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, verbose_name='Имя в хранилище')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Размер')),
+                ('refcount', models.PositiveIntegerField(default=1, verbose_name='Ссылок')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Загружен')),
+                ('unreferenced_since', models.DateTimeField(blank=True, null=True, verbose_name='Без ссылок с')),
+            ],
+            options={
+                'verbose_name': 'Медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:37
+
+import django.core.serializers.json
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='Идентификатор')),
+                ('event_type', models.CharField(max_length=50, verbose_name='Событие')),
+                ('aggregate', models.CharField(max_length=100, verbose_name='Агрегат')),
+                ('payload', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Данные')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Создано')),
+                ('delivered', models.JSONField(blank=True, default=list, verbose_name='Доставлено')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Неудачных попыток')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доставка не раньше')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Взято до')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True, verbose_name='Доставлено полностью')),
+                ('failed_at', models.DateTimeField(blank=True, null=True, verbose_name='Отказ')),
+            ],
+            options={
+                'verbose_name': 'Событие outbox',
+                'verbose_name_plural': 'События outbox',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['dispatched_at', 'failed_at', 'next_attempt_at'], name='outbox_pending_idx'), models.Index(fields=['aggregate', 'id'], name='outbox_aggregate_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-19 07:00
+
+import math
+
+from django.db import migrations, models
+
+
+def fill_reading_time(apps, schema_editor):
+    # Та же формула, что в blog.content.reading_time (раньше считалась в шаблоне)
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    for post in Post.objects.only('pk', 'content').iterator(chunk_size=500):
+        post.reading_time = math.ceil(len((post.content or '').split()) / 200) + 1
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['reading_time'])
+            batch = []
+    Post.objects.bulk_update(batch, ['reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, verbose_name='Время чтения, мин'),
+        ),
+        migrations.RunPython(fill_reading_time, migrations.RunPython.noop),
+    ]
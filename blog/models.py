@@ -1,11 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.urls import reverse
 from django.utils import timezone
 from taggit.managers import TaggableManager
 from django_ckeditor_5.fields import CKEditor5Field
 from slugify import slugify
 import logging
+import uuid
 
 
 # Создаем объект логгера
@@ -60,6 +62,14 @@ class Post(models.Model):
         null=True,
         help_text='Вставьте прямую ссылку на изображение из Sora или интернета'
     )
+    # Уменьшенные копии загруженной обложки, см. blog/images.py
+    featured_image_variants = models.JSONField(
+        'Варианты изображения', default=dict, blank=True, editable=False
+    )
+    # Готовый HTML содержимого и оглавление, см. blog/content.py
+    content_html = models.TextField('HTML содержимого', blank=True, editable=False)
+    content_toc = models.JSONField('Оглавление', default=list, blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField('Время чтения, мин', default=1, editable=False)
     
     tags = TaggableManager(verbose_name='Теги', blank=True)
     
@@ -74,13 +84,38 @@ class Post(models.Model):
         verbose_name = 'Статья'
         verbose_name_plural = 'Статьи'
         ordering = ['-published_at']
+        indexes = [
+            # Лента опубликованных статей: WHERE status = ... ORDER BY published_at DESC
+            models.Index(fields=['status', '-published_at'], name='post_status_published_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
         if self.status == 'published' and not self.published_at:
             self.published_at = timezone.now()
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'content_html', 'content_toc', 'reading_time'}
+        # Событие публикации — в одной транзакции со статьёй (blog/outbox.py).
+        # Внутри чужой транзакции (запрос, админка) обходимся без точки сохранения
+        with transaction.atomic(savepoint=False):
+            from . import outbox
+
+            published = outbox.changed_to(self, 'status', 'published', update_fields)
+            # Страницы после публикации обновляет обработчик события (signals.py)
+            self._publishing = published
+            super().save(*args, **kwargs)
+            if published:
+                outbox.post_published(self)
+    
+    def render_content(self):
+        from .content import reading_time, render_content
+
+        self.content_html, self.content_toc = render_content(self.content)
+        self.reading_time = reading_time(self.content)
     
     # Автоматически выбираем изображение (приоритет у URL)
     @property
@@ -121,5 +156,149 @@ class Comment(models.Model):
         verbose_name_plural = 'Комментарии'
         ordering = ['-created_at']
     
+    def save(self, *args, **kwargs):
+        # Событие одобрения — в одной транзакции с комментарием (blog/outbox.py)
+        with transaction.atomic(savepoint=False):
+            from . import outbox
+
+            approved = outbox.changed_to(self, 'is_approved', True, kwargs.get('update_fields'))
+            super().save(*args, **kwargs)
+            if approved:
+                outbox.comment_approved(self)
+    
     def __str__(self):
         return f'{self.author_name}: {self.content[:50]}'
+
+
+class AuditRecord(models.Model):
+    """Запись журнала аудита (только добавление, без изменений)"""
+    created_at = models.DateTimeField('Время', default=timezone.now)
+    username = models.CharField('Пользователь', max_length=150)
+    action = models.CharField('Действие', max_length=20)
+    model = models.CharField('Модель', max_length=100, blank=True)
+    object_id = models.CharField('ID объекта', max_length=64, blank=True)
+    details = models.CharField('Детали', max_length=255, blank=True)
+    ip = models.GenericIPAddressField('IP', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Запись аудита'
+        verbose_name_plural = 'Журнал аудита'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='audit_created_idx'),
+            models.Index(fields=['username', 'created_at'], name='audit_user_idx'),
+            models.Index(fields=['action', 'created_at'], name='audit_action_idx'),
+            models.Index(fields=['model', 'created_at'], name='audit_model_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Журнал только дополняется: существующие записи не переписываем
+        if self.pk is not None:
+            raise ValueError('Записи аудита нельзя изменять')
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'{self.created_at:%Y-%m-%d %H:%M:%S} {self.username} {self.action}'
+
+
+class MediaBlob(models.Model):
+    """
+    Загруженный файл, адресуемый по содержимому (см. blog/storage.py).
+    Повторная загрузка тех же байтов не создаёт копию, а увеличивает счётчик ссылок.
+    """
+    sha256 = models.CharField('SHA-256', max_length=64, unique=True)
+    name = models.CharField('Имя в хранилище', max_length=255)
+    size = models.PositiveBigIntegerField('Размер', default=0)
+    refcount = models.PositiveIntegerField('Ссылок', default=1)
+    created_at = models.DateTimeField('Загружен', default=timezone.now)
+    unreferenced_since = models.DateTimeField('Без ссылок с', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name
+
+
+class Task(models.Model):
+    """
+    Фоновая задача в очереди на базе основной БД (см. blog/taskqueue.py).
+    key — ключ дедупликации: в очереди не больше одной ждущей задачи с тем же ключом.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField('Задача', max_length=100)
+    kwargs = models.JSONField('Аргументы', default=dict, blank=True)
+    key = models.CharField('Ключ', max_length=200, blank=True)
+    status = models.CharField('Статус', max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField('Запуск не раньше', default=timezone.now)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток', default=5)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    locked_by = models.CharField('Воркер', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    created_at = models.DateTimeField('Создана', default=timezone.now)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['-created_at']
+        indexes = [
+            # Выборка воркера: WHERE status = 'queued' AND run_at <= now ORDER BY run_at
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+            models.Index(fields=['key', 'finished_at'], name='task_key_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'], condition=models.Q(status='queued') & ~models.Q(key=''),
+                name='task_queued_key_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} [{self.get_status_display()}]'
+
+
+class OutboxEvent(models.Model):
+    """
+    Событие исходящего ящика (transactional outbox, см. blog/outbox.py).
+    Пишется в той же транзакции, что и изменение, которое его породило;
+    delivered — получатели, которым событие уже доставлено.
+    """
+    uuid = models.UUIDField('Идентификатор', default=uuid.uuid4, unique=True, editable=False)
+    event_type = models.CharField('Событие', max_length=50)
+    aggregate = models.CharField('Агрегат', max_length=100)
+    payload = models.JSONField('Данные', default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField('Создано', default=timezone.now)
+    delivered = models.JSONField('Доставлено', default=list, blank=True)
+    attempts = models.PositiveIntegerField('Неудачных попыток', default=0)
+    next_attempt_at = models.DateTimeField('Доставка не раньше', default=timezone.now)
+    locked_until = models.DateTimeField('Взято до', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    dispatched_at = models.DateTimeField('Доставлено полностью', null=True, blank=True)
+    failed_at = models.DateTimeField('Отказ', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Событие outbox'
+        verbose_name_plural = 'События outbox'
+        ordering = ['-id']
+        indexes = [
+            # Выборка диспетчера и проверка «нет ли раньше недоставленного события агрегата»
+            models.Index(fields=['dispatched_at', 'failed_at', 'next_attempt_at'], name='outbox_pending_idx'),
+            models.Index(fields=['aggregate', 'id'], name='outbox_aggregate_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.event_type} {self.aggregate} #{self.pk}'
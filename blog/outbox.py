@@ -0,0 +1,233 @@
+"""
+Исходящий ящик (transactional outbox) для событий публикации и модерации.
+
+Когда статья становится опубликованной или комментарий — одобренным,
+Post.save() / Comment.save() в той же транзакции пишут строку
+blog.OutboxEvent. Откат изменения откатывает и событие, а зафиксированное
+изменение всегда оставляет событие — без потерь и без «фантомов».
+
+Доставку делает задача blog.dispatch_outbox (воркер, blog/taskqueue.py):
+её ставит запись события и периодически — TASK_SCHEDULE. dispatch() берёт
+события пачками по OUTBOX_BATCH_SIZE и отдаёт их:
+
+  * обработчикам в процессе (@handler, например обновление страниц после
+    публикации в signals.py) — каждый вызов вместе с отметкой о доставке
+    выполняется в одной транзакции, поэтому изменения обработчика в БД
+    происходят ровно один раз;
+  * вебхукам OUTBOX_WEBHOOKS — одним POST на пачку; доставка «хотя бы
+    один раз», получатель отбрасывает повторы по id события.
+
+Порядок — внутри агрегата (статьи со всеми её комментариями): событие
+берётся в работу, только когда все более ранние события агрегата
+доставлены или отброшены. Неудачная доставка повторяется с той же
+экспоненциальной задержкой, что и задачи (задерживая следующие события
+агрегата), после OUTBOX_MAX_ATTEMPTS попыток событие помечается отказом.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import taskqueue
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+POST_PUBLISHED = 'post.published'
+COMMENT_APPROVED = 'comment.approved'
+
+DISPATCH_KEY = 'outbox-dispatch'
+
+HANDLERS = {}
+
+
+def handler(name, events=('*',)):
+    """Регистрирует обработчик событий events ('*' — всех); получает OutboxEvent"""
+    def decorator(func):
+        HANDLERS[name] = (tuple(events), func)
+        return func
+    return decorator
+
+
+def subscribed(events, event_type):
+    return '*' in events or event_type in events
+
+
+# ---------- запись событий ----------
+
+def changed_to(instance, field, value, update_fields=None):
+    """
+    Станет ли поле field равным value этим сохранением. Вызывается внутри
+    транзакции сохранения: строка блокируется (SELECT … FOR UPDATE), и из двух
+    одновременных сохранений событие запишет только одно.
+    """
+    if getattr(instance, field) != value:
+        return False
+    if update_fields is not None and field not in update_fields:
+        return False
+    if instance._state.adding or instance.pk is None:
+        return True
+    stored = (
+        type(instance)._default_manager.select_for_update()
+        .filter(pk=instance.pk).values_list(field, flat=True).first()
+    )
+    return stored != value
+
+
+def record(event_type, aggregate, payload):
+    """Пишет событие в текущей транзакции и ставит его доставку"""
+    event = OutboxEvent.objects.create(event_type=event_type, aggregate=aggregate, payload=payload)
+    if settings.TASKS_EAGER:
+        # Без воркера доставка идёт сразу, но только после фиксации транзакции
+        transaction.on_commit(lambda: taskqueue.enqueue('blog.dispatch_outbox'))
+    else:
+        taskqueue.enqueue('blog.dispatch_outbox', key=DISPATCH_KEY)
+    return event
+
+
+def post_aggregate(post_id):
+    return f'blog.post:{post_id}'
+
+
+def post_published(post):
+    return record(POST_PUBLISHED, post_aggregate(post.pk), {
+        'id': post.pk,
+        'slug': post.slug,
+        'title': post.title,
+        'url': post.get_absolute_url(),
+        'published_at': post.published_at,
+    })
+
+
+def comment_approved(comment):
+    # Агрегат — статья: одобрение комментария не обгонит её публикацию
+    return record(COMMENT_APPROVED, post_aggregate(comment.post_id), {
+        'id': comment.pk,
+        'post_id': comment.post_id,
+        'author_name': comment.author_name,
+        'created_at': comment.created_at,
+    })
+
+
+# ---------- доставка ----------
+
+def pending():
+    return OutboxEvent.objects.filter(dispatched_at__isnull=True, failed_at__isnull=True)
+
+
+def claim(batch_size):
+    """
+    До batch_size готовых событий, взятых в работу на OUTBOX_LEASE секунд.
+    От каждого агрегата — только самое раннее недоставленное событие.
+    """
+    now = timezone.now()
+    free = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    earlier = pending().filter(aggregate=OuterRef('aggregate'), id__lt=OuterRef('id'))
+    ready = (
+        pending().filter(free, next_attempt_at__lte=now)
+        .exclude(Exists(earlier)).order_by('id')
+    )
+    lease = now + timedelta(seconds=settings.OUTBOX_LEASE)
+    claimed = [
+        pk for pk in ready.values_list('id', flat=True)[:batch_size]
+        # Условный UPDATE: событие получает один диспетчер
+        if OutboxEvent.objects.filter(free, pk=pk).update(locked_until=lease)
+    ]
+    return list(OutboxEvent.objects.filter(pk__in=claimed).order_by('id'))
+
+
+def serialize(event):
+    return {
+        'id': str(event.uuid),
+        'type': event.event_type,
+        'aggregate': event.aggregate,
+        'sequence': event.pk,
+        'created_at': event.created_at,
+        'data': event.payload,
+    }
+
+
+def post_webhook(webhook, events):
+    """POST пачки событий; ошибкой считается всё, кроме ответа 2xx"""
+    body = json.dumps({'events': [serialize(event) for event in events]}, cls=DjangoJSONEncoder).encode()
+    headers = {'Content-Type': 'application/json', 'User-Agent': 'codewithbrain-outbox'}
+    if webhook.get('secret'):
+        signature = hmac.new(webhook['secret'].encode(), body, hashlib.sha256).hexdigest()
+        headers['X-Outbox-Signature'] = f'sha256={signature}'
+    request = urllib.request.Request(webhook['url'], data=body, headers=headers, method='POST')
+    # urlopen сам бросает HTTPError на 4xx/5xx
+    with urllib.request.urlopen(request, timeout=settings.OUTBOX_WEBHOOK_TIMEOUT) as response:
+        if not 200 <= response.status < 300:
+            raise OSError(f'HTTP {response.status}')
+
+
+def deliver(events):
+    """Доставляет взятые события всем подписанным получателям; возвращает число доставленных полностью"""
+    errors = {}
+
+    for event in events:
+        for name, (types, func) in HANDLERS.items():
+            target = f'handler:{name}'
+            if target in event.delivered or not subscribed(types, event.event_type):
+                continue
+            try:
+                with transaction.atomic():
+                    func(event)
+                    OutboxEvent.objects.filter(pk=event.pk).update(delivered=event.delivered + [target])
+            except Exception as e:
+                logger.warning('Событие #%s, обработчик %s: %s', event.pk, name, e)
+                errors.setdefault(event.pk, []).append(f'{target}: {e!r}')
+            else:
+                event.delivered.append(target)
+
+    for webhook in settings.OUTBOX_WEBHOOKS:
+        target = f'webhook:{webhook["name"]}'
+        batch = [
+            event for event in events
+            if target not in event.delivered and subscribed(webhook.get('events', ('*',)), event.event_type)
+        ]
+        if not batch:
+            continue
+        try:
+            post_webhook(webhook, batch)
+        except Exception as e:
+            logger.warning('Вебхук %s, событий %s: %s', webhook['name'], len(batch), e)
+            for event in batch:
+                errors.setdefault(event.pk, []).append(f'{target}: {e!r}')
+        else:
+            for event in batch:
+                event.delivered.append(target)
+
+    now = timezone.now()
+    for event in events:
+        event.locked_until = None
+        if event.pk in errors:
+            event.attempts += 1
+            event.last_error = '\n'.join(errors[event.pk])[-4000:]
+            if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                event.failed_at = now
+            else:
+                event.next_attempt_at = now + taskqueue.backoff(event.attempts)
+        else:
+            event.dispatched_at = now
+        event.save(update_fields=[
+            'delivered', 'attempts', 'last_error', 'next_attempt_at', 'locked_until', 'dispatched_at', 'failed_at',
+        ])
+    return len(events) - len(errors)
+
+
+def dispatch(batch_size=None):
+    """Доставляет готовые события пачками, пока они есть; возвращает число доставленных"""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    dispatched = 0
+    while events := claim(batch_size):
+        dispatched += deliver(events)
+    return dispatched
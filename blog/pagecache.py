@@ -0,0 +1,175 @@
+"""
+Кэш готовых HTML-страниц блога для анонимных посетителей.
+
+Страница рендерится и минифицируется (blog/htmlmin.py) один раз, в кэш
+кладутся уже минифицированные байты; повторные запросы отдаются из кэша
+без шаблонов, запросов к БД и повторной минификации.
+
+Кэш общий для всех воркеров gunicorn (алиас PAGE_CACHE_ALIAS, по
+умолчанию файловый). Инвалидация — через «поколение»: номер входит в
+ключ каждой страницы и увеличивается при любом изменении статей,
+категорий и тегов (см. signals.py), поэтому старые записи просто
+перестают читаться и вытесняются по таймауту. Комментарии на страницах
+не выводятся и кэш не сбрасывают.
+
+В ключ из строки запроса входят только параметры QUERY_PARAMS (номер
+страницы): произвольные ?utm_…= и прочие хвосты не плодят копий страницы.
+Заголовки, выставленные представлением, хранятся вместе с телом и
+отдаются при попадании.
+"""
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import hints, htmlmin
+
+GENERATION_KEY = 'pagecache:generation'
+
+# Параметры строки запроса, от которых зависит страница
+QUERY_PARAMS = ('page',)
+
+# Заголовки, которые не повторяются из кэша: длину и Content-Type
+# HttpResponse выставляет сам, X-Page-Cache — признак самого кэша
+SKIP_HEADERS = {'content-length', 'content-type', 'x-page-cache'}
+
+
+def get_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def generation(key=GENERATION_KEY):
+    """Текущее поколение; key — для других кэшей со своей инвалидацией (sitemaps.py)"""
+    cache = get_cache()
+    value = cache.get(key)
+    if value is None:
+        value = time.time_ns()
+        cache.add(key, value, timeout=None)
+        value = cache.get(key, value)
+    return value
+
+
+def invalidate(key=GENERATION_KEY):
+    """Все закэшированные страницы устаревают"""
+    get_cache().set(key, time.time_ns(), timeout=None)
+
+
+def page_key(request, query_params=QUERY_PARAMS):
+    query = urlencode([(name, request.GET[name]) for name in query_params if name in request.GET])
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+    return f'pagecache:{generation()}:{hashlib.sha256(url.encode()).hexdigest()}'
+
+
+def cacheable_request(request):
+    if not settings.PAGE_CACHE or request.method not in ('GET', 'HEAD'):
+        return False
+    # Авторизованным и тем, у кого есть сообщения, страница собирается заново
+    if 'messages' in request.COOKIES:
+        return False
+    user = getattr(request, 'user', None)
+    return not (user is not None and user.is_authenticated)
+
+
+def cacheable_response(response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if not response.get('Content-Type', '').startswith('text/html'):
+        return False
+    cache_control = response.get('Cache-Control', '')
+    return 'private' not in cache_control and 'no-store' not in cache_control
+
+
+def minify_response(response):
+    """Минифицирует тело ответа на месте (один раз)"""
+    if getattr(response, 'html_minified', False):
+        return response
+    response.content = htmlmin.minify(response.content.decode(response.charset)).encode(response.charset)
+    if response.has_header('Content-Length'):
+        response['Content-Length'] = str(len(response.content))
+    response.html_minified = True
+    return response
+
+
+def lookup(request, query_params=QUERY_PARAMS):
+    """(ключ, запись или None) для запроса, который можно отдать из кэша; иначе None"""
+    if not cacheable_request(request):
+        return None
+    key = page_key(request, query_params)
+    return key, get_cache().get(key)
+
+
+def hit_response(request, entry):
+    # Подсказки preload, которые представление добавило при рендере
+    request.preload_links = list(entry.get('links', ()))
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    for name, value in entry.get('headers', ()):
+        response[name] = value
+    response.html_minified = True
+    response['X-Page-Cache'] = 'hit'
+    return response
+
+
+def store(request, response, key, timeout=None):
+    """Рендерит, минифицирует и кладёт ответ в кэш, если его можно кэшировать"""
+    if hasattr(response, 'render') and callable(response.render) and not response.is_rendered:
+        response.render()
+    if not cacheable_response(response):
+        return response
+    if settings.HTML_MINIFY:
+        minify_response(response)
+    get_cache().set(key, {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'headers': [
+            (name, value) for name, value in response.items() if name.lower() not in SKIP_HEADERS
+        ],
+        'links': hints.request_links(request),
+    }, timeout if timeout is not None else settings.PAGE_CACHE_TIMEOUT)
+    response['X-Page-Cache'] = 'miss'
+    return response
+
+
+def cached_page(view=None, *, timeout=None, on_hit=None, query_params=QUERY_PARAMS):
+    """
+    Декоратор представления: минифицированный HTML из кэша или рендер с
+    сохранением. query_params — параметры строки запроса, которые читает
+    представление (остальные в ключ не входят). on_hit(request, *args, **kwargs) вызывается при попадании —
+    для побочных эффектов, которые не должны теряться (счётчик просмотров).
+    Асинхронное представление остаётся асинхронным: кэш, пользователь из
+    сессии и on_hit читаются через sync_to_async.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                cached = await sync_to_async(lookup)(request, query_params)
+                if cached is None:
+                    return await view_func(request, *args, **kwargs)
+                key, entry = cached
+                if entry is not None:
+                    if on_hit is not None:
+                        await sync_to_async(on_hit)(request, *args, **kwargs)
+                    return hit_response(request, entry)
+                response = await view_func(request, *args, **kwargs)
+                return await sync_to_async(store)(request, response, key, timeout)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            cached = lookup(request, query_params)
+            if cached is None:
+                return view_func(request, *args, **kwargs)
+            key, entry = cached
+            if entry is not None:
+                if on_hit is not None:
+                    on_hit(request, *args, **kwargs)
+                return hit_response(request, entry)
+            return store(request, view_func(request, *args, **kwargs), key, timeout)
+        return wrapper
+
+    return decorator(view) if view is not None else decorator
@@ -0,0 +1,104 @@
+"""
+История замеров производительности и поиск регрессий.
+
+Каждый прогон benchmark дописывается строкой JSON в файл истории. Проверка
+сравнивает последний прогон со скользящей базой из предыдущих сопоставимых
+прогонов (та же СУБД и тот же набор данных): для времени — медиана базы плюс
+max(k·MAD, относительный допуск), для числа запросов — любое увеличение,
+для размера ответа — относительный допуск.
+"""
+import json
+import os
+import statistics
+
+from django.conf import settings
+
+
+DEFAULT_ROUTES = ['post_list', 'post_detail', 'search', 'api_post_list']
+
+# Масштаб MAD к стандартному отклонению для нормального распределения
+MAD_SCALE = 1.4826
+
+
+def history_path(path=None):
+    return str(path or getattr(settings, 'PERF_HISTORY_FILE', os.path.join(settings.BASE_DIR, 'perf', 'history.jsonl')))
+
+
+def append(report, path=None):
+    """Дописывает отчёт benchmark в историю"""
+    path = history_path(path)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(report, ensure_ascii=False, sort_keys=True) + '\n')
+    return path
+
+
+def load(path=None):
+    """Все отчёты из истории в порядке записи; битые строки пропускаются"""
+    path = history_path(path)
+    if not os.path.exists(path):
+        return []
+    reports = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                reports.append(json.loads(line))
+            except ValueError:
+                continue
+    return reports
+
+
+def comparable(report, other):
+    """Прогоны сравнимы, если совпадают СУБД, набор данных и число итераций"""
+    keys = ('database', 'dataset', 'iterations')
+    return all(report['meta'].get(key) == other['meta'].get(key) for key in keys)
+
+
+def mad(values):
+    center = statistics.median(values)
+    return statistics.median(abs(value - center) for value in values)
+
+
+def check(current, history, routes=None, window=10, min_runs=3,
+          tolerance=0.15, mad_k=3.0, bytes_tolerance=0.10, floor_ms=0.5):
+    """
+    Сравнивает current с базой из последних window сопоставимых прогонов.
+    Возвращает (строки сравнения, список регрессий); если базы мало — регрессий нет.
+    """
+    baseline = [report for report in history if comparable(current, report)][-window:]
+    rows = []
+    regressions = []
+    if len(baseline) < min_runs:
+        return rows, regressions
+
+    for route in routes or DEFAULT_ROUTES:
+        now = current['routes'].get(route)
+        past = [report['routes'][route] for report in baseline if route in report['routes']]
+        if now is None or len(past) < min_runs:
+            continue
+
+        for metric in ('median_ms', 'p95_ms'):
+            values = [row[metric] for row in past]
+            center = statistics.median(values)
+            limit = center + max(mad_k * MAD_SCALE * mad(values), tolerance * center, floor_ms)
+            row = (route, metric, center, limit, now[metric])
+            rows.append(row)
+            if now[metric] > limit:
+                regressions.append(row)
+
+        limit = max(row['queries'] for row in past)
+        row = (route, 'queries', statistics.median(row['queries'] for row in past), limit, now['queries'])
+        rows.append(row)
+        if now['queries'] > limit:
+            regressions.append(row)
+
+        center = statistics.median(row['bytes'] for row in past)
+        row = (route, 'bytes', center, center * (1 + bytes_tolerance), now['bytes'])
+        rows.append(row)
+        if now['bytes'] > row[3]:
+            regressions.append(row)
+
+    return rows, regressions
@@ -0,0 +1,100 @@
+"""
+Сервис-воркер и манифест веб-приложения.
+
+/sw.js собирается из шаблона blog/sw.js. При установке воркер кладёт в кэш
+оболочку сайта (главную и офлайн-страницу), статику с хэшем в имени и
+SW_OFFLINE_POSTS последних статей. Дальше страницы статей отдаются по схеме
+stale-while-revalidate, остальные страницы — из сети с откатом на кэш и
+офлайн-страницу, статика — из кэша.
+
+Версия воркера — хэш того, что он предзагружает: адресов статики и пар
+(slug, updated_at) последних статей. Правка категории или тега, которая
+сбрасывает кэш страниц, версию не меняет, и браузеры не перекачивают
+офлайн-набор зря. Новая версия — новые байты /sw.js: браузер ставит новый
+воркер, а тот удаляет кэши прежних версий. Текст воркера строится один
+раз на версию; на запрос /sw.js остаётся один запрос к БД.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from . import pagecache
+from .models import Post
+from .templatetags.static_tags import static_url
+
+# Заголовок запросов предзагрузки: такие открытия статьи не считаются просмотром
+PRECACHE_HEADER = 'X-SW-Precache'
+
+
+def is_precache(request):
+    return request.headers.get(PRECACHE_HEADER) == '1'
+
+
+def static_urls():
+    return [static_url(path) for path in settings.SW_PRECACHE_STATIC]
+
+
+def recent_posts():
+    """(slug, updated_at) последних SW_OFFLINE_POSTS опубликованных статей"""
+    return list(
+        Post.objects.filter(status='published')
+        .order_by('-published_at')
+        .values_list('slug', 'updated_at')[:settings.SW_OFFLINE_POSTS]
+    )
+
+
+def precache_urls(recent, statics):
+    posts = [reverse('blog:post_detail', args=[slug]) for slug, _ in recent]
+    return [reverse('blog:post_list'), reverse('blog:offline')] + statics + posts
+
+
+def _digest(*parts):
+    return hashlib.sha256('\n'.join(map(str, parts)).encode()).hexdigest()
+
+
+def service_worker():
+    """(текст воркера, версия) для текущих статики и последних статей"""
+    recent = recent_posts()
+    urls = precache_urls(recent, static_urls())
+    # После деплоя с новыми хэшами статики или правки статьи из набора — новая версия
+    version = _digest(*urls, *(updated_at.isoformat() for _, updated_at in recent))[:12]
+    cache = pagecache.get_cache()
+    key = f'pwa:sw:{version}'
+    entry = cache.get(key)
+    if entry is None:
+        script = render_to_string('blog/sw.js', {
+            'version': version,
+            'precache': json.dumps(urls, ensure_ascii=False),
+            'offline_url': json.dumps(reverse('blog:offline')),
+            'static_url': json.dumps(settings.STATIC_URL),
+            'post_prefix': json.dumps(reverse('blog:post_detail', args=['slug'])[:-len('slug/')]),
+            'exclude': json.dumps(settings.SW_EXCLUDE),
+            'max_pages': settings.SW_OFFLINE_POSTS,
+            'precache_header': json.dumps(PRECACHE_HEADER),
+        })
+        entry = (script, version)
+        cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+    return entry
+
+
+def web_manifest():
+    return {
+        'name': settings.PWA_NAME,
+        'short_name': settings.PWA_SHORT_NAME,
+        'description': settings.PWA_DESCRIPTION,
+        'lang': 'ru',
+        'start_url': reverse('blog:post_list'),
+        'scope': '/',
+        'display': 'standalone',
+        'background_color': settings.PWA_BACKGROUND_COLOR,
+        'theme_color': settings.PWA_THEME_COLOR,
+        'icons': [{
+            'src': static_url('icons/icon.svg'),
+            'sizes': 'any',
+            'type': 'image/svg+xml',
+            'purpose': 'any maskable',
+        }],
+    }
@@ -0,0 +1,124 @@
+"""
+Проверка маршрутов на число SQL-запросов и планы выполнения.
+
+Используется тестами регрессий: обходит все именованные URL блога и API,
+считает запросы на один ответ и, на PostgreSQL, снимает EXPLAIN для каждого
+запроса, чтобы найти последовательные сканирования больших таблиц.
+"""
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from taggit.models import Tag
+
+from .models import Category, Post
+
+
+# Таблицы, которые растут вместе с контентом
+LARGE_TABLES = {'blog_post', 'blog_comment', 'taggit_taggeditem', 'taggit_tag', 'auth_user'}
+
+# Пространства имён и префиксы, которые проверяются
+CHECKED_NAMESPACES = {'blog'}
+CHECKED_ROUTE_PREFIXES = ('post-', 'category-', 'api-root')
+
+
+def iter_named_routes(resolver=None, namespace=None):
+    """Возвращает (имя для reverse, список параметров) для всех именованных URL"""
+    resolver = resolver or get_resolver()
+    seen = set()
+    for entry in resolver.url_patterns:
+        if isinstance(entry, URLResolver):
+            child_namespace = entry.namespace or namespace
+            if namespace and entry.namespace:
+                child_namespace = f'{namespace}:{entry.namespace}'
+            for name, params in iter_named_routes(entry, child_namespace):
+                if name not in seen:
+                    seen.add(name)
+                    yield name, params
+        elif isinstance(entry, URLPattern) and entry.name:
+            name = f'{namespace}:{entry.name}' if namespace else entry.name
+            if name in seen:
+                continue
+            seen.add(name)
+            params = list(entry.pattern.regex.groupindex)
+            yield name, [param for param in params if param != 'format']
+
+
+def checked_routes():
+    """Маршруты блога и роутера API, которые должны укладываться в бюджет"""
+    for name, params in iter_named_routes():
+        namespace = name.split(':', 1)[0] if ':' in name else None
+        if namespace in CHECKED_NAMESPACES or (
+            namespace is None and name.startswith(CHECKED_ROUTE_PREFIXES)
+        ):
+            yield name, params
+
+
+def sample_kwargs(name, params):
+    """Подбирает значения параметров URL по данным из базы"""
+    kwargs = {}
+    for param in params:
+        if param == 'slug':
+            if 'category' in name:
+                kwargs[param] = Category.objects.filter(post__status='published').first().slug
+            else:
+                kwargs[param] = Post.objects.filter(status='published').first().slug
+        elif param == 'page':
+            kwargs[param] = 2
+        elif param == 'fmt':
+            kwargs[param] = 'xml'
+        elif param == 'tag_name':
+            kwargs[param] = Tag.objects.filter(taggit_taggeditem_items__isnull=False).first().name
+        else:
+            raise ValueError(f'Не знаю, чем заполнить параметр {param} маршрута {name}')
+    return kwargs
+
+
+def route_url(name, params, query=''):
+    url = reverse(name, kwargs=sample_kwargs(name, params))
+    if name == 'blog:search' and not query:
+        query = 'q=python'
+    return f'{url}?{query}' if query else url
+
+
+def capture(client, url, method='get', data=None):
+    """Выполняет запрос и возвращает (ответ, список перехваченных SQL)"""
+    with CaptureQueriesContext(connection) as captured:
+        response = getattr(client, method)(url, data=data, secure=True)
+    return response, [query['sql'] for query in captured.captured_queries]
+
+
+def explain(sql):
+    """
+    План запроса на PostgreSQL в формате JSON. enable_seqscan=off заставляет
+    планировщик выбрать индекс, если он вообще применим, поэтому Seq Scan в
+    таком плане означает отсутствие подходящего индекса, а не маленькую таблицу.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SET enable_seqscan = off')
+        try:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.execute('RESET enable_seqscan')
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def iter_plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+def sequential_scans(sql, tables=LARGE_TABLES):
+    """Таблицы из tables, которые план читает последовательным сканированием"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return []
+    return [
+        node['Relation Name']
+        for node in iter_plan_nodes(explain(sql))
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in tables
+    ]
@@ -0,0 +1,269 @@
+"""
+Генератор синтетических данных для нагрузочных замеров.
+
+Все значения выводятся из random.Random(seed), поэтому один и тот же seed
+даёт одинаковые статьи, теги и комментарии. Строки пишутся через bulk_create
+пачками, без вызова save() и сигналов для каждой записи.
+"""
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from slugify import slugify
+from taggit.models import Tag, TaggedItem
+
+from .models import Category, Comment, Post
+
+
+SEED_PREFIX = 'seed-'
+AUTHOR_PREFIX = 'seed_author_'
+
+WORDS = [
+    'python', 'django', 'asyncio', 'postgres', 'индекс', 'запрос', 'кэш', 'модель',
+    'нейросеть', 'трансформер', 'обучение', 'данные', 'тест', 'профилирование',
+    'оптимизация', 'шаблон', 'сервер', 'очередь', 'поток', 'процесс', 'память',
+    'генератор', 'итератор', 'декоратор', 'класс', 'функция', 'алгоритм', 'граф',
+    'сортировка', 'поиск', 'api', 'rest', 'json', 'http', 'docker', 'linux', 'git',
+    'тип', 'аннотация', 'миграция', 'транзакция', 'блокировка', 'реплика', 'шардинг',
+    'вектор', 'эмбеддинг', 'промпт', 'агент', 'токен', 'контекст', 'pandas', 'numpy',
+    'pytest', 'celery', 'redis', 'nginx', 'gunicorn', 'uvicorn', 'fastapi', 'orm',
+]
+
+CATEGORY_NAMES = [
+    'Python', 'Django', 'Искусственный интеллект', 'Базы данных', 'DevOps',
+    'Алгоритмы', 'Веб-разработка', 'Тестирование', 'Архитектура', 'Производительность',
+    'Машинное обучение', 'Инструменты',
+]
+
+CODE_SNIPPETS = [
+    'def {name}(items):\n    return [item for item in items if item.{attr}]\n',
+    'async def {name}(session):\n    async with session.get(URL) as response:\n'
+    '        return await response.json()\n',
+    'class {Name}(models.Model):\n    {attr} = models.CharField(max_length=100)\n',
+    'for {attr} in range(10):\n    print({name}({attr}))\n',
+]
+
+
+def zipf_cum_weights(count, exponent=1.1):
+    """Накопленные веса распределения Ципфа для рангов 1..count"""
+    cumulative = []
+    total = 0.0
+    for rank in range(1, count + 1):
+        total += 1.0 / (rank ** exponent)
+        cumulative.append(total)
+    return cumulative
+
+
+class BlogSeeder:
+    """Детерминированное наполнение базы статьями, тегами и комментариями"""
+
+    def __init__(self, seed=42, batch_size=2000, zipf_exponent=1.1, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = max(batch_size, 1)
+        self.zipf_exponent = zipf_exponent
+        self.log = log or (lambda message: None)
+        self.base_time = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+    # ---------- текст ----------
+
+    def words(self, count):
+        return ' '.join(self.rng.choices(WORDS, k=count))
+
+    def sentence(self, low=6, high=16):
+        text = self.words(self.rng.randint(low, high))
+        return text[:1].upper() + text[1:] + '.'
+
+    def paragraph(self):
+        sentences = [self.sentence() for _ in range(self.rng.randint(2, 6))]
+        if self.rng.random() < 0.3:
+            word = self.rng.choice(WORDS)
+            sentences[0] = sentences[0].replace(word, f'<strong>{word}</strong>', 1)
+        if self.rng.random() < 0.2:
+            word = self.rng.choice(WORDS)
+            sentences[-1] = f'{sentences[-1]} <a href="https://docs.python.org/3/search.html?q={word}">{word}</a>'
+        return f'<p>{" ".join(sentences)}</p>'
+
+    def code_block(self):
+        name = self.rng.choice(WORDS[:30]).replace('-', '_')
+        attr = self.rng.choice(['title', 'slug', 'status', 'views', 'name'])
+        snippet = self.rng.choice(CODE_SNIPPETS).format(
+            name=f'get_{len(name)}_{attr}', Name='Seed' + attr.title(), attr=attr
+        )
+        snippet = snippet.replace('<', '&lt;').replace('>', '&gt;')
+        return f'<pre><code class="language-python">{snippet}</code></pre>'
+
+    def body(self, index):
+        """HTML в духе CKEditor 5: заголовки, абзацы, списки, код, цитаты, картинки"""
+        blocks = []
+        for section in range(self.rng.randint(2, 6)):
+            blocks.append(f'<h2>{self.sentence(2, 5)[:-1]}</h2>')
+            for _ in range(self.rng.randint(1, 4)):
+                blocks.append(self.paragraph())
+            roll = self.rng.random()
+            if roll < 0.35:
+                blocks.append(self.code_block())
+            elif roll < 0.55:
+                items = ''.join(f'<li>{self.sentence(3, 8)}</li>' for _ in range(self.rng.randint(2, 5)))
+                blocks.append(f'<ul>{items}</ul>')
+            elif roll < 0.65:
+                blocks.append(f'<blockquote><p>{self.sentence()}</p></blockquote>')
+            elif roll < 0.75:
+                blocks.append(
+                    f'<figure class="image"><img src="/media/uploads/seed/{index}-{section}.png" '
+                    f'alt="{self.words(2)}"></figure>'
+                )
+        return ''.join(blocks)
+
+    # ---------- данные ----------
+
+    def create_authors(self, count):
+        users = [
+            User(username=f'{AUTHOR_PREFIX}{i}', email=f'author{i}@example.com', password='!seed')
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        return list(
+            User.objects.filter(username__startswith=AUTHOR_PREFIX)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def create_categories(self, count):
+        categories = []
+        for i in range(count):
+            name = CATEGORY_NAMES[i] if i < len(CATEGORY_NAMES) else f'Категория {i}'
+            categories.append(Category(
+                name=name,
+                slug=f'{SEED_PREFIX}{i}-{slugify(name)}'[:50],
+                description=self.sentence(),
+            ))
+        Category.objects.bulk_create(categories, batch_size=self.batch_size)
+        return list(
+            Category.objects.filter(slug__startswith=SEED_PREFIX)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def tag_names(self, count):
+        """Уникальные имена тегов: сначала слова словаря, затем пары слов"""
+        names = [f'{SEED_PREFIX}{word}' for word in WORDS]
+        pairs = (f'{SEED_PREFIX}{a}-{b}' for a in WORDS for b in WORDS if a != b)
+        while len(names) < count:
+            names.append(next(pairs, None) or f'{SEED_PREFIX}tag-{len(names)}')
+        return names[:count]
+
+    def create_tags(self, count):
+        tags = [Tag(name=name, slug=slugify(name)) for name in self.tag_names(count)]
+        Tag.objects.bulk_create(tags, batch_size=self.batch_size)
+        # Порядок id соответствует рангу тега в распределении Ципфа
+        return list(
+            Tag.objects.filter(name__startswith=SEED_PREFIX)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def create_posts(self, count, author_ids, category_ids, tag_ids, tags_per_post):
+        content_type = ContentType.objects.get_for_model(Post)
+        tag_weights = zipf_cum_weights(len(tag_ids), self.zipf_exponent) if tag_ids else []
+        post_ids = []
+
+        for start in range(0, count, self.batch_size):
+            stop = min(start + self.batch_size, count)
+            posts = []
+            for i in range(start, stop):
+                title = self.sentence(3, 8)[:-1]
+                published = self.rng.random() < 0.9
+                post = Post(
+                    title=title,
+                    slug=f'{SEED_PREFIX}{i}-{slugify(title)}'[:50].rstrip('-'),
+                    author_id=self.rng.choice(author_ids),
+                    category_id=self.rng.choice(category_ids) if category_ids else None,
+                    excerpt=self.sentence(12, 30)[:500],
+                    content=self.body(i),
+                    status='published' if published else 'draft',
+                    views=int(self.rng.paretovariate(1.2) * 10),
+                    published_at=(
+                        self.base_time + timedelta(minutes=i * 7 + self.rng.randint(0, 6))
+                        if published else None
+                    ),
+                )
+                # bulk_create минует Post.save(): HTML готовим как при сохранении
+                post.render_content()
+                posts.append(post)
+
+            with transaction.atomic():
+                created = Post.objects.bulk_create(posts)
+                tagged = []
+                for post in created:
+                    chosen = []
+                    wanted = self.rng.randint(*tags_per_post) if tag_ids else 0
+                    for tag_id in self.rng.choices(tag_ids, cum_weights=tag_weights, k=wanted * 2):
+                        if tag_id not in chosen:
+                            chosen.append(tag_id)
+                        if len(chosen) == wanted:
+                            break
+                    tagged.extend(
+                        TaggedItem(tag_id=tag_id, content_type=content_type, object_id=post.pk)
+                        for tag_id in chosen
+                    )
+                TaggedItem.objects.bulk_create(tagged, batch_size=self.batch_size)
+
+            post_ids.extend(post.pk for post in created)
+            self.log(f'Статьи: {stop}/{count}')
+        return post_ids
+
+    def create_comments(self, count, post_ids):
+        if not post_ids:
+            return
+        # Популярные статьи собирают больше комментариев
+        post_weights = zipf_cum_weights(len(post_ids), 0.8)
+        for start in range(0, count, self.batch_size):
+            stop = min(start + self.batch_size, count)
+            targets = self.rng.choices(post_ids, cum_weights=post_weights, k=stop - start)
+            comments = [
+                Comment(
+                    post_id=post_id,
+                    author_name=f'Читатель {self.rng.randint(1, 5000)}',
+                    author_email=f'reader{self.rng.randint(1, 5000)}@example.com',
+                    content=self.sentence(4, 30),
+                    is_approved=self.rng.random() < 0.85,
+                )
+                for post_id in targets
+            ]
+            Comment.objects.bulk_create(comments)
+            self.log(f'Комментарии: {stop}/{count}')
+
+    def run(self, posts=1000, tags=300, comments=5000, authors=5, categories=8,
+            tags_per_post=(1, 5)):
+        author_ids = self.create_authors(max(authors, 1))
+        category_ids = self.create_categories(categories)
+        tag_ids = self.create_tags(tags)
+        self.log(f'Авторы: {len(author_ids)}, категории: {len(category_ids)}, теги: {len(tag_ids)}')
+        post_ids = self.create_posts(posts, author_ids, category_ids, tag_ids, tags_per_post)
+        self.create_comments(comments, post_ids)
+        return {
+            'posts': posts,
+            'tags': tags,
+            'comments': comments,
+            'authors': len(author_ids),
+            'categories': len(category_ids),
+        }
+
+
+def clear_seeded():
+    """Удаляет всё, что создал генератор (по префиксам slug и имён)"""
+    content_type = ContentType.objects.get_for_model(Post)
+    seeded_posts = Post.objects.filter(slug__startswith=SEED_PREFIX)
+    TaggedItem.objects.filter(
+        content_type=content_type,
+        object_id__in=seeded_posts.values('pk'),
+    ).delete()
+    Comment.objects.filter(post__in=seeded_posts).delete()
+    seeded_posts.delete()
+    Tag.objects.filter(name__startswith=SEED_PREFIX).delete()
+    Category.objects.filter(slug__startswith=SEED_PREFIX).delete()
+    User.objects.filter(username__startswith=AUTHOR_PREFIX).delete()
+
+
+def seed_blog(seed=42, batch_size=2000, log=None, **sizes):
+    """Короткий вызов генератора: seed_blog(posts=100_000, tags=3000, ...)"""
+    return BlogSeeder(seed=seed, batch_size=batch_size, log=log).run(**sizes)
@@ -1,11 +1,18 @@
 import logging
+from django.conf import settings
 from django.contrib.admin.models import LogEntry, ADDITION, CHANGE, DELETION
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils.encoding import force_str
 
+from taggit.models import Tag, TaggedItem
+
+from . import audit, images, outbox, pagecache, sitemaps, taskqueue
+from .models import Category, Post
+
 
 # Получаем логгер для админки
 admin_logger = logging.getLogger('admin_logger')
@@ -50,6 +57,10 @@ def log_admin_action(sender, instance, created, **kwargs):
                     'details': details,
                 }
             )
+            audit.record(
+                user, action,
+                model=model_name, object_id=instance.object_id, details=details,
+            )
 
         except Exception as e:
             admin_logger.error(f'Ошибка при логировании действия админки: {e}')
@@ -71,6 +82,11 @@ def log_user_creation(sender, instance, created, **kwargs):
                 'details': f'Создан пользователь: {instance.username}',
             }
         )
+        audit.record(
+            instance.username or 'System', 'USER_CREATED',
+            model='User', object_id=instance.id,
+            details=f'Создан пользователь: {instance.username}',
+        )
     else:
         # Можно логировать изменения пользователей
         pass
@@ -80,6 +96,13 @@ def log_user_creation(sender, instance, created, **kwargs):
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 
 
+def _client_ip(request):
+    """IP клиента для журнала аудита (None, если запроса нет)"""
+    if request is None:
+        return None
+    return request.META.get('REMOTE_ADDR') or None
+
+
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     admin_logger.info(
@@ -92,6 +115,10 @@ def log_user_login(sender, request, user, **kwargs):
             'details': f'Успешный вход с IP: {request.META.get("REMOTE_ADDR")}',
         }
     )
+    audit.record(
+        user.username, 'LOGIN',
+        model='User', object_id=user.id, ip=_client_ip(request),
+    )
 
 
 @receiver(user_logged_out)
@@ -107,6 +134,10 @@ def log_user_logout(sender, request, user, **kwargs):
                 'details': f'Выход с IP: {request.META.get("REMOTE_ADDR")}',
             }
         )
+        audit.record(
+            user.username, 'LOGOUT',
+            model='User', object_id=user.id, ip=_client_ip(request),
+        )
 
 
 @receiver(user_login_failed)
@@ -120,4 +151,82 @@ def log_user_login_failed(sender, credentials, request, **kwargs):
             'object_id': 'N/A',
             'details': f'Неудачная попытка входа с IP: {request.META.get("REMOTE_ADDR")}',
         }
-    )
\ No newline at end of file
+    )
+    audit.record(
+        credentials.get('username', 'Unknown'), 'LOGIN_FAILED',
+        model='User', ip=_client_ip(request),
+    )
+
+
+@receiver(post_save, sender=Post)
+def build_featured_image_variants(sender, instance, raw=False, **kwargs):
+    """
+    Уменьшенные копии обложки после загрузки нового файла строит фоновая
+    задача: сохранение статьи не ждёт обработки изображения.
+    """
+    if raw or not images.needs_variants(instance):
+        return
+    taskqueue.enqueue(
+        'blog.build_image_variants', key=f'image-variants:{instance.pk}', post_id=instance.pk,
+    )
+
+
+def queue_feed_warmup():
+    if settings.FEED_WARM_HOST:
+        # Пачка изменений (сохранение в админке) даёт одну пересборку лент
+        taskqueue.enqueue('blog.warm_feeds', key='warm-feeds', delay=5)
+
+
+def published_now(sender, instance):
+    """
+    Сохранение публикует статью: кэш сбрасывается после фиксации, иначе
+    параллельный запрос успел бы закэшировать страницы без неё
+    """
+    return sender is Post and getattr(instance, '_publishing', False)
+
+
+@outbox.handler('blog.refresh_published', events=[outbox.POST_PUBLISHED])
+def refresh_after_publication(event):
+    """
+    Новая статья — в лентах. Кэш страниц и карта сайта сбрасываются сразу
+    при фиксации (invalidate_page_cache, invalidate_sitemap) и от доставки
+    события не зависят; обработчик исходящего ящика только прогревает ленты.
+    Одобренный комментарий на страницах не выводится и обработчика не имеет.
+    """
+    queue_feed_warmup()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def invalidate_page_cache(sender, instance=None, update_fields=None, **kwargs):
+    """Правка, снятие с публикации и удаление статей, категорий и тегов делают страницы устаревшими"""
+    if sender is Post and update_fields and set(update_fields) == {'views'}:
+        # Счётчик просмотров обновляется на каждом открытии статьи
+        return
+    if published_now(sender, instance):
+        transaction.on_commit(pagecache.invalidate)
+        return
+    pagecache.invalidate()
+    queue_feed_warmup()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def invalidate_sitemap(sender, instance=None, update_fields=None, **kwargs):
+    """Карта сайта пересобирается только после изменений статей, категорий и тегов"""
+    if sender is Post and update_fields and set(update_fields) == {'views'}:
+        return
+    if published_now(sender, instance):
+        transaction.on_commit(sitemaps.invalidate)
+        return
+    sitemaps.invalidate()
@@ -0,0 +1,141 @@
+"""
+Карта сайта для поисковых роботов.
+
+/sitemap.xml — индекс, /sitemap-<раздел>-<N>.xml — части не длиннее
+SITEMAP_CHUNK_SIZE адресов (по протоколу не больше 50 000). Разделы: статьи,
+категории и теги; lastmod — updated_at статьи, для категории и тега —
+самой свежей из их опубликованных статей.
+
+Строки читаются keyset-пагинацией (WHERE id > последний ORDER BY id LIMIT
+SITEMAP_BATCH_SIZE), без OFFSET, который дорожает с каждой страницей.
+Готовый XML всех частей лежит в кэше страниц до изменения статей,
+категорий или тегов (своё поколение, см. signals.py), поэтому в
+устойчивом состоянии карта отдаётся без единого запроса к БД.
+"""
+import hashlib
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Max
+from django.urls import reverse
+
+from . import pagecache
+from .models import Post
+
+GENERATION_KEY = 'sitemap:generation'
+SECTIONS = ('posts', 'categories', 'tags')
+INDEX_NAME = 'sitemap.xml'
+
+
+def invalidate():
+    pagecache.invalidate(GENERATION_KEY)
+
+
+def _keyset(queryset_for, key, batch_size):
+    """
+    Строки по возрастанию key пачками WHERE key > последний. queryset_for(**lookups)
+    добавляет условие в тот же filter(), что и остальные: для тегов иначе
+    появился бы второй JOIN.
+    """
+    lookups = {}
+    while True:
+        rows = list(queryset_for(**lookups).order_by(key)[:batch_size])
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        lookups = {f'{key}__gt': rows[-1][key]}
+
+
+def entries(section):
+    """(путь, lastmod) раздела в порядке первичного ключа"""
+    published = Post.objects.filter(status='published')
+    batch_size = settings.SITEMAP_BATCH_SIZE
+    if section == 'posts':
+        rows = _keyset(
+            lambda **lookups: published.filter(**lookups).values('id', 'slug', 'updated_at'),
+            'id', batch_size,
+        )
+        for row in rows:
+            yield reverse('blog:post_detail', args=[row['slug']]), row['updated_at']
+    elif section == 'categories':
+        rows = _keyset(
+            lambda **lookups: published.filter(category__isnull=False, **lookups)
+            .values('category_id', 'category__slug').annotate(lastmod=Max('updated_at')),
+            'category_id', batch_size,
+        )
+        for row in rows:
+            yield reverse('blog:category_posts', args=[row['category__slug']]), row['lastmod']
+    elif section == 'tags':
+        rows = _keyset(
+            lambda **lookups: published.filter(tags__isnull=False, **lookups)
+            .values('tags__id', 'tags__name').annotate(lastmod=Max('updated_at')),
+            'tags__id', batch_size,
+        )
+        for row in rows:
+            yield reverse('blog:tag_posts', args=[row['tags__name']]), row['lastmod']
+
+
+def _lastmod(value):
+    return value.isoformat(timespec='seconds')
+
+
+def urlset(base_url, chunk):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for path, lastmod in chunk:
+        lines.append(f'<url><loc>{escape(base_url + path)}</loc><lastmod>{_lastmod(lastmod)}</lastmod></url>')
+    lines.append('</urlset>\n')
+    return '\n'.join(lines)
+
+
+def sitemapindex(base_url, parts):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for name, lastmod in parts:
+        lines.append(f'<sitemap><loc>{escape(f"{base_url}/{name}")}</loc><lastmod>{_lastmod(lastmod)}</lastmod></sitemap>')
+    lines.append('</sitemapindex>\n')
+    return '\n'.join(lines)
+
+
+def build(base_url):
+    """{имя файла: XML} для индекса и всех частей; пустые разделы пропускаются"""
+    files, parts = {}, []
+    for section in SECTIONS:
+        chunks, chunk = [], []
+        for entry in entries(section):
+            chunk.append(entry)
+            if len(chunk) == settings.SITEMAP_CHUNK_SIZE:
+                chunks.append(chunk)
+                chunk = []
+        if chunk:
+            chunks.append(chunk)
+        for number, chunk in enumerate(chunks, 1):
+            name = f'sitemap-{section}-{number}.xml'
+            files[name] = urlset(base_url, chunk)
+            parts.append((name, max(lastmod for _, lastmod in chunk)))
+    files[INDEX_NAME] = sitemapindex(base_url, parts)
+    return files
+
+
+def get(base_url, name):
+    """XML файла карты или None, если такого нет; при промахе кэша собирается вся карта"""
+    cache = pagecache.get_cache()
+    digest = hashlib.sha256(base_url.encode()).hexdigest()[:16]
+    prefix = f'sitemap:{pagecache.generation(GENERATION_KEY)}:{digest}'
+    names = cache.get(f'{prefix}:names')
+    if names is not None:
+        if name not in names:
+            return None
+        xml = cache.get(f'{prefix}:{name}')
+        if xml is not None:
+            return xml
+
+    files = build(base_url)
+    timeout = settings.SITEMAP_CACHE_TIMEOUT
+    cache.set_many({f'{prefix}:{file}': xml for file, xml in files.items()}, timeout)
+    cache.set(f'{prefix}:names', set(files), timeout)
+    return files.get(name)
@@ -0,0 +1,228 @@
+"""
+Выгрузка публичной части блога в статические файлы.
+
+manage.py build_static_site рендерит страницы теми же представлениями и
+middleware, что и живой сайт (с минификацией), и раскладывает их по
+каталогу: /post/slug/ -> post/slug/index.html, /page/2/ -> page/2/index.html.
+Каталог может отдавать любой статический сервер или CDN; /static/ и /media/
+берутся из collectstatic и хранилища медиа, как обычно.
+
+Пересборка инкрементальная. Рядом со страницами лежит манифест — граф
+зависимостей: для каждой страницы id статей, которые на ней выведены (для
+списка — статьи этой страницы по порядку, для статьи — она сама и похожие,
+для ленты — первые FEED_ITEMS статей того же списка).
+Статьи, изменённые после прошлой сборки (updated_at), считаются
+изменёнными. Перерисовываются страницы, на которых такая статья была или
+стала, и страницы, состав которых поменялся (сдвиг пагинации, смена
+категории, удаление); страницы, которых больше нет, удаляются. Граф
+строится запросами id без рендера, сам рендер идёт в пуле процессов.
+
+Названия категорий и тегов и имена авторов выводятся почти на каждой
+странице, а их правка не меняет updated_at статей. Поэтому в
+манифесте хранится хэш этих данных (shared_state); если он изменился,
+сайт собирается целиком.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from taggit.models import Tag
+
+from . import feeds, views
+from .models import Category, Post
+from .vendor import write_atomic
+
+MANIFEST_NAME = '.staticsite.json'
+
+
+class StaticSiteError(Exception):
+    """Страницу не удалось отрисовать"""
+
+
+def output_path(url):
+    """/post/a/ -> post/a/index.html; адреса приходят из reverse() и могут быть в %-кодировке"""
+    path = unquote(url).lstrip('/')
+    if not path or path.endswith('/'):
+        path += 'index.html'
+    return path
+
+
+def _list_pages(name, kwargs, ids, per_page):
+    chunks = [ids[i:i + per_page] for i in range(0, len(ids), per_page)] or [[]]
+    pages = {}
+    for number, chunk in enumerate(chunks, 1):
+        if number == 1:
+            url = reverse(f'blog:{name}', kwargs=kwargs)
+        else:
+            url = reverse(f'blog:{name}_page', kwargs={**kwargs, 'page': number})
+        pages[url] = chunk
+    return pages
+
+
+def _feeds(name, kwargs, ids):
+    """Ленты списка во всех форматах: в каждой первые FEED_ITEMS статей списка"""
+    return {
+        reverse(f'blog:{name}', kwargs={**kwargs, 'fmt': fmt}): ids[:settings.FEED_ITEMS]
+        for fmt in feeds.FEED_TYPES
+    }
+
+
+def site_graph():
+    """
+    {адрес: [id статей]} для всех страниц сайта. None вместо списка —
+    страница зависит от любого изменения (сервис-воркер с версией контента).
+    """
+    # Порядок как в views.published_posts() (Post.Meta.ordering)
+    rows = list(Post.objects.filter(status='published').values_list('id', 'slug', 'category_id'))
+    by_category = defaultdict(list)
+    for pk, _, category_id in rows:
+        by_category[category_id].append(pk)
+
+    published = [pk for pk, _, _ in rows]
+    graph = _list_pages('post_list', {}, published, views.PostListView.paginate_by)
+    graph.update(_feeds('feed', {}, published))
+    for pk, slug, category_id in rows:
+        # Похожие статьи — первые три из той же категории (PostDetailView)
+        related = [other for other in by_category[category_id] if other != pk][:3]
+        graph[reverse('blog:post_detail', args=[slug])] = [pk] + related
+
+    for category in Category.objects.only('id', 'slug'):
+        graph.update(_list_pages(
+            'category_posts', {'slug': category.slug},
+            by_category.get(category.id, []), views.CategoryPostsView.paginate_by,
+        ))
+        graph.update(_feeds('category_feed', {'slug': category.slug}, by_category.get(category.id, [])))
+
+    by_tag = defaultdict(list)
+    for tag_name, pk in Post.objects.filter(status='published', tags__isnull=False).values_list('tags__name', 'id'):
+        by_tag[tag_name].append(pk)
+    for tag_name, ids in by_tag.items():
+        graph.update(_list_pages('tag_posts', {'tag_name': tag_name}, ids, views.TagPostsView.paginate_by))
+        graph.update(_feeds('tag_feed', {'tag_name': tag_name}, ids))
+
+    graph[reverse('blog:offline')] = []
+    if settings.SERVICE_WORKER:
+        graph[reverse('blog:service_worker')] = None
+        graph[reverse('blog:web_manifest')] = []
+    return graph
+
+
+def shared_state():
+    """Хэш категорий, тегов и авторов опубликованных статей — всего, что выводится вне статей"""
+    published = Post.objects.filter(status='published')
+    state = [
+        list(Category.objects.order_by('id').values_list('id', 'name', 'slug', 'description')),
+        list(Tag.objects.order_by('id').values_list('id', 'name', 'slug')),
+        list(User.objects.filter(id__in=published.values('author_id')).order_by('id').values_list(
+            'id', 'username', 'first_name', 'last_name',
+        )),
+    ]
+    return hashlib.sha256(json.dumps(state, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def changed_posts(since):
+    return set(Post.objects.filter(updated_at__gt=since).values_list('id', flat=True))
+
+
+def plan(old_graph, new_graph, changed):
+    """(адреса для рендера, адреса для удаления) по старому и новому графу"""
+    render, always = [], []
+    for url, ids in new_graph.items():
+        old = old_graph.get(url)
+        if url not in old_graph:
+            render.append(url)
+        elif ids is None:
+            always.append(url)
+        elif old != ids or changed.intersection(ids) or changed.intersection(old or ()):
+            render.append(url)
+    stale = [url for url in old_graph if url not in new_graph]
+    if render or stale:
+        render += always
+    return render, stale
+
+
+def render_pages(urls, output_dir):
+    """Рендер адресов в файлы через обычный цикл запроса (выполняется и в процессах пула)"""
+    client = Client(HTTP_HOST=settings.STATIC_SITE_HOST, **{
+        f'HTTP_{views.STATIC_EXPORT_HEADER.upper().replace("-", "_")}': '1',
+    })
+    # Кэш страниц здесь только мешал бы: каждая страница рендерится один раз
+    with override_settings(PAGE_CACHE=False, PRELOAD_HINTS=False):
+        for url in urls:
+            response = client.get(url, secure=True)
+            if response.status_code != 200:
+                raise StaticSiteError(f'{url}: HTTP {response.status_code}')
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            write_atomic(Path(output_dir) / output_path(url), content)
+    return len(urls)
+
+
+def _init_worker():
+    django.setup()
+
+
+def render_all(urls, output_dir, workers=1):
+    if workers <= 1 or len(urls) < 2:
+        return render_pages(urls, output_dir)
+    # Несколько пачек на процесс: долгие страницы не держат весь пул
+    size = max(1, len(urls) // (workers * 4))
+    batches = [urls[i:i + size] for i in range(0, len(urls), size)]
+    # Соединения с БД не должны достаться дочерним процессам
+    connections.close_all()
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        return sum(pool.map(render_pages, batches, [str(output_dir)] * len(batches)))
+
+
+def load_manifest(output_dir):
+    try:
+        return json.loads((Path(output_dir) / MANIFEST_NAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def remove_page(output_dir, url):
+    path = Path(output_dir) / output_path(url)
+    path.unlink(missing_ok=True)
+    # Пустые каталоги post/slug/ тоже не нужны
+    for parent in path.parents:
+        if parent == Path(output_dir) or any(parent.iterdir()):
+            break
+        parent.rmdir()
+
+
+def build(output_dir, full=False, workers=None, dry_run=False):
+    """
+    Собирает сайт в output_dir. Без full — только страницы, затронутые
+    изменениями после прошлой сборки. Возвращает отчёт со списками адресов.
+    """
+    output_dir = Path(output_dir)
+    started = timezone.now()
+    manifest = load_manifest(output_dir)
+    graph = site_graph()
+    shared = shared_state()
+    if full or manifest is None or manifest.get('shared') != shared:
+        urls = list(graph)
+        stale = [url for url in (manifest or {}).get('pages', {}) if url not in graph]
+    else:
+        urls, stale = plan(manifest['pages'], graph, changed_posts(parse_datetime(manifest['built_at'])))
+
+    if not dry_run:
+        render_all(urls, output_dir, workers or os.cpu_count() or 1)
+        for url in stale:
+            remove_page(output_dir, url)
+        write_atomic(output_dir / MANIFEST_NAME, json.dumps(
+            {'built_at': started.isoformat(), 'shared': shared, 'pages': graph}, ensure_ascii=False,
+        ).encode('utf-8'))
+    return {'rendered': urls, 'deleted': stale, 'total': len(graph)}
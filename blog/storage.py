@@ -0,0 +1,313 @@
+"""
+Хранилища медиафайлов с оптимизацией изображений при загрузке.
+
+Обложки и картинки из CKEditor сохраняются как прислали — часто это PNG-
+скриншоты на несколько мегабайт с EXIF (и GPS). Перед записью в хранилище
+изображение поворачивается по EXIF, уменьшается до MEDIA_MAX_DIMENSION,
+теряет метаданные (ICC-профиль сохраняется) и перекодируется в исходный
+формат или WebP — что окажется меньше. Если менять нечего и выигрыш меньше
+MEDIA_OPTIMIZE_MIN_SAVING, файл остаётся как есть. Промежуточные результаты
+пишутся в SpooledTemporaryFile и при большом размере уходят на диск.
+
+Дедупликация: обработчики загрузки считают SHA-256 по мере приёма файла,
+хранилище кладёт его в каталог upload_to под именем <sha256>.<ext> и заводит
+MediaBlob со счётчиком ссылок. Повторная загрузка тех же байтов ничего не пишет (и не
+оптимизирует заново), а возвращает уже сохранённое имя. Неиспользуемые
+файлы удаляет команда gc_media.
+"""
+import hashlib
+import logging
+import os
+import posixpath
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff'}
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+ORIENTATION = 0x0112
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+
+
+class PreparedFile(ContentFile):
+    """Файл, уже подготовленный приложением (варианты обложек): оптимизатор его не трогает"""
+
+
+class OptimizationResult:
+    def __init__(self, name, file, original_size, size, changes):
+        self.name = name
+        self.file = file
+        self.original_size = original_size
+        self.size = size
+        self.changes = changes
+
+    @property
+    def saved(self):
+        return self.original_size - self.size
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=settings.MEDIA_OPTIMIZE_SPOOL_SIZE)
+
+
+def _encode(image, fmt, **options):
+    buffer = _spool()
+    image.save(buffer, fmt, **options)
+    buffer.seek(0, os.SEEK_END)
+    return buffer, buffer.tell()
+
+
+def _candidates(image, source_format, icc_profile):
+    quality = settings.MEDIA_OPTIMIZE_QUALITY
+    extra = {'icc_profile': icc_profile} if icc_profile else {}
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+    if source_format == 'PNG':
+        yield 'PNG', dict(optimize=True, **extra)
+    elif not has_alpha:
+        yield 'JPEG', dict(quality=quality, optimize=True, progressive=True, **extra)
+    yield 'WEBP', dict(quality=quality, method=4, **extra)
+    if source_format == 'PNG':
+        # Скриншоты с крупными заливками часто меньше в lossless WebP
+        yield 'WEBP', dict(lossless=True, method=4, **extra)
+
+
+def optimize_image(name, content):
+    """
+    Возвращает OptimizationResult или None, если файл не картинка или
+    лучше оставить его как есть.
+    """
+    if os.path.splitext(name)[1].lower() not in OPTIMIZED_EXTENSIONS:
+        return None
+    content.seek(0, os.SEEK_END)
+    original_size = content.tell()
+    content.seek(0)
+    try:
+        image = Image.open(content)
+        if getattr(image, 'is_animated', False):
+            return None
+        source_format = image.format
+        image.load()
+    except Exception:
+        return None
+    finally:
+        content.seek(0)
+
+    changes = []
+    exif = image.getexif()
+    if exif or any(key in image.info for key in METADATA_KEYS):
+        changes.append('метаданные')
+    icc_profile = image.info.get('icc_profile')
+    if exif.get(ORIENTATION, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+        changes.append('поворот')
+
+    limit = settings.MEDIA_MAX_DIMENSION
+    if max(image.size) > limit:
+        image.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+        changes.append(f'размер {image.width}×{image.height}')
+
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    elif image.mode == 'P':
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    best = None
+    for fmt, options in _candidates(image, source_format, icc_profile):
+        if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+            continue
+        buffer, size = _encode(image, fmt, **options)
+        if best is None or size < best[2]:
+            if best:
+                best[1].close()
+            best = (fmt, buffer, size)
+        else:
+            buffer.close()
+
+    fmt, buffer, size = best
+    min_saving = settings.MEDIA_OPTIMIZE_MIN_SAVING
+    if not changes and size > original_size * (1 - min_saving):
+        buffer.close()
+        return None
+    if fmt != source_format:
+        changes.append(f'{source_format} → {fmt}')
+
+    new_name = os.path.splitext(name)[0] + EXTENSIONS[fmt]
+    buffer.seek(0)
+    return OptimizationResult(new_name, File(buffer, name=new_name), original_size, size, changes)
+
+
+class OptimizingStorageMixin:
+    """Подмешивается к классу хранилища и оптимизирует изображения в _save"""
+
+    def _save(self, name, content):
+        if not settings.MEDIA_OPTIMIZE or isinstance(content, PreparedFile):
+            return super()._save(name, content)
+        result = optimize_image(name, content)
+        if result is None:
+            return super()._save(name, content)
+        try:
+            saved_name = super()._save(result.name, result.file)
+        finally:
+            result.file.close()
+        logger.info(
+            'Изображение %s оптимизировано (%s): %d → %d байт, сэкономлено %d',
+            saved_name, ', '.join(result.changes), result.original_size, result.size, result.saved,
+        )
+        return saved_name
+
+
+class HashingUploadHandlerMixin:
+    """Считает SHA-256 загружаемого файла по мере приёма чанков"""
+
+    def new_file(self, *args, **kwargs):
+        self.sha256 = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def content_hash(content):
+    """SHA-256 из обработчика загрузки, иначе — потоковым чтением файла"""
+    sha256 = getattr(content, 'sha256', None)
+    if sha256:
+        return sha256
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(sha256, name):
+    """posts/2024/01/Screenshot 1.PNG -> posts/2024/01/<sha256>.png"""
+    folder, filename = posixpath.split(name)
+    return posixpath.join(folder, sha256 + os.path.splitext(filename)[1].lower())
+
+
+class DeduplicatingStorageMixin:
+    """
+    Внешний слой хранилища: одинаковое содержимое хранится один раз.
+    Стоит перед OptimizingStorageMixin, чтобы дубликаты не перекодировались.
+    """
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        if not settings.MEDIA_DEDUP or isinstance(content, PreparedFile):
+            return super()._save(name, content)
+
+        sha256 = content_hash(content)
+        # Строка блокируется: одновременный delete() не удалит файл, на который появилась ссылка
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is not None and self.exists(blob.name):
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1, unreferenced_since=None)
+                logger.info('Файл %s уже загружен как %s', name, blob.name)
+                return blob.name
+
+        existing = self.stored_blob(sha256, name)
+        if existing is not None:
+            # Файл с этим содержимым уже лежит в хранилище, а записи о нём нет (или она
+            # указывает на пропавший файл): второй копии с суффиксом не пишем
+            logger.info('Файл %s уже есть в хранилище как %s', name, existing)
+            saved_name = existing
+        else:
+            saved_name = super()._save(blob_name(sha256, name), content)
+        size = self.size(saved_name)
+        if blob is not None:
+            # Запись есть, а файл пропал из хранилища — восстанавливаем
+            MediaBlob.objects.filter(pk=blob.pk).update(
+                name=saved_name, size=size, refcount=F('refcount') + 1, unreferenced_since=None,
+            )
+            return saved_name
+        try:
+            with transaction.atomic():
+                MediaBlob.objects.create(sha256=sha256, name=saved_name, size=size)
+        except IntegrityError:
+            # Тот же файл одновременно загрузил другой запрос: оставляем его копию
+            blob = MediaBlob.objects.get(sha256=sha256)
+            if saved_name != blob.name:
+                super().delete(saved_name)
+            MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            return blob.name
+        return saved_name
+
+    def stored_blob(self, sha256, name):
+        """Имя уже записанного файла с этим содержимым в папке name (с расширением после оптимизации)"""
+        target = blob_name(sha256, name)
+        stem, ext = os.path.splitext(target)
+        for candidate in dict.fromkeys([target] + [stem + other for other in EXTENSIONS.values() if other != ext]):
+            if self.exists(candidate):
+                return candidate
+        return None
+
+    def delete(self, name):
+        """Файл, на который есть другие ссылки, не удаляется — уменьшается счётчик"""
+        from .models import MediaBlob
+
+        # Проверка счётчика и удаление — под блокировкой строки: два одновременных
+        # delete() не обнулят счётчик, оставив файл, а _save() не сошлётся на удалённый
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return
+            if blob is not None:
+                blob.delete()
+            super().delete(name)
+
+
+class OptimizingFileSystemStorage(OptimizingStorageMixin, FileSystemStorage):
+    """Локальное хранилище (разработка и Railway без Cloudinary)"""
+
+
+class FileSystemMediaStorage(DeduplicatingStorageMixin, OptimizingStorageMixin, FileSystemStorage):
+    """Локальное хранилище с дедупликацией и оптимизацией"""
+
+
+def __getattr__(name):
+    # cloudinary_storage требует ключи уже при импорте, поэтому классы для
+    # Cloudinary создаются только когда их действительно запрашивают настройки
+    bases = {
+        'OptimizingCloudinaryStorage': (OptimizingStorageMixin,),
+        'CloudinaryMediaStorage': (DeduplicatingStorageMixin, OptimizingStorageMixin),
+    }
+    if name in bases:
+        from cloudinary_storage.storage import MediaCloudinaryStorage
+
+        cls = type(name, bases[name] + (MediaCloudinaryStorage,), {
+            '__module__': __name__,
+            '__doc__': 'Cloudinary с обработкой файлов перед отправкой',
+        })
+        globals()[name] = cls
+        return cls
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,100 @@
+"""
+Сборка CSS standalone-бинарником Tailwind.
+
+Раньше base.html подключал cdn.tailwindcss.com: скрипт на ~100 КБ, который в
+каждом браузере при каждой загрузке страницы заново компилирует стили и
+блокирует отрисовку. Теперь manage.py build_css на этапе сборки запускает
+официальный standalone CLI Tailwind — один исполняемый файл без Node, с
+встроенным плагином typography (tailwind/tailwind.config.js) и пишет все
+утилиты шаблонов в static/css/site.css. Файл не хранится в репозитории:
+его собирают Dockerfile и buildCommand Railway/nixpacks перед collectstatic
+(CompressedManifestStaticFilesStorage добавляет хэш в имя и сжимает файл).
+
+Бинарник закреплённой версии TAILWIND_VERSION скачивается с GitHub Releases
+в TAILWIND_CLI_DIR и сверяется с sha256: из TAILWIND_CLI_SHA256, а если для
+платформы значения нет — с sha256sums.txt того же релиза. TAILWIND_CLI
+указывает на уже установленный бинарник (образ CI, пакетный менеджер).
+"""
+import platform
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+
+from . import vendor
+
+PLATFORMS = {
+    ('linux', 'x86_64'): 'linux-x64',
+    ('linux', 'amd64'): 'linux-x64',
+    ('linux', 'aarch64'): 'linux-arm64',
+    ('linux', 'arm64'): 'linux-arm64',
+    ('darwin', 'x86_64'): 'macos-x64',
+    ('darwin', 'arm64'): 'macos-arm64',
+    ('windows', 'amd64'): 'windows-x64.exe',
+}
+
+
+class TailwindError(Exception):
+    """Бинарник не удалось получить, проверить или он завершился ошибкой"""
+
+
+def asset_name():
+    """Имя файла релиза для текущей платформы: tailwindcss-linux-x64 и т. п."""
+    key = (platform.system().lower(), platform.machine().lower())
+    if key not in PLATFORMS:
+        raise TailwindError(f'Нет standalone-сборки Tailwind для {key[0]}/{key[1]}: укажите TAILWIND_CLI')
+    return f'tailwindcss-{PLATFORMS[key]}'
+
+
+def release_url(name):
+    return f'{settings.TAILWIND_RELEASE_URL}/{name}'
+
+
+def expected_sha256(name):
+    """Закреплённый хэш или строка для name из sha256sums.txt релиза"""
+    pinned = settings.TAILWIND_CLI_SHA256.get(name)
+    if pinned:
+        return pinned
+    sums = vendor.fetch({'path': 'sha256sums.txt', 'url': release_url('sha256sums.txt')})
+    for line in sums.decode().splitlines():
+        parts = line.split()
+        if len(parts) == 2 and Path(parts[1].lstrip('*')).name == name:
+            return parts[0]
+    raise TailwindError(f'{name} нет в sha256sums.txt релиза v{settings.TAILWIND_VERSION}')
+
+
+def install(force=False):
+    """Путь к бинарнику; при необходимости скачивает и проверяет его"""
+    if settings.TAILWIND_CLI:
+        return Path(settings.TAILWIND_CLI)
+    name = asset_name()
+    path = Path(settings.TAILWIND_CLI_DIR) / f'{name}-{settings.TAILWIND_VERSION}'
+    if path.exists() and not force:
+        return path
+    try:
+        asset = {'path': name, 'url': release_url(name), 'sha256': expected_sha256(name)}
+        data = vendor.fetch(asset)
+        vendor.verify(asset, data)
+    except vendor.VendorError as e:
+        raise TailwindError(str(e))
+    vendor.write_atomic(path, data)
+    path.chmod(0o755)
+    return path
+
+
+def build(cli, output, content):
+    """Минифицированный CSS для классов из файлов content в output"""
+    command = [
+        str(cli),
+        '--config', str(settings.TAILWIND_CONFIG),
+        '--input', str(settings.TAILWIND_INPUT),
+        '--output', str(output),
+        '--content', ','.join(str(path) for path in content),
+        '--minify',
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+    except OSError as e:
+        raise TailwindError(f'{cli}: {e}')
+    if result.returncode:
+        raise TailwindError(result.stderr.strip() or f'{cli}: код выхода {result.returncode}')
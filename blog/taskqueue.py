@@ -0,0 +1,225 @@
+"""
+Очередь фоновых задач на основной БД, без отдельного брокера.
+
+Задача — строка blog.Task: имя зарегистрированной функции и её аргументы
+(JSON). enqueue() пишет строку в текущей транзакции, поэтому задача
+появляется только вместе с изменением, которое её породило.
+manage.py run_worker выбирает готовые задачи (run_at <= now) и выполняет их:
+
+  * PostgreSQL (и другие СУБД с SKIP LOCKED) — SELECT … FOR UPDATE SKIP
+    LOCKED: воркеры не ждут друг друга и не берут одну задачу дважды;
+  * SQLite — условный UPDATE … WHERE status = 'queued': задачу получает тот,
+    чей UPDATE изменил строку, записи в SQLite всё равно идут по одной.
+
+Упавшая задача возвращается в очередь с экспоненциальной задержкой
+(TASK_RETRY_DELAY * 2^(попытка-1), не больше TASK_RETRY_MAX_DELAY), после
+max_attempts попыток помечается ошибкой. Задача, зависшая в работе дольше
+TASK_LOCK_TIMEOUT (воркер убит), снова ставится в очередь. Периодические
+задачи описываются в TASK_SCHEDULE; следующий запуск планирует воркер
+после завершения предыдущего.
+
+С TASKS_EAGER задача выполняется сразу в enqueue() — для тестов и
+разработки без воркера.
+"""
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+class TaskError(Exception):
+    """Задачу нельзя выполнить (например, она не зарегистрирована)"""
+
+
+def task(name, max_attempts=None):
+    """Регистрирует функцию как задачу с именем name"""
+    def decorator(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        REGISTRY[name] = func
+        return func
+    return decorator
+
+
+def backoff(attempts):
+    """Задержка перед повтором после attempts неудачных попыток"""
+    delay = settings.TASK_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.TASK_RETRY_MAX_DELAY))
+
+
+def _create(name, key='', run_at=None, max_attempts=None, **kwargs):
+    func = REGISTRY.get(name)
+    if func is None:
+        raise TaskError(f'Неизвестная задача: {name}')
+    try:
+        # Вложенная транзакция: нарушение уникальности не ломает внешнюю
+        with transaction.atomic():
+            return Task.objects.create(
+                name=name, kwargs=kwargs, key=key, run_at=run_at or timezone.now(),
+                max_attempts=max_attempts or func.max_attempts or settings.TASK_MAX_ATTEMPTS,
+            )
+    except IntegrityError:
+        if not key:
+            raise
+        # Такая же задача уже ждёт в очереди и сделает ту же работу
+        return None
+
+
+def enqueue(name, *, key='', delay=0, max_attempts=None, **kwargs):
+    """
+    Ставит задачу в очередь. С key повторная постановка, пока задача ещё
+    ждёт, ничего не добавляет (возвращается None). delay — в секундах.
+    """
+    if settings.TASKS_EAGER:
+        func = REGISTRY.get(name)
+        if func is None:
+            raise TaskError(f'Неизвестная задача: {name}')
+        try:
+            func(**kwargs)
+        except Exception:
+            logger.exception('Задача %s завершилась ошибкой', name)
+        return None
+    run_at = timezone.now() + timedelta(seconds=delay) if delay else None
+    return _create(name, key=key, run_at=run_at, max_attempts=max_attempts, **kwargs)
+
+
+def claim(worker):
+    """Следующая готовая задача, уже помеченная как взятая воркером worker, или None"""
+    now = timezone.now()
+    ready = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            item = ready.select_for_update(skip_locked=True).first()
+            if item is None:
+                return None
+            item.status = Task.RUNNING
+            item.attempts += 1
+            item.locked_by = worker
+            item.locked_at = now
+            item.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at'])
+            return item
+
+    for pk in ready.values_list('id', flat=True)[:10]:
+        taken = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, attempts=F('attempts') + 1, locked_by=worker, locked_at=now,
+        )
+        if taken:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def execute(item):
+    """Выполняет взятую задачу и записывает результат: готово, повтор или ошибка"""
+    try:
+        func = REGISTRY.get(item.name)
+        if func is None:
+            raise TaskError(f'Неизвестная задача: {item.name}')
+        func(**item.kwargs)
+    except Exception as e:
+        logger.warning('Задача %s #%s, попытка %s: %s', item.name, item.pk, item.attempts, e)
+        item.last_error = ''.join(traceback.format_exception(e))[-4000:]
+        if item.attempts < item.max_attempts:
+            item.status = Task.QUEUED
+            item.run_at = timezone.now() + backoff(item.attempts)
+        else:
+            item.status = Task.FAILED
+            item.finished_at = timezone.now()
+    else:
+        item.status = Task.DONE
+        item.finished_at = timezone.now()
+    item.locked_by = ''
+    item.locked_at = None
+
+    fields = ['status', 'run_at', 'finished_at', 'last_error', 'locked_by', 'locked_at']
+    try:
+        with transaction.atomic():
+            item.save(update_fields=fields)
+    except IntegrityError:
+        # Пока задача выполнялась, в очередь встала такая же — повтор не нужен
+        item.status = Task.FAILED
+        item.finished_at = timezone.now()
+        item.last_error += '\nПовтор отменён: в очереди уже есть задача с тем же ключом'
+        item.save(update_fields=fields)
+    return item
+
+
+def reap():
+    """Возвращает в очередь задачи, которые слишком долго числятся в работе"""
+    stale = timezone.now() - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    requeued = 0
+    for item in Task.objects.filter(status=Task.RUNNING, locked_at__lt=stale):
+        item.last_error = f'Воркер {item.locked_by} не завершил задачу за {settings.TASK_LOCK_TIMEOUT} с'
+        item.status = Task.QUEUED if item.attempts < item.max_attempts else Task.FAILED
+        item.finished_at = timezone.now() if item.status == Task.FAILED else None
+        item.locked_by = ''
+        item.locked_at = None
+        fields = ['status', 'last_error', 'finished_at', 'locked_by', 'locked_at']
+        try:
+            with transaction.atomic():
+                item.save(update_fields=fields)
+        except IntegrityError:
+            item.status = Task.FAILED
+            item.finished_at = timezone.now()
+            item.save(update_fields=fields)
+        requeued += item.status == Task.QUEUED
+    return requeued
+
+
+def schedule():
+    """Ставит периодические задачи TASK_SCHEDULE, которые ещё не ждут и не выполняются"""
+    now = timezone.now()
+    for name, entry in settings.TASK_SCHEDULE.items():
+        key = f'periodic:{name}'
+        if Task.objects.filter(key=key, status__in=[Task.QUEUED, Task.RUNNING]).exists():
+            continue
+        last = (
+            Task.objects.filter(key=key, finished_at__isnull=False)
+            .order_by('-finished_at').values_list('finished_at', flat=True).first()
+        )
+        run_at = max(last + timedelta(seconds=entry['every']), now) if last else now
+        _create(entry['task'], key=key, run_at=run_at, **entry.get('kwargs', {}))
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def work(worker=None, burst=False, max_tasks=None, poll_interval=None, should_stop=lambda: False):
+    """
+    Цикл воркера. burst — выйти, когда готовых задач не останется.
+    Возвращает число выполненных задач.
+    """
+    worker = worker or worker_name()
+    poll_interval = settings.TASK_POLL_INTERVAL if poll_interval is None else poll_interval
+    done = 0
+    next_maintenance = 0
+    while not should_stop() and (max_tasks is None or done < max_tasks):
+        # Как между HTTP-запросами: закрыть устаревшие и сломанные соединения
+        close_old_connections()
+        if time.monotonic() >= next_maintenance:
+            reap()
+            schedule()
+            next_maintenance = time.monotonic() + settings.TASK_MAINTENANCE_INTERVAL
+        item = claim(worker)
+        if item is not None:
+            execute(item)
+            done += 1
+            continue
+        if burst:
+            break
+        time.sleep(poll_interval)
+    return done
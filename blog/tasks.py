@@ -0,0 +1,75 @@
+"""
+Фоновые задачи блога (очередь — blog/taskqueue.py, воркер — manage.py run_worker).
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from . import feeds, images, outbox, viewcount
+from .models import OutboxEvent, Post, Task
+from .taskqueue import task
+
+logger = logging.getLogger(__name__)
+
+
+@task('blog.flush_views')
+def flush_views():
+    """Накопленные в кэше просмотры — в Post.views"""
+    flushed = viewcount.flush()
+    if flushed:
+        logger.info('Записано просмотров: %s', flushed)
+
+
+@task('blog.build_image_variants')
+def build_image_variants(post_id):
+    """Уменьшенные копии обложки (раньше строились прямо в запросе сохранения статьи)"""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and images.needs_variants(post):
+        images.update_variants(post)
+
+
+@task('blog.warm_feeds', max_attempts=1)
+def warm_feeds():
+    """
+    Собирает общие ленты в кэш заранее: после изменения контента первым
+    агрегаторам не приходится ждать рендера.
+    """
+    if not (settings.PAGE_CACHE and settings.FEED_WARM_HOST):
+        return
+    client = Client(HTTP_HOST=settings.FEED_WARM_HOST)
+    for fmt in feeds.FEED_TYPES:
+        response = client.get(reverse('blog:feed', kwargs={'fmt': fmt}), secure=True)
+        if response.status_code != 200:
+            raise RuntimeError(f'Лента {fmt}: HTTP {response.status_code}')
+
+
+@task('blog.prune_tasks')
+def prune_tasks():
+    """Удаляет завершённые задачи старше TASK_RETENTION_DAYS"""
+    cutoff = timezone.now() - timedelta(days=settings.TASK_RETENTION_DAYS)
+    deleted, _ = Task.objects.filter(
+        status__in=[Task.DONE, Task.FAILED], finished_at__lt=cutoff,
+    ).delete()
+    if deleted:
+        logger.info('Удалено старых задач: %s', deleted)
+
+
+@task('blog.dispatch_outbox')
+def dispatch_outbox():
+    """Доставляет события исходящего ящика (blog/outbox.py)"""
+    dispatched = outbox.dispatch()
+    if dispatched:
+        logger.info('Доставлено событий: %s', dispatched)
+
+
+@task('blog.prune_outbox')
+def prune_outbox():
+    """Удаляет доставленные события старше OUTBOX_RETENTION_DAYS; отказы остаются для разбора"""
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxEvent.objects.filter(dispatched_at__lt=cutoff).delete()
+    if deleted:
+        logger.info('Удалено старых событий: %s', deleted)
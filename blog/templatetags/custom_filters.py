@@ -1,5 +1,7 @@
 from django import template
 
+from blog.views import page_url as build_page_url
+
 register = template.Library()
 
 @register.filter
@@ -27,4 +29,9 @@ def ceil(value):
             return 0
         return math.ceil(float(value))
     except (ValueError, TypeError):
-        return 0
\ No newline at end of file
+        return 0
+
+@register.simple_tag(takes_context=True)
+def page_url(context, number):
+    """Адрес страницы списка: {% page_url page_obj.next_page_number %}"""
+    return build_page_url(context['request'], number)
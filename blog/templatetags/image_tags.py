@@ -0,0 +1,58 @@
+from django import template
+from django.utils.html import format_html
+
+from blog import imageproxy, images, thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def srcset(post, fmt='jpeg'):
+    """Атрибут srcset из вариантов обложки: {% srcset post 'webp' %}"""
+    return images.srcset(post, fmt)
+
+
+@register.simple_tag
+def thumbnail_url(path, width=0, height=0):
+    """Подписанный адрес миниатюры медиафайла: {% thumbnail_url 'uploads/a.png' 640 %}"""
+    return thumbnails.thumbnail_url(path, width, height)
+
+
+@register.simple_tag
+def responsive_image(post, sizes='100vw', css_class='', loading='lazy'):
+    """
+    <picture> с WebP и JPEG вариантами обложки, размерами и размытой заглушкой.
+    Внешняя ссылка — <img> с srcset через прокси; если вариантов нет — обычный <img>.
+    """
+    src = post.get_featured_image
+    if not src:
+        return ''
+    if images.proxied(post):
+        return format_html(
+            '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            imageproxy.proxy_url(post.featured_image_url, 960),
+            images.srcset(post, 'jpeg'), sizes, post.title, css_class, loading,
+        )
+
+    webp = images.srcset(post, 'webp')
+    jpeg = images.srcset(post, 'jpeg')
+    if not (webp and jpeg):
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            src, post.title, css_class, loading,
+        )
+
+    data = post.featured_image_variants
+    fallback = images.closest_variant(post, 'jpeg')
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async" '
+        'style="background-size: cover; background-image: url(&quot;{}&quot;)">'
+        '</picture>',
+        webp, sizes,
+        post.featured_image.storage.url(fallback['name']), jpeg, sizes,
+        data['width'], data['height'], post.title, css_class,
+        loading, data['placeholder'],
+    )
@@ -0,0 +1,29 @@
+from django import template
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def pwa_head():
+    """Ссылка на манифест и цвет темы для <head>"""
+    if not settings.SERVICE_WORKER:
+        return ''
+    return format_html(
+        '<link rel="manifest" href="{}">\n    <meta name="theme-color" content="{}">',
+        reverse('blog:web_manifest'), settings.PWA_THEME_COLOR,
+    )
+
+
+@register.simple_tag
+def register_service_worker():
+    """Регистрация /sw.js после загрузки страницы, чтобы не мешать первому показу"""
+    if not settings.SERVICE_WORKER:
+        return ''
+    return format_html(
+        "<script>if ('serviceWorker' in navigator) {{ "
+        "window.addEventListener('load', () => navigator.serviceWorker.register('{}')); }}</script>",
+        reverse('blog:service_worker'),
+    )
@@ -0,0 +1,18 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+
+register = template.Library()
+
+
+@register.simple_tag
+def static_url(path):
+    """
+    Как {% static %}, но без ошибки, если collectstatic ещё не запускался
+    (разработка, тесты): тогда адрес без хэша, файл отдаёт WhiteNoise из finders.
+    """
+    try:
+        return static(path)
+    except ValueError:
+        return settings.STATIC_URL + path
+
@@ -0,0 +1,134 @@
+"""
+Миниатюры медиафайлов по запросу: /img/<подпись>/<w>x<h>/<путь>.
+
+Картинки из статей (загрузки CKEditor) вставляются в произвольных размерах,
+поэтому, кроме вариантов обложек, нужен ресайз «на лету». Подпись — HMAC
+от размеров и пути на SECRET_KEY, иначе любой мог бы забить кэш
+бесконечными комбинациями размеров. Формат выбирается по Accept (AVIF, если
+его умеет установленный Pillow, затем WebP, затем JPEG или PNG для
+прозрачных исходников), результат хранится в том же дисковом LRU-кэше,
+что и прокси внешних обложек.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from PIL import Image, ImageOps, features
+
+from .imageproxy import DiskLRUCache
+
+SALT = 'blog.thumbnails'
+
+CONTENT_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+
+class ThumbnailError(Exception):
+    """Исходный файл не найден или не является изображением"""
+
+
+def avif_supported():
+    try:
+        return bool(features.check('avif'))
+    except Exception:
+        return False
+
+
+def signature(width, height, path):
+    value = f'{int(width)}x{int(height)}/{path}'
+    return salted_hmac(SALT, value, algorithm='sha256').hexdigest()[:20]
+
+
+def verify(sig, width, height, path):
+    return constant_time_compare(sig, signature(width, height, path))
+
+
+def thumbnail_url(path, width=0, height=0):
+    """Подписанный адрес миниатюры; 0 — размер по пропорциям"""
+    return reverse('thumbnail', kwargs={
+        'sig': signature(width, height, path), 'width': int(width), 'height': int(height), 'path': path,
+    })
+
+
+def negotiate(accept):
+    """
+    Лучший формат, который принимает браузер. 'legacy' — JPEG или PNG,
+    в зависимости от прозрачности исходника (решается при кодировании).
+    """
+    accept = accept or ''
+    if 'image/avif' in accept and avif_supported():
+        return 'avif'
+    if 'image/webp' in accept:
+        return 'webp'
+    return 'legacy'
+
+
+def get_cache():
+    return DiskLRUCache(settings.THUMBNAIL_CACHE_DIR, settings.THUMBNAIL_CACHE_SIZE)
+
+
+def open_source(path, storage=None):
+    storage = storage or default_storage
+    try:
+        with storage.open(path, 'rb') as f:
+            image = Image.open(f)
+            image.load()
+    except Exception as e:
+        # Нет файла, не картинка, SuspiciousFileOperation, ошибки удалённого хранилища
+        raise ThumbnailError(f'{path}: {e}')
+    return ImageOps.exif_transpose(image)
+
+
+def resize(image, width, height):
+    """
+    Один размер — масштаб по пропорциям, оба — обрезка по центру до w×h.
+    Изображение никогда не увеличивается.
+    """
+    if width and height:
+        scale = min(1.0, image.width / width, image.height / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    if width and image.width > width:
+        return image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS)
+    if height and image.height > height:
+        return image.resize((max(1, round(image.width * height / image.height)), height), Image.Resampling.LANCZOS)
+    return image
+
+
+def encode(image, fmt):
+    quality = settings.IMAGE_VARIANT_QUALITY
+    if fmt == 'legacy':
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        fmt = 'png' if has_alpha else 'jpeg'
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    if fmt == 'jpeg':
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    elif fmt == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, fmt.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def get_thumbnail(path, width, height, accept='', cache=None):
+    """(данные, формат) миниатюры; строится один раз на ключ"""
+    fmt = negotiate(accept)
+    key = hashlib.sha256(f'{width}x{height}:{fmt}:{path}'.encode()).hexdigest()
+    cache = cache or get_cache()
+    data = cache.get_or_create(key, lambda: encode(resize(open_source(path), width, height), fmt))
+    if fmt == 'legacy':
+        fmt = 'png' if data.startswith(b'\x89PNG') else 'jpeg'
+    return data, fmt
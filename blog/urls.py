@@ -1,12 +1,30 @@
 from django.urls import path
-from . import views
+from . import feeds, views
+from .pagecache import cached_page
 
 app_name = 'blog'
 
 urlpatterns = [
-    path('', views.PostListView.as_view(), name='post_list'),
-    path('post/<slug:slug>/', views.PostDetailView.as_view(), name='post_detail'),
-    path('category/<slug:slug>/', views.CategoryPostsView.as_view(), name='category_posts'),
-    path('tag/<str:tag_name>/', views.TagPostsView.as_view(), name='tag_posts'),
+    path('', cached_page(views.PostListView.as_view()), name='post_list'),
+    path('page/<int:page>/', cached_page(views.PostListView.as_view()), name='post_list_page'),
+    path(
+        'post/<slug:slug>/',
+        cached_page(views.PostDetailView.as_view(), on_hit=views.count_post_view),
+        name='post_detail',
+    ),
+    path('category/<slug:slug>/', cached_page(views.CategoryPostsView.as_view()), name='category_posts'),
+    path(
+        'category/<slug:slug>/page/<int:page>/',
+        cached_page(views.CategoryPostsView.as_view()),
+        name='category_posts_page',
+    ),
+    path('tag/<str:tag_name>/', cached_page(views.TagPostsView.as_view()), name='tag_posts'),
+    path('tag/<str:tag_name>/page/<int:page>/', cached_page(views.TagPostsView.as_view()), name='tag_posts_page'),
+    path('feed.<slug:fmt>', feeds.posts_feed, name='feed'),
+    path('category/<slug:slug>/feed.<slug:fmt>', feeds.category_feed, name='category_feed'),
+    path('tag/<str:tag_name>/feed.<slug:fmt>', feeds.tag_feed, name='tag_feed'),
     path('search/', views.SearchView.as_view(), name='search'),
+    path('offline/', views.OfflineView.as_view(), name='offline'),
+    path('sw.js', views.service_worker, name='service_worker'),
+    path('manifest.webmanifest', views.web_manifest, name='web_manifest'),
 ]
\ No newline at end of file
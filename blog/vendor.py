@@ -0,0 +1,161 @@
+"""
+Сторонние фронтенд-ресурсы, скачанные один раз при сборке в static/.
+
+Шрифт Inter раньше грузился с fonts.googleapis.com и fonts.gstatic.com: два
+лишних происхождения (DNS, TLS, preconnect) на первом просмотре. Теперь
+manage.py vendor_assets скачивает закреплённые версии из VENDOR_ASSETS в
+static/vendor/ и пишет рядом CSS с @font-face. Ссылки в CSS относительные,
+поэтому collectstatic (ManifestStaticFilesStorage) заменяет их адресами с
+хэшем, а шаблоны получают хэшированные адреса через {% static_url %}.
+
+Inter берётся из пакета @fontsource-variable/inter: вариативный шрифт уже
+разбит на подмножества, и нужны только латиница и кириллица. unicode-range
+в @font-face означает, что браузер скачивает файл подмножества, лишь когда
+на странице есть его символы.
+
+Каждый скачанный файл сверяется с sha256: закреплённым в VENDOR_ASSETS или,
+пока он не закреплён, с хэшем, который jsDelivr публикует для этой версии
+пакета. Файл без того и другого не принимается.
+"""
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+
+
+class VendorError(Exception):
+    """Ресурс не удалось получить или он не совпал с закреплённым хэшем"""
+
+
+# Диапазоны подмножеств fontsource
+UNICODE_RANGES = {
+    'latin': (
+        'U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, '
+        'U+0329, U+2000-206F, U+2074, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD'
+    ),
+    'cyrillic': 'U+0301, U+0400-045F, U+0490-0491, U+04B0-04B1, U+2116',
+}
+
+
+# Списки опубликованных хэшей, уже загруженные за этот запуск: url -> {файл: hash}
+_published = {}
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def fetch(asset, source=None):
+    """
+    Байты ресурса: из каталога source (тот же относительный путь, что в
+    static/), иначе по asset['url'].
+    """
+    if source:
+        path = Path(source) / asset['path']
+        try:
+            return path.read_bytes()
+        except OSError as e:
+            raise VendorError(f'{asset["path"]}: нет в {source} ({e})')
+    request = urllib.request.Request(asset['url'], headers={'User-Agent': 'codewithbrain-vendor-assets'})
+    try:
+        with urllib.request.urlopen(request, timeout=settings.VENDOR_TIMEOUT) as response:
+            return response.read()
+    except (OSError, ValueError) as e:
+        raise VendorError(f'{asset["url"]}: {e}')
+
+
+def published_sha256(asset):
+    """
+    sha256 файла из списка хэшей, который jsDelivr публикует для версии пакета
+    (asset['checksums'], файл — asset['checksum_name']). Версии npm неизменяемы,
+    так что подменённый на CDN файл с опубликованным хэшем не совпадёт.
+    """
+    url = asset['checksums']
+    if url not in _published:
+        request = urllib.request.Request(url, headers={'User-Agent': 'codewithbrain-vendor-assets'})
+        try:
+            with urllib.request.urlopen(request, timeout=settings.VENDOR_TIMEOUT) as response:
+                listing = json.loads(response.read())
+        except (OSError, ValueError) as e:
+            raise VendorError(f'{url}: {e}')
+        _published[url] = {item['name']: item['hash'] for item in listing.get('files', [])}
+    digest = _published[url].get(asset['checksum_name'])
+    if not digest:
+        raise VendorError(f'{asset["path"]}: нет в списке хэшей {url}')
+    return base64.b64decode(digest).hex()
+
+
+def expected_sha256(asset, source=None):
+    """
+    Хэш, с которым сверяется скачанный файл: закреплённый в VENDOR_ASSETS, иначе
+    опубликованный. Без того и другого файл из сети не принимается; копии из
+    --source (каталог оператора) без закреплённого хэша не проверяются.
+    """
+    if asset.get('sha256'):
+        return asset['sha256']
+    if source:
+        return None
+    if asset.get('checksums'):
+        return published_sha256(asset)
+    raise VendorError(f'{asset["path"]}: нет ни sha256, ни списка хэшей — скачивать без проверки нельзя')
+
+
+def verify(asset, data, expected=None):
+    expected = expected or asset.get('sha256')
+    if expected and sha256(data) != expected:
+        raise VendorError(f'{asset["path"]}: sha256 {sha256(data)}, ожидался {expected}')
+
+
+def write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def install(asset, static_dir, source=None, force=False):
+    """
+    Скачивает ресурс, если его ещё нет (или force). Возвращает
+    ('скачан' | 'на месте', sha256). Уже лежащий файл тоже сверяется с хэшем.
+    """
+    path = Path(static_dir) / asset['path']
+    if path.exists() and not force:
+        data = path.read_bytes()
+        verify(asset, data)
+        return 'на месте', sha256(data)
+    expected = expected_sha256(asset, source)
+    data = fetch(asset, source)
+    verify(asset, data, expected)
+    write_atomic(path, data)
+    return 'скачан', sha256(data)
+
+
+def font_face_css(assets):
+    """@font-face для ресурсов с ключом 'font'; пути относительные к CSS-файлу"""
+    blocks = []
+    for asset in assets:
+        font = asset.get('font')
+        if not font:
+            continue
+        blocks.append(
+            '@font-face {\n'
+            f"  font-family: '{font['family']}';\n"
+            '  font-style: normal;\n'
+            '  font-display: swap;\n'
+            f"  font-weight: {font['weight']};\n"
+            f"  src: url('./{Path(asset['path']).name}') format('woff2');\n"
+            f"  unicode-range: {UNICODE_RANGES[font['subset']]};\n"
+            '}\n'
+        )
+    return '/* Сгенерировано manage.py vendor_assets */\n' + '\n'.join(blocks)
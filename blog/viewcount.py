@@ -0,0 +1,126 @@
+"""
+Счётчик просмотров статей с отложенной записью в БД.
+
+Каждое открытие статьи раньше было отдельным UPDATE одной и той же
+строки, в том числе при отдаче страницы из кэша. Теперь просмотр —
+инкремент счётчика в кэше VIEWS_CACHE_ALIAS, а периодическая задача
+blog.flush_views (blog/tasks.py) раз в VIEWS_FLUSH_INTERVAL секунд
+переносит накопленное в Post.views одним UPDATE на статью.
+
+Буфер годится только в кэше с атомарным incr, общем для воркеров и
+обработчика задач: Redis или Memcached. У файлового кэша incr — это
+get + set, и параллельные воркеры теряют просмотры друг друга;
+LocMemCache атомарен, но свой у каждого процесса (подходит для тестов и
+одного процесса). Если VIEWS_CACHE_ALIAS не задан, кэш другого типа или
+VIEWS_FLUSH_INTERVAL = 0, просмотр пишется в БД сразу (UPDATE … F()).
+
+flush() не перебирает все статьи: первый просмотр статьи после сброса
+(счётчик стал 1) записывает её slug в журнал «грязных» статей — слоты
+views:dirty:N с номером из атомарного счётчика. Сброс читает журнал с
+места, где остановился прошлый раз, и обрабатывает только эти статьи.
+
+Счётчики — приблизительные: просмотры, накопленные в кэше, теряются при
+его очистке или вытеснении записи.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+
+from .models import Post
+
+KEY_PREFIX = 'views:'
+SEQ_KEY = 'views:dirty:seq'
+DONE_KEY = 'views:dirty:done'
+
+# Бэкенды с атомарным incr
+ATOMIC_BACKENDS = {
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+def pending_key(slug):
+    return f'{KEY_PREFIX}{slug}'
+
+
+def dirty_key(number):
+    return f'views:dirty:{number}'
+
+
+def get_cache():
+    """Кэш буфера или None, если просмотры пишутся в БД сразу"""
+    alias = settings.VIEWS_CACHE_ALIAS
+    if not settings.VIEWS_FLUSH_INTERVAL or not alias:
+        return None
+    if settings.CACHES[alias]['BACKEND'] not in ATOMIC_BACKENDS:
+        return None
+    return caches[alias]
+
+
+def mark_dirty(cache, slug):
+    cache.add(SEQ_KEY, 0, timeout=None)
+    cache.set(dirty_key(cache.incr(SEQ_KEY)), slug, timeout=None)
+
+
+def record(slug):
+    """Просмотр статьи; по slug, чтобы страница из кэша не требовала запроса за id"""
+    cache = get_cache()
+    if cache is None:
+        Post.objects.filter(slug=slug).update(views=F('views') + 1)
+        return
+    key = pending_key(slug)
+    if cache.add(key, 1, timeout=None):
+        count = 1
+    else:
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Запись вытеснили между add() и incr()
+            cache.add(key, 1, timeout=None)
+            count = 1
+    if count == 1:
+        mark_dirty(cache, slug)
+
+
+def flush(batch_size=500):
+    """Переносит накопленные просмотры статей из журнала в БД; возвращает их число"""
+    cache = get_cache()
+    if cache is None:
+        return 0
+    done = cache.get(DONE_KEY, 0)
+    last = cache.get(SEQ_KEY, 0)
+    flushed = 0
+    while done < last:
+        numbers = range(done + 1, min(done + batch_size, last) + 1)
+        slots = cache.get_many([dirty_key(number) for number in numbers])
+        ready = []
+        for number in numbers:
+            if dirty_key(number) not in slots:
+                # Номер выдан, а slug ещё не записан: дочитаем в следующий раз
+                break
+            ready.append(number)
+
+        slugs = {slots[dirty_key(number)] for number in ready}
+        for key, count in cache.get_many([pending_key(slug) for slug in slugs]).items():
+            if not count:
+                continue
+            slug = key.removeprefix(KEY_PREFIX)
+            Post.objects.filter(slug=slug).update(views=F('views') + count)
+            flushed += count
+            # decr, а не delete: просмотры, пришедшие после get_many, остаются в кэше
+            try:
+                left = cache.decr(key, count)
+            except ValueError:
+                continue
+            if left > 0:
+                # Они уже не дадут переход 0 → 1: статья снова в журнал
+                mark_dirty(cache, slug)
+
+        cache.delete_many([dirty_key(number) for number in ready])
+        done += len(ready)
+        cache.set(DONE_KEY, done, timeout=None)
+        if len(ready) < len(numbers):
+            break
+    return flushed
@@ -1,35 +1,187 @@
+import asyncio
+import logging
+import mimetypes
+import os
+import stat
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render, get_object_or_404
-from django.views.generic import ListView, DetailView
-from django.db.models import Q
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.decorators import classonlymethod
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.generic import ListView, DetailView, TemplateView
+from django.db.models import Q, prefetch_related_objects
 from taggit.models import Tag
+from . import hints, imageproxy, images, mediaserve, pwa, sitemaps, thumbnails, viewcount
 from .models import Post, Category
 
+logger = logging.getLogger(__name__)
+
+# sizes обложки на странице статьи: и для <picture>, и для подсказки preload
+POST_IMAGE_SIZES = '(min-width: 896px) 896px, 100vw'
+
+# Списки со страницами по адресу …/page/N/ (без query string их можно выгрузить файлами)
+PAGED_ROUTES = {'post_list', 'category_posts', 'tag_posts'}
+
+# Заголовок запросов manage.py build_static_site
+STATIC_EXPORT_HEADER = 'X-Static-Export'
+
+
+def page_url(request, number):
+    """Адрес страницы number текущего списка: /page/2/ для лент, ?q=…&page=2 для поиска"""
+    match = request.resolver_match
+    name = match.url_name.removesuffix('_page')
+    if name in PAGED_ROUTES:
+        kwargs = {key: value for key, value in match.kwargs.items() if key != 'page'}
+        if number == 1:
+            return reverse(f'blog:{name}', kwargs=kwargs)
+        return reverse(f'blog:{name}_page', kwargs={**kwargs, 'page': number})
+    query = request.GET.copy()
+    query['page'] = number
+    return f'?{query.urlencode()}'
+
+
+def counts_as_view(request):
+    """Статью открыл читатель, а не сервис-воркер (предзагрузка) или build_static_site"""
+    return not (pwa.is_precache(request) or request.headers.get(STATIC_EXPORT_HEADER) == '1')
+
+
+def published_posts():
+    """Опубликованные статьи со всем, что выводится в карточке списка"""
+    return (
+        Post.objects.filter(status='published')
+        .select_related('author', 'category')
+        .prefetch_related('tags')
+    )
+
+
+class ServerInterfaceMixin:
+    """
+    Асинхронный get только под ASGI (SERVER_INTERFACE = 'asgi'). Под WSGI
+    (синхронный gunicorn) async-представление Django вызывает через
+    async_to_sync: цикл событий и переключения потоков на каждый запрос без
+    выигрыша, поэтому там остаётся обычный синхронный get. Асинхронная
+    версия — метод aget; выбор делается один раз, в as_view().
+    """
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        if settings.SERVER_INTERFACE == 'asgi':
+            cls = type(cls.__name__, (cls,), {'__module__': cls.__module__, 'get': cls.aget})
+        return super(ServerInterfaceMixin, cls).as_view(**initkwargs)
+
+
+class AsyncListMixin(ServerInterfaceMixin):
+    """
+    Асинхронный get для ListView под ASGI: число статей и страница читаются
+    async ORM, поток воркера не ждёт БД. Шаблон рендерится как обычно (под
+    ASGI Django делает это в потоке), get_queryset() не должен ходить в БД.
+    """
+
+    async def aget(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        page_size = self.get_paginate_by(self.object_list)
+        if page_size:
+            self.row_count = await self.object_list.acount()
+            # Paginator с известным count в БД не обращается, страница — ленивый срез
+            paginator, page, object_list, is_paginated = super().paginate_queryset(self.object_list, page_size)
+            page.object_list = [obj async for obj in object_list]
+            self.paginated = (paginator, page, page.object_list, is_paginated)
+        else:
+            self.object_list = [obj async for obj in self.object_list]
+        return self.render_to_response(self.get_context_data())
 
-class PostListView(ListView):
+    def get_paginator(self, queryset, *args, **kwargs):
+        paginator = super().get_paginator(queryset, *args, **kwargs)
+        if hasattr(self, 'row_count'):
+            paginator.count = self.row_count
+        return paginator
+
+    def paginate_queryset(self, queryset, page_size):
+        if hasattr(self, 'paginated'):
+            return self.paginated
+        return super().paginate_queryset(queryset, page_size)
+
+
+class PostListView(AsyncListMixin, ListView):
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     paginate_by = 10
 
     def get_queryset(self):
-        return Post.objects.filter(status='published').select_related('author', 'category')
+        return published_posts()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context['page_obj']
+        if page is not None and page.has_next():
+            # Следующую страницу браузер загрузит в простое
+            hints.add(self.request, page_url(self.request, page.next_page_number()), 'prefetch')
+        return context
+
 
+def count_post_view(request, slug):
+    """Просмотр статьи, отданной из кэша страниц"""
+    if not counts_as_view(request):
+        return
+    viewcount.record(slug)
 
-class PostDetailView(DetailView):
+
+class PostDetailView(ServerInterfaceMixin, DetailView):
     model = Post
     template_name = 'blog/post_detail.html'
 
-    def get_object(self):
-        obj = super().get_object()
-        obj.views += 1
-        obj.save(update_fields=['views'])
-        return obj
+    def get_queryset(self):
+        return Post.objects.select_related('author', 'category')
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        prefetch_related_objects([self.object], 'tags')
+        self.related_posts = list(self.get_related_posts())
+        self.count_view()
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+    async def aget(self, request, *args, **kwargs):
+        try:
+            self.object = await self.get_queryset().aget(slug=self.kwargs['slug'])
+        except Post.DoesNotExist:
+            raise Http404('Статья не найдена')
+        # Теги, похожие статьи и счётчик просмотров друг от друга не зависят
+        _, self.related_posts, _ = await asyncio.gather(
+            sync_to_async(prefetch_related_objects)([self.object], 'tags'),
+            self.aget_related_posts(),
+            sync_to_async(self.count_view)(),
+        )
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+    def get_related_posts(self):
+        return Post.objects.filter(
+            category_id=self.object.category_id, status='published'
+        ).exclude(pk=self.object.pk)[:3]
+
+    async def aget_related_posts(self):
+        return [post async for post in self.get_related_posts()]
+
+    def count_view(self):
+        if counts_as_view(self.request):
+            self.object.views += 1
+            viewcount.record(self.object.slug)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['related_posts'] = Post.objects.filter(
-            category=self.object.category, status='published'
-        ).exclude(pk=self.object.pk)[:3]
+        context['related_posts'] = self.related_posts
+        context['image_sizes'] = POST_IMAGE_SIZES
+        image = images.preload(self.object, POST_IMAGE_SIZES)
+        if image:
+            hints.add(self.request, image.pop('url'), as_='image', fetchpriority='high', **image)
         return context
 
 
@@ -40,7 +192,7 @@ class CategoryPostsView(ListView):
 
     def get_queryset(self):
         self.category = get_object_or_404(Category, slug=self.kwargs['slug'])
-        return Post.objects.filter(category=self.category, status='published')
+        return published_posts().filter(category=self.category)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -56,7 +208,7 @@ class TagPostsView(ListView):
 
     def get_queryset(self):
         self.tag = get_object_or_404(Tag, name=self.kwargs['tag_name'])
-        return Post.objects.filter(tags__in=[self.tag], status='published')
+        return published_posts().filter(tags__in=[self.tag])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -65,7 +217,7 @@ class TagPostsView(ListView):
         return context
 
 
-class SearchView(ListView):
+class SearchView(AsyncListMixin, ListView):
     template_name = 'blog/search.html'
     context_object_name = 'posts'
     paginate_by = 10
@@ -73,8 +225,193 @@ class SearchView(ListView):
     def get_queryset(self):
         query = self.request.GET.get('q', '')
         if query:
-            return Post.objects.filter(
-                Q(title__icontains=query) | Q(content__icontains=query),
-                status='published'
+            return published_posts().filter(
+                Q(title__icontains=query) | Q(content__icontains=query)
             )
-        return Post.objects.none()
\ No newline at end of file
+        return Post.objects.none()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class OfflineView(TemplateView):
+    """Страница, которую сервис-воркер показывает без сети"""
+    template_name = 'blog/offline.html'
+
+
+@require_safe
+def service_worker(request):
+    """
+    /sw.js из корня сайта (область действия — весь сайт). Браузер
+    перепроверяет его при каждом открытии, отсюда no-cache и ETag по версии.
+    """
+    if not settings.SERVICE_WORKER:
+        raise Http404('Сервис-воркер отключён')
+    script, version = pwa.service_worker()
+    tag = f'"{version}"'
+    response = get_conditional_response(request, etag=tag)
+    if response is None:
+        response = HttpResponse(script, content_type='text/javascript; charset=utf-8')
+    response['ETag'] = tag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@require_safe
+def web_manifest(request):
+    if not settings.SERVICE_WORKER:
+        raise Http404('Сервис-воркер отключён')
+    response = JsonResponse(pwa.web_manifest(), content_type='application/manifest+json',
+                            json_dumps_params={'ensure_ascii': False})
+    response['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
+@require_safe
+def sitemap(request, section=None, number=None):
+    """Индекс карты сайта или её часть (см. blog/sitemaps.py)"""
+    name = sitemaps.INDEX_NAME if section is None else f'sitemap-{section}-{number}.xml'
+    xml = sitemaps.get(f'{request.scheme}://{request.get_host()}', name)
+    if xml is None:
+        raise Http404('Нет такой части карты сайта')
+    response = HttpResponse(xml, content_type='application/xml; charset=utf-8')
+    response['Cache-Control'] = f'public, max-age={settings.SITEMAP_MAX_AGE}'
+    return response
+
+
+@require_safe
+def robots_txt(request):
+    """robots.txt с адресом карты сайта: по ней роботы находят статьи без обхода ленты"""
+    lines = ['User-agent: *', *(f'Disallow: {prefix}' for prefix in settings.ROBOTS_DISALLOW)]
+    lines.append(f'Sitemap: {request.build_absolute_uri(reverse("sitemap_index"))}')
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; charset=utf-8')
+
+
+@require_safe
+def image_proxy(request, token):
+    """
+    Внешняя обложка через локальный кэш (см. blog/imageproxy.py).
+    Если источник недоступен, браузер перенаправляется на оригинал.
+    """
+    try:
+        url, width = imageproxy.unsign(token)
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise Http404('Неверная подпись')
+    if not url.startswith(('http://', 'https://')):
+        raise Http404('Неподдерживаемый адрес')
+
+    try:
+        data = imageproxy.get_image(url, width)
+    except imageproxy.ProxyError as e:
+        logger.warning('Прокси изображений: %s', e)
+        response = HttpResponseRedirect(url)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    tag = imageproxy.etag(data)
+    cache_control = f'public, max-age={settings.IMAGE_PROXY_MAX_AGE}'
+    conditional = get_conditional_response(request, etag=tag)
+    if conditional is not None:
+        conditional['ETag'] = tag
+        conditional['Cache-Control'] = cache_control
+        return conditional
+
+    response = HttpResponse(data, content_type='image/jpeg')
+    response['ETag'] = tag
+    response['Cache-Control'] = cache_control
+    response['Content-Length'] = len(data)
+    return response
+
+
+@require_safe
+def thumbnail(request, sig, width, height, path):
+    """Миниатюра медиафайла по подписанному адресу (см. blog/thumbnails.py)"""
+    limit = settings.THUMBNAIL_MAX_DIMENSION
+    if not thumbnails.verify(sig, width, height, path) or width > limit or height > limit:
+        raise Http404('Неверная подпись')
+    try:
+        data, fmt = thumbnails.get_thumbnail(path, width, height, request.META.get('HTTP_ACCEPT', ''))
+    except thumbnails.ThumbnailError as e:
+        logger.warning('Миниатюра: %s', e)
+        raise Http404('Изображение не найдено')
+
+    tag = imageproxy.etag(data)
+    cache_control = f'public, max-age={settings.THUMBNAIL_MAX_AGE}'
+    response = get_conditional_response(request, etag=tag)
+    if response is None:
+        response = HttpResponse(data, content_type=thumbnails.CONTENT_TYPES[fmt])
+        response['Content-Length'] = len(data)
+    response['ETag'] = tag
+    response['Cache-Control'] = cache_control
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Медиафайл из MEDIA_ROOT для продакшена без nginx: sendfile через
+    FileResponse, Range, сильный ETag, If-None-Match/If-Modified-Since и
+    immutable-кэширование файлов с хэшем в имени (см. blog/mediaserve.py).
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Файл не найден')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('Файл не найден')
+
+    tag = mediaserve.etag(path, st)
+    if mediaserve.is_hashed(path):
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+    response = get_conditional_response(request, etag=tag, last_modified=int(st.st_mtime))
+    if response is None:
+        response = _media_response(request, fullpath, st, tag)
+    response['ETag'] = tag
+    response['Last-Modified'] = http_date(st.st_mtime)
+    response['Cache-Control'] = cache_control
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _media_response(request, fullpath, st, tag):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    byte_range = None
+    # If-Range с другим ETag: файл изменился, отдаём целиком
+    if request.headers.get('If-Range', tag) == tag:
+        try:
+            byte_range = mediaserve.parse_range(request.headers.get('Range'), st.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{st.st_size}'
+            return response
+
+    start, end = byte_range or (0, st.st_size - 1)
+    length = end - start + 1 if st.st_size else 0
+    status = 206 if byte_range else 200
+
+    if request.method == 'HEAD':
+        response = HttpResponse(status=status, content_type=content_type)
+    else:
+        f = open(fullpath, 'rb')
+        if byte_range:
+            f.seek(start)
+            response = FileResponse(mediaserve.RangeFile(f, length), status=status, content_type=content_type)
+        else:
+            response = FileResponse(f, content_type=content_type)
+        # Без sendfile (runserver, uvicorn) читаем крупными блоками, а не по 4 КБ
+        response.block_size = settings.MEDIA_BLOCK_SIZE
+    response['Content-Length'] = length
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{st.st_size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
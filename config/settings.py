@@ -50,9 +50,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'blog.middleware.StaticFilesMiddleware',  # WhiteNoise, работающий и под ASGI
+    'blog.middleware.PreloadHintsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'blog.middleware.HTMLMinifyMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -79,6 +81,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# wsgi — gunicorn с синхронными воркерами, asgi — gunicorn с воркерами uvicorn (start.sh).
+# Под asgi лента, статья и поиск собираются асинхронными (blog/views.py, ServerInterfaceMixin)
+SERVER_INTERFACE = os.getenv('SERVER_INTERFACE', 'wsgi')
 
 # ==================== БАЗА ДАННЫХ ====================
 
@@ -92,7 +99,9 @@ if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600,
+            # Под ASGI у каждого запроса свой поток и соединения не переиспользуются:
+            # Django советует отключить постоянные соединения (пул — на стороне pgbouncer)
+            conn_max_age=0 if SERVER_INTERFACE == 'asgi' else 600,
             conn_health_checks=True,
         )
     }
@@ -136,6 +145,39 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 WHITENOISE_MANIFEST_STRICT = False
 WHITENOISE_USE_FINDERS = True
 
+# CSS собирает standalone-бинарник Tailwind, Node не нужен (manage.py build_css)
+TAILWIND_VERSION = '3.4.1'
+TAILWIND_RELEASE_URL = f'https://github.com/tailwindlabs/tailwindcss/releases/download/v{TAILWIND_VERSION}'
+# sha256 бинарников по именам файлов релиза; без значения — сверка с sha256sums.txt релиза
+TAILWIND_CLI_SHA256 = {}
+TAILWIND_CLI = os.getenv('TAILWIND_CLI', '')  # уже установленный бинарник вместо скачивания
+TAILWIND_CLI_DIR = BASE_DIR / 'bin'
+TAILWIND_CONFIG = BASE_DIR / 'tailwind' / 'tailwind.config.js'
+TAILWIND_INPUT = BASE_DIR / 'tailwind' / 'input.css'
+CSS_CONTENT_DIRS = [BASE_DIR / 'templates']
+CSS_OUTPUT_DIR = BASE_DIR / 'static' / 'css'
+
+# Сторонние ресурсы в static/vendor (manage.py vendor_assets). sha256 закрепляет
+# содержимое; пока он пуст, файл сверяется с хэшем из checksums (список jsDelivr
+# для этой версии пакета), а команда выводит хэш для закрепления
+INTER_VERSION = '5.0.16'
+INTER_PACKAGE = f'@fontsource-variable/inter@{INTER_VERSION}'
+INTER_BASE_URL = f'https://cdn.jsdelivr.net/npm/{INTER_PACKAGE}/files'
+INTER_CHECKSUMS_URL = f'https://data.jsdelivr.com/v1/packages/npm/{INTER_PACKAGE}?structure=flat'
+VENDOR_ASSETS = [
+    {
+        'path': f'vendor/inter/inter-{subset}-wght-normal.woff2',
+        'url': f'{INTER_BASE_URL}/inter-{subset}-wght-normal.woff2',
+        'sha256': '',
+        'checksums': INTER_CHECKSUMS_URL,
+        'checksum_name': f'/files/inter-{subset}-wght-normal.woff2',
+        'font': {'family': 'Inter', 'weight': '100 900', 'subset': subset},
+    }
+    for subset in ('latin', 'cyrillic')
+]
+VENDOR_FONT_CSS = 'vendor/inter/inter.css'
+VENDOR_TIMEOUT = 30
+
 # ==================== CLOUDINARY НАСТРОЙКИ ====================
 
 # Если есть Cloudinary ключи, используем Cloudinary, иначе локальное хранилище
@@ -154,7 +196,8 @@ if all([CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET]):
         api_secret=CLOUDINARY_API_SECRET
     )
     
-    DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+    DEFAULT_FILE_STORAGE = 'blog.storage.CloudinaryMediaStorage'
+    SERVE_MEDIA = False
     
     print("=" * 50)
     print("✅ Используется Cloudinary для хранения изображений")
@@ -163,14 +206,162 @@ else:
     # Локальная разработка: стандартное хранилище файлов
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
+    DEFAULT_FILE_STORAGE = 'blog.storage.FileSystemMediaStorage'
+    # Отдавать /media/ самим приложением (blog.views.serve_media), а не только при DEBUG
+    SERVE_MEDIA = os.getenv('SERVE_MEDIA', 'True') == 'True'
     
     print("=" * 50)
     print("⚠️ Cloudinary не настроен, используем локальное хранилище файлов")
     print("ℹ️ Для продакшена добавьте переменные CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET")
     print("=" * 50)
 
+# Загрузки CKEditor идут через то же оптимизирующее хранилище
+CKEDITOR_5_FILE_STORAGE = DEFAULT_FILE_STORAGE
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ==================== КЭШ СТРАНИЦ ====================
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Готовые HTML-страницы: файловый кэш общий для всех воркеров gunicorn
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('PAGE_CACHE_DIR', str(BASE_DIR / 'cache' / 'pages')),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+# Redis (нужен пакет redis): общий для воркеров кэш с атомарным incr — буфер просмотров
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES['views'] = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+PAGE_CACHE = os.getenv('PAGE_CACHE', 'True') == 'True'
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '600'))
+
+# Минификация HTML (blog/htmlmin.py); админка и API не трогаются
+HTML_MINIFY = os.getenv('HTML_MINIFY', 'True') == 'True'
+HTML_MINIFY_EXCLUDE = ['/admin/', '/api/', '/ckeditor5/']
+
+# ==================== ПОДСКАЗКИ ЗАГРУЗКИ ====================
+
+# Заголовок Link и 103 Early Hints для HTML-страниц (blog/hints.py)
+PRELOAD_HINTS = os.getenv('PRELOAD_HINTS', 'True') == 'True'
+PRELOAD_EXCLUDE = ['/admin/', '/api/', '/ckeditor5/', '/media/', '/static/']
+
+# Манифест маршрутов: '*' — ресурсы каждой страницы, ключ — url name
+PRELOAD_ASSETS = {
+    '*': [
+        {'path': 'css/site.css', 'as': 'style'},
+        {'path': VENDOR_FONT_CSS, 'as': 'style'},
+        {'path': 'vendor/inter/inter-cyrillic-wght-normal.woff2', 'as': 'font', 'type': 'font/woff2', 'crossorigin': True},
+    ],
+    'blog:post_detail': [
+        {'path': 'css/pygments.css', 'as': 'style'},
+    ],
+}
+
+# Происхождения, с которыми стоит заранее установить соединение
+PRELOAD_PRECONNECT = [origin for origin in os.getenv('PRELOAD_PRECONNECT', '').split(',') if origin]
+if DEFAULT_FILE_STORAGE == 'blog.storage.CloudinaryMediaStorage':
+    PRELOAD_PRECONNECT.append('https://res.cloudinary.com')
+
+# Ключ environ, под которым сервер передаёт функцию отправки 103 Early Hints:
+# send([('Link', '...')]). Если её нет, остаётся только заголовок Link.
+EARLY_HINTS_ENVIRON_KEY = os.getenv('EARLY_HINTS_ENVIRON_KEY', 'wsgi.early_hints')
+
+# ==================== ОФЛАЙН-РЕЖИМ ====================
+
+# Сервис-воркер /sw.js и манифест веб-приложения (blog/pwa.py)
+SERVICE_WORKER = os.getenv('SERVICE_WORKER', str(not DEBUG)) == 'True'
+# Сколько последних статей доступно без сети
+SW_OFFLINE_POSTS = int(os.getenv('SW_OFFLINE_POSTS', '10'))
+SW_PRECACHE_STATIC = [
+    'css/site.css',
+    'css/pygments.css',
+    VENDOR_FONT_CSS,
+    *(asset['path'] for asset in VENDOR_ASSETS),
+    'icons/icon.svg',
+]
+SW_EXCLUDE = ['/admin/', '/api/', '/ckeditor5/', '/search/']
+
+PWA_NAME = 'CodeWithBrain'
+PWA_SHORT_NAME = 'CodeWithBrain'
+PWA_DESCRIPTION = 'Блог об ИИ, Python и современной веб-разработке'
+PWA_BACKGROUND_COLOR = '#030712'
+PWA_THEME_COLOR = '#111827'
+
+# ==================== СТАТИЧЕСКАЯ ВЕРСИЯ САЙТА ====================
+
+# manage.py build_static_site (blog/staticsite.py)
+STATIC_SITE_DIR = os.getenv('STATIC_SITE_DIR', str(BASE_DIR / 'site'))
+# Хост, от имени которого рендерятся страницы (должен проходить ALLOWED_HOSTS)
+STATIC_SITE_HOST = os.getenv('STATIC_SITE_HOST', 'localhost')
+
+# ==================== КАРТА САЙТА ====================
+
+# /sitemap.xml и его части (blog/sitemaps.py)
+SITEMAP_CHUNK_SIZE = 50000      # адресов в одной части, максимум протокола
+SITEMAP_BATCH_SIZE = 2000       # строк на один keyset-запрос
+SITEMAP_CACHE_TIMEOUT = 24 * 3600
+SITEMAP_MAX_AGE = 3600
+ROBOTS_DISALLOW = ['/admin/', '/api/', '/ckeditor5/', '/search/']
+
+# ==================== ЛЕНТЫ ====================
+
+# RSS, Atom и JSON Feed (blog/feeds.py); тело кэшируется в PAGE_CACHE_ALIAS
+FEED_ITEMS = 20
+FEED_MAX_AGE = 900
+
+# ==================== ФОНОВЫЕ ЗАДАЧИ ====================
+
+# Очередь на основной БД (blog/taskqueue.py), воркер — manage.py run_worker
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'False') == 'True'  # выполнять сразу, без воркера
+TASK_POLL_INTERVAL = 1.0            # пауза воркера при пустой очереди, секунды
+TASK_MAINTENANCE_INTERVAL = 30      # как часто воркер планирует периодические и ищет зависшие
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10               # первая пауза перед повтором, дальше удваивается
+TASK_RETRY_MAX_DELAY = 3600
+TASK_LOCK_TIMEOUT = 600             # дольше в работе — воркер считается погибшим
+TASK_RETENTION_DAYS = 7
+
+# Просмотры копятся в кэше и пишутся в БД раз в N секунд (0 — сразу, blog/viewcount.py)
+VIEWS_FLUSH_INTERVAL = int(os.getenv('VIEWS_FLUSH_INTERVAL', '60'))
+# Кэш буфера: только Redis или Memcached (атомарный incr); без него — UPDATE на просмотр
+VIEWS_CACHE_ALIAS = os.getenv('VIEWS_CACHE_ALIAS', 'views' if REDIS_URL else '')
+
+# Хост, для которого ленты собираются в кэш заранее после изменений (пусто — не собирать)
+FEED_WARM_HOST = os.getenv('FEED_WARM_HOST', '')
+
+TASK_SCHEDULE = {
+    'flush-views': {'task': 'blog.flush_views', 'every': VIEWS_FLUSH_INTERVAL or 60},
+    'prune-tasks': {'task': 'blog.prune_tasks', 'every': 24 * 3600},
+    # Запись события сама ставит доставку; по расписанию — повторы после ошибок
+    'dispatch-outbox': {'task': 'blog.dispatch_outbox', 'every': 30},
+    'prune-outbox': {'task': 'blog.prune_outbox', 'every': 24 * 3600},
+}
+
+# ==================== ИСХОДЯЩИЕ СОБЫТИЯ ====================
+
+# События публикации статей и одобрения комментариев (blog/outbox.py)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 10            # паузы между попытками — как у задач (TASK_RETRY_*)
+OUTBOX_LEASE = 300                  # на столько секунд диспетчер берёт пачку
+OUTBOX_WEBHOOK_TIMEOUT = 10
+OUTBOX_RETENTION_DAYS = 30
+
+# Вебхуки: {'name', 'url', 'secret' (подпись HMAC-SHA256), 'events' (['*'] — все)}
+OUTBOX_WEBHOOKS = [
+    {
+        'name': 'default',
+        'url': os.getenv('OUTBOX_WEBHOOK_URL'),
+        'secret': os.getenv('OUTBOX_WEBHOOK_SECRET', ''),
+        'events': ['*'],
+    },
+] if os.getenv('OUTBOX_WEBHOOK_URL') else []
+
 # ==================== REST FRAMEWORK ====================
 
 REST_FRAMEWORK = {
@@ -210,6 +401,65 @@ if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
     SECURE_CONTENT_TYPE_NOSNIFF = True
 
+# ==================== АУДИТ ====================
+
+# Записи аудита копятся в буфере и пишутся в базу пачками
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '100'))
+# Период сброса буфера фоновым потоком, секунды (0 — без фонового потока)
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '2'))
+# Предел буфера, пока база недоступна: старые записи сверх него теряются
+AUDIT_MAX_PENDING = int(os.getenv('AUDIT_MAX_PENDING', '10000'))
+
+# Очистка старых записей командой prune
+PRUNE_RETENTION_DAYS = int(os.getenv('PRUNE_RETENTION_DAYS', '180'))
+PRUNE_BATCH_SIZE = 1000
+PRUNE_SLEEP = 0.1
+
+# ==================== ИЗОБРАЖЕНИЯ ====================
+
+# Ширины уменьшенных копий обложек (WebP + JPEG), см. blog/images.py
+IMAGE_VARIANT_WIDTHS = [320, 640, 960, 1280]
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', '80'))
+
+# Оптимизация загружаемых изображений в хранилище (blog/storage.py)
+MEDIA_OPTIMIZE = os.getenv('MEDIA_OPTIMIZE', 'True') == 'True'
+MEDIA_MAX_DIMENSION = int(os.getenv('MEDIA_MAX_DIMENSION', '2560'))
+MEDIA_OPTIMIZE_QUALITY = 85
+MEDIA_OPTIMIZE_MIN_SAVING = 0.05
+MEDIA_OPTIMIZE_SPOOL_SIZE = 5 * 1024 * 1024
+
+# Медиа без хэша в имени кэшируются с ревалидацией по ETag
+MEDIA_CACHE_MAX_AGE = 24 * 3600
+MEDIA_BLOCK_SIZE = 256 * 1024
+
+# Дедупликация загрузок по SHA-256: файл сохраняется как <каталог>/<sha256>.<ext>
+MEDIA_DEDUP = os.getenv('MEDIA_DEDUP', 'True') == 'True'
+MEDIA_GC_GRACE_HOURS = 24
+FILE_UPLOAD_HANDLERS = [
+    'blog.storage.HashingMemoryFileUploadHandler',
+    'blog.storage.HashingTemporaryFileUploadHandler',
+]
+
+# Прокси для внешних обложек (featured_image_url): дисковый LRU-кэш
+IMAGE_PROXY_ENABLED = os.getenv('IMAGE_PROXY_ENABLED', 'True') == 'True'
+IMAGE_PROXY_CACHE_DIR = os.getenv('IMAGE_PROXY_CACHE_DIR', str(BASE_DIR / 'cache' / 'imageproxy'))
+IMAGE_PROXY_CACHE_SIZE = int(os.getenv('IMAGE_PROXY_CACHE_SIZE', str(256 * 1024 * 1024)))
+IMAGE_PROXY_MAX_SOURCE_BYTES = 20 * 1024 * 1024
+IMAGE_PROXY_TIMEOUT = 10
+IMAGE_PROXY_MAX_AGE = 30 * 24 * 3600
+
+# Миниатюры медиафайлов по запросу: /img/<подпись>/<w>x<h>/<путь>
+THUMBNAIL_CACHE_DIR = os.getenv('THUMBNAIL_CACHE_DIR', str(BASE_DIR / 'cache' / 'thumbnails'))
+THUMBNAIL_CACHE_SIZE = int(os.getenv('THUMBNAIL_CACHE_SIZE', str(512 * 1024 * 1024)))
+THUMBNAIL_MAX_DIMENSION = 2560
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600
+
+# ==================== ЗАМЕРЫ ПРОИЗВОДИТЕЛЬНОСТИ ====================
+
+# История прогонов benchmark --history, с которой сравнивает perfcheck
+PERF_HISTORY_FILE = os.getenv('PERF_HISTORY_FILE', str(BASE_DIR / 'perf' / 'history.jsonl'))
+PERFCHECK_ROUTES = ['post_list', 'post_detail', 'search', 'api_post_list']
+
 # ==================== ЛОГИРОВАНИЕ ====================
 
 LOGGING = {
@@ -1,9 +1,10 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
 from blog.api import PostViewSet, CategoryViewSet
+from blog.views import image_proxy, robots_txt, serve_media, sitemap, thumbnail
 
 
 router = DefaultRouter()
@@ -13,9 +14,17 @@ router.register('categories', CategoryViewSet)
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    path('img-proxy/<str:token>/', image_proxy, name='image_proxy'),
+    path('img/<str:sig>/<int:width>x<int:height>/<path:path>', thumbnail, name='thumbnail'),
+    path('sitemap.xml', sitemap, name='sitemap_index'),
+    path('sitemap-<slug:section>-<int:number>.xml', sitemap, name='sitemap_section'),
+    path('robots.txt', robots_txt, name='robots_txt'),
     path('', include('blog.urls')),
     path('ckeditor5/', include('django_ckeditor_5.urls')),
 ]
 
-if settings.DEBUG:
+if settings.SERVE_MEDIA:
+    # Локальное хранилище без nginx: медиа отдаёт приложение (sendfile, Range, ETag)
+    urlpatterns.insert(0, re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media))
+elif settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -30,5 +30,16 @@ else:
     print('⏭️ Создание суперпользователя пропущено')
 "
 
+# Воркер фоновых задач в том же контейнере; при отдельном сервисе — RUN_WORKER=false
+if [ "${RUN_WORKER:-true}" = "true" ]; then
+    echo "Starting task worker..."
+    python manage.py run_worker &
+fi
+
+if [ "${SERVER_INTERFACE:-wsgi}" = "asgi" ]; then
+    echo "Starting Gunicorn with uvicorn workers (ASGI)..."
+    exec gunicorn --bind 0.0.0.0:${PORT:-8000} -k uvicorn.workers.UvicornWorker config.asgi:application
+fi
+
 echo "Starting Gunicorn..."
-exec gunicorn --bind 0.0.0.0:8000 config.wsgi:application
+exec gunicorn --bind 0.0.0.0:${PORT:-8000} config.wsgi:application
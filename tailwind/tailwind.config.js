@@ -0,0 +1,21 @@
+/**
+ * Конфигурация standalone CLI Tailwind (manage.py build_css).
+ * Файлы для поиска классов команда передаёт через --content.
+ */
+module.exports = {
+  content: ['../templates/**/*.html'],
+  theme: {
+    extend: {
+      typography: ({ theme }) => ({
+        // prose-purple: ссылки в статьях цвета акцента
+        purple: {
+          css: {
+            '--tw-prose-links': theme('colors.purple.600'),
+            '--tw-prose-invert-links': theme('colors.purple.400'),
+          },
+        },
+      }),
+    },
+  },
+  plugins: [require('@tailwindcss/typography')],
+};
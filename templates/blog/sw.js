@@ -0,0 +1,100 @@
+{% autoescape off %}// Сервис-воркер CodeWithBrain, версия {{ version }} (собирается blog/pwa.py)
+const VERSION = '{{ version }}';
+const PRECACHE = `cwb-precache-${VERSION}`;
+const PAGES = `cwb-pages-${VERSION}`;
+const PRECACHE_URLS = {{ precache }};
+const OFFLINE_URL = {{ offline_url }};
+const STATIC_URL = {{ static_url }};
+const POST_PREFIX = {{ post_prefix }};
+const EXCLUDE = {{ exclude }};
+const MAX_PAGES = {{ max_pages }};
+const PRECACHE_HEADER = {{ precache_header }};
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(PRECACHE)
+            .then((cache) => cache.addAll(
+                PRECACHE_URLS.map((url) => new Request(url, { headers: { [PRECACHE_HEADER]: '1' } }))
+            ))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    // Кэши прежних версий больше не нужны
+    event.waitUntil(
+        caches.keys()
+            .then((keys) => Promise.all(
+                keys.filter((key) => key.startsWith('cwb-') && key !== PRECACHE && key !== PAGES)
+                    .map((key) => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+async function trim(cache, max) {
+    const keys = await cache.keys();
+    await Promise.all(keys.slice(0, Math.max(0, keys.length - max)).map((key) => cache.delete(key)));
+}
+
+async function offline() {
+    return (await caches.match(OFFLINE_URL)) || Response.error();
+}
+
+// Статика с хэшем в имени не меняется: сначала кэш
+async function cacheFirst(request) {
+    const cached = await caches.match(request);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok) {
+        const cache = await caches.open(PRECACHE);
+        await cache.put(request, response.clone());
+    }
+    return response;
+}
+
+// Статья: сразу из кэша, в фоне — свежая версия для следующего раза
+async function staleWhileRevalidate(event) {
+    const request = event.request;
+    const cached = await caches.match(request);
+    const network = fetch(request).then(async (response) => {
+        if (response.ok) {
+            const cache = await caches.open(PAGES);
+            await cache.put(request, response.clone());
+            await trim(cache, MAX_PAGES);
+        }
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => null));
+        return cached;
+    }
+    return network.catch(offline);
+}
+
+async function networkFirst(request) {
+    try {
+        return await fetch(request);
+    } catch (error) {
+        return (await caches.match(request)) || offline();
+    }
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== self.location.origin
+        || EXCLUDE.some((prefix) => url.pathname.startsWith(prefix))) {
+        return;
+    }
+    if (url.pathname.startsWith(STATIC_URL)) {
+        event.respondWith(cacheFirst(request));
+    } else if (request.mode === 'navigate') {
+        event.respondWith(
+            url.pathname.startsWith(POST_PREFIX) ? staleWhileRevalidate(event) : networkFirst(request)
+        );
+    }
+});
+{% endautoescape %}
@@ -0,0 +1,28 @@
+"""
+URL-схема сайта с представлениями блога, собранными как под ASGI
+(SERVER_INTERFACE = 'asgi'): as_view() выбирает реализацию при импорте
+blog/urls.py, поэтому модуль исполняется заново под этой настройкой.
+"""
+import importlib.util
+
+from django.test import override_settings
+from django.urls import include, path
+
+import blog.urls
+from config import urls as site_urls
+
+
+def _load(name):
+    spec = importlib.util.find_spec(name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+with override_settings(SERVER_INTERFACE='asgi'):
+    blog_urls = _load('blog.urls')
+
+urlpatterns = [
+    path('', include(blog_urls)) if getattr(pattern, 'urlconf_module', None) is blog.urls else pattern
+    for pattern in site_urls.urlpatterns
+]
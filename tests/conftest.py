@@ -22,6 +22,28 @@ def pytest_configure():
     import django
     django.setup()
 
+    # В тестах буфер аудита сбрасывается синхронно, без фонового потока
+    settings.AUDIT_FLUSH_INTERVAL = 0
+    # Кэш страниц включается только в своих тестах (tests/test_pagecache.py)
+    settings.PAGE_CACHE = False
+    settings.PAGE_CACHE_ALIAS = 'default'
+    # Фоновые задачи выполняются сразу, а просмотры пишутся в БД без буфера
+    # (очередь и буфер проверяются в tests/test_tasks.py)
+    settings.TASKS_EAGER = True
+    settings.VIEWS_FLUSH_INTERVAL = 0
+    settings.VIEWS_CACHE_ALIAS = 'default'
+
+
+@pytest.fixture(autouse=True)
+def reset_audit_buffer():
+    """
+    Буфер аудита общий для процесса: записи, оставшиеся от предыдущих тестов,
+    сбрасывались бы в чужом запросе и меняли число SQL-запросов в нём
+    """
+    from blog import audit
+    audit.writer.reset()
+    yield
+
 
 @pytest.fixture(scope='session')
 def django_db_setup(django_db_setup, django_db_blocker):
@@ -0,0 +1,141 @@
+"""
+Тесты ASGI и асинхронных представлений чтения
+"""
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import resolve
+
+from blog.middleware import HTMLMinifyMiddleware, PreloadHintsMiddleware, StaticFilesMiddleware
+from blog.models import Category, Post
+from blog.views import PostDetailView, SearchView
+
+
+@override_settings(ROOT_URLCONF='tests.asgi_urls')
+class AsyncViewsTestCase(TestCase):
+    """Лента, статья и поиск под AsyncClient (представления собраны для ASGI)"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='author', password='pass')
+        self.category = Category.objects.create(name='Python', slug='python')
+        self.posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                title=f'Статья {i}', slug=f'post-{i}', author=user, content=f'<p>Текст {i}</p>',
+                category=self.category, status='published',
+            )
+            post.tags.add('django')
+            self.posts.append(post)
+
+    def test_views_are_async(self):
+        for url in ('/', '/page/2/', '/post/post-0/', '/search/'):
+            with self.subTest(url=url):
+                self.assertTrue(iscoroutinefunction(resolve(url).func))
+
+    def test_asgi_application(self):
+        from config.asgi import application
+        self.assertTrue(callable(application))
+
+    async def test_post_list(self):
+        response = await self.async_client.get('/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Статья 11')
+        self.assertEqual(len(response.context['posts']), 10)
+        self.assertTrue(response.context['is_paginated'])
+
+        response = await self.async_client.get('/page/2/', secure=True)
+        self.assertEqual([post.slug for post in response.context['posts']], ['post-1', 'post-0'])
+        self.assertEqual((await self.async_client.get('/page/9/', secure=True)).status_code, 404)
+
+    async def test_post_detail(self):
+        response = await self.async_client.get('/post/post-5/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Статья 5')
+        self.assertContains(response, '#django')
+        self.assertEqual(len(response.context['related_posts']), 3)
+        self.assertNotIn(self.posts[5], response.context['related_posts'])
+        post = await Post.objects.aget(slug='post-5')
+        self.assertEqual(post.views, 1)
+        self.assertEqual(response.context['post'].views, 1)
+
+        self.assertEqual((await self.async_client.get('/post/missing/', secure=True)).status_code, 404)
+
+    async def test_search(self):
+        response = await self.async_client.get('/search/', {'q': 'Текст 3'}, secure=True)
+        self.assertEqual([post.slug for post in response.context['posts']], ['post-3'])
+        response = await self.async_client.get('/search/', secure=True)
+        self.assertEqual(list(response.context['posts']), [])
+
+    def test_sync_client(self):
+        """Асинхронные представления работают и через адаптер Django"""
+        self.client.get('/post/post-1/', secure=True)  # первый запрос сбрасывает буфер аудита
+        with self.assertNumQueries(4):  # статья, +1 просмотр, теги, похожие статьи
+            response = self.client.get('/post/post-0/', secure=True)
+        self.assertContains(response, 'Статья 0')
+
+    @override_settings(PAGE_CACHE=True)
+    async def test_page_cache(self):
+        await cache.aclear()
+        first = await self.async_client.get('/post/post-1/', secure=True)
+        second = await self.async_client.get('/post/post-1/', secure=True)
+        self.assertEqual((first['X-Page-Cache'], second['X-Page-Cache']), ('miss', 'hit'))
+        self.assertEqual(first.content, second.content)
+        # Попадание в кэш тоже считается просмотром
+        self.assertEqual((await Post.objects.aget(slug='post-1')).views, 2)
+
+
+class WSGIViewsTestCase(TestCase):
+    """Под WSGI (по умолчанию) представления синхронные, без async_to_sync на запрос"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='author', password='pass')
+        category = Category.objects.create(name='Python', slug='python')
+        for i in range(12):
+            Post.objects.create(
+                title=f'Статья {i}', slug=f'post-{i}', author=user, content=f'<p>Текст {i}</p>',
+                category=category, status='published',
+            )
+
+    def test_views_are_sync(self):
+        for url in ('/', '/page/2/', '/post/post-0/', '/search/'):
+            with self.subTest(url=url):
+                self.assertFalse(iscoroutinefunction(resolve(url).func))
+
+    def test_interface_chosen_in_as_view(self):
+        self.assertFalse(iscoroutinefunction(PostDetailView.as_view()))
+        with self.settings(SERVER_INTERFACE='asgi'):
+            self.assertTrue(iscoroutinefunction(PostDetailView.as_view()))
+            self.assertTrue(iscoroutinefunction(SearchView.as_view()))
+
+    def test_same_pages(self):
+        response = self.client.get('/page/2/', secure=True)
+        self.assertEqual([post.slug for post in response.context['posts']], ['post-1', 'post-0'])
+        self.assertEqual(self.client.get('/page/9/', secure=True).status_code, 404)
+
+        self.client.get('/post/post-1/', secure=True)  # первый запрос сбрасывает буфер аудита
+        with self.assertNumQueries(4):  # статья, +1 просмотр, теги, похожие статьи
+            response = self.client.get('/post/post-5/', secure=True)
+        self.assertEqual(len(response.context['related_posts']), 3)
+        self.assertEqual(response.context['post'].views, 1)
+        self.assertEqual(self.client.get('/post/missing/', secure=True).status_code, 404)
+
+
+class AsyncMiddlewareTestCase(TestCase):
+    """Middleware блога не переводит ASGI-цепочку в синхронный режим"""
+
+    def test_async_capable(self):
+        async def get_response(request):
+            return None
+
+        for middleware in (StaticFilesMiddleware, HTMLMinifyMiddleware, PreloadHintsMiddleware):
+            with self.subTest(middleware=middleware.__name__):
+                self.assertTrue(middleware.async_capable)
+                self.assertTrue(iscoroutinefunction(middleware(get_response)))
+                self.assertFalse(iscoroutinefunction(middleware(lambda request: None)))
+
+    @override_settings(HTML_MINIFY=True, PRELOAD_HINTS=True)
+    async def test_response_processing(self):
+        response = await self.async_client.get('/offline/', secure=True)
+        self.assertNotIn(b'>\n    <', response.content)
+        self.assertIn('rel=preload', response['Link'].replace('"', ''))
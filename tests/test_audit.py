@@ -0,0 +1,194 @@
+"""
+Тесты журнала аудита и команды audit
+"""
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.contrib.admin.models import LogEntry, CHANGE
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blog.audit import AuditWriter, writer
+from blog.models import AuditRecord
+
+
+class TestAuditWriter(TestCase):
+    """Тесты буферизованного писателя"""
+
+    def setUp(self):
+        writer.flush()
+        AuditRecord.objects.all().delete()
+
+    @override_settings(AUDIT_BATCH_SIZE=3, AUDIT_FLUSH_INTERVAL=0)
+    def test_records_are_buffered_until_batch_is_full(self):
+        """Записи попадают в базу только пачкой"""
+        local_writer = AuditWriter()
+        local_writer.add('alice', 'LOGIN')
+        local_writer.add('alice', 'LOGOUT')
+        self.assertEqual(AuditRecord.objects.count(), 0)
+        self.assertEqual(local_writer.pending(), 2)
+
+        local_writer.add('alice', 'LOGIN')
+        self.assertEqual(AuditRecord.objects.count(), 3)
+        self.assertEqual(local_writer.pending(), 0)
+
+    @override_settings(AUDIT_FLUSH_INTERVAL=0)
+    def test_flush_uses_single_query(self):
+        """Сброс буфера выполняется одним INSERT"""
+        local_writer = AuditWriter()
+        for i in range(20):
+            local_writer.add(f'user{i}', 'CHANGE', model='post', object_id=i)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(local_writer.flush(), 20)
+
+    @override_settings(AUDIT_FLUSH_INTERVAL=0)
+    def test_reset_drops_buffer(self):
+        """reset() очищает буфер без записи в базу"""
+        local_writer = AuditWriter()
+        local_writer.add('alice', 'LOGIN')
+        self.assertEqual(local_writer.reset(), 1)
+        self.assertEqual(local_writer.pending(), 0)
+        self.assertEqual(local_writer.flush(), 0)
+        self.assertFalse(AuditRecord.objects.exists())
+
+    @override_settings(AUDIT_FLUSH_INTERVAL=0, AUDIT_MAX_PENDING=3)
+    def test_failed_batch_is_retried(self):
+        """Пачка, которую не удалось записать, остаётся в буфере (не больше предела)"""
+        local_writer = AuditWriter()
+        for i in range(2):
+            local_writer.add(f'user{i}', 'LOGIN')
+        with patch.object(AuditRecord.objects, 'bulk_create', side_effect=RuntimeError('нет базы')):
+            with self.assertLogs('blog.audit', 'ERROR'):
+                self.assertEqual(local_writer.flush(), 0)
+        self.assertEqual(local_writer.pending(), 2)
+
+        local_writer.add('user2', 'LOGIN')
+        local_writer.add('user3', 'LOGIN')
+        with patch.object(AuditRecord.objects, 'bulk_create', side_effect=RuntimeError('нет базы')):
+            with self.assertLogs('blog.audit', 'ERROR') as logs:
+                local_writer.flush()
+        self.assertIn('потеряно записей: 1', logs.output[-1])
+
+        self.assertEqual(local_writer.flush(), 3)
+        self.assertEqual(
+            list(AuditRecord.objects.order_by('id').values_list('username', flat=True)),
+            ['user1', 'user2', 'user3'],
+        )
+
+    def test_values_are_truncated(self):
+        """Длинные значения обрезаются до размеров полей"""
+        local_writer = AuditWriter()
+        local_writer.add('u' * 300, 'CHANGE', details='d' * 1000)
+        local_writer.flush()
+
+        record = AuditRecord.objects.get()
+        self.assertEqual(len(record.username), 150)
+        self.assertEqual(len(record.details), 255)
+
+    def test_records_are_append_only(self):
+        """Сохранённую запись нельзя изменить"""
+        record = AuditRecord.objects.create(username='alice', action='LOGIN')
+        record.action = 'LOGOUT'
+        with self.assertRaises(ValueError):
+            record.save()
+
+
+class TestAuditSignals(TestCase):
+    """Сигналы пишут в журнал аудита через буфер"""
+
+    def setUp(self):
+        writer.flush()
+        self.user = User.objects.create_user(username='editor', password='pass12345')
+        self.request = Mock()
+        self.request.META = {'REMOTE_ADDR': '10.0.0.5'}
+
+    def test_login_is_recorded_with_ip(self):
+        user_logged_in.send(sender=self.__class__, request=self.request, user=self.user)
+        writer.flush()
+
+        record = AuditRecord.objects.get(username='editor', action='LOGIN')
+        self.assertEqual(record.ip, '10.0.0.5')
+        self.assertEqual(record.model, 'User')
+
+    def test_failed_login_is_recorded(self):
+        user_login_failed.send(
+            sender=self.__class__,
+            credentials={'username': 'intruder'},
+            request=self.request,
+        )
+        writer.flush()
+
+        self.assertTrue(
+            AuditRecord.objects.filter(username='intruder', action='LOGIN_FAILED').exists()
+        )
+
+    def test_admin_action_is_recorded(self):
+        LogEntry.objects.create(
+            user=self.user,
+            content_type=ContentType.objects.get_for_model(User),
+            object_id='42',
+            object_repr='Post',
+            action_flag=CHANGE,
+            change_message='Changed title',
+        )
+        writer.flush()
+
+        record = AuditRecord.objects.get(username='editor', action='CHANGE')
+        self.assertEqual(record.model, 'user')
+        self.assertEqual(record.object_id, '42')
+        self.assertEqual(record.details, 'Changed title')
+
+
+class TestAuditCommand(TestCase):
+    """Тесты команды audit"""
+
+    def setUp(self):
+        writer.flush()
+        AuditRecord.objects.all().delete()
+        now = timezone.now()
+        AuditRecord.objects.bulk_create([
+            AuditRecord(username='alice', action='CHANGE', model='post',
+                        object_id='1', created_at=now - timedelta(days=2)),
+            AuditRecord(username='alice', action='DELETION', model='post',
+                        object_id='2', created_at=now - timedelta(days=10)),
+            AuditRecord(username='bob', action='CHANGE', model='category',
+                        object_id='3', created_at=now - timedelta(hours=1)),
+        ])
+
+    def run_audit(self, *args):
+        out = StringIO()
+        call_command('audit', '--json', *args, stdout=out)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_filter_by_user(self):
+        rows = self.run_audit('--user', 'alice')
+        self.assertEqual({row['object_id'] for row in rows}, {'1', '2'})
+
+    def test_filter_by_action_and_model(self):
+        rows = self.run_audit('--action', 'change', '--model', 'post')
+        self.assertEqual([row['object_id'] for row in rows], ['1'])
+
+    def test_filter_by_relative_period(self):
+        rows = self.run_audit('--user', 'alice', '--since', '7d')
+        self.assertEqual([row['action'] for row in rows], ['CHANGE'])
+
+    def test_filter_by_dates(self):
+        today = timezone.localdate()
+        rows = self.run_audit(
+            '--since', str(today - timedelta(days=3)),
+            '--until', str(today - timedelta(days=1)),
+        )
+        self.assertEqual([row['object_id'] for row in rows], ['1'])
+
+    def test_text_output_and_limit(self):
+        out = StringIO()
+        call_command('audit', '--limit', '1', stdout=out)
+        self.assertIn('bob', out.getvalue())
+        self.assertIn('Найдено записей: 1', out.getvalue())
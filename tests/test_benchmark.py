@@ -0,0 +1,50 @@
+"""
+Тесты замеров скорости (pytest -m benchmark)
+"""
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import TestCase
+
+from blog.benchmark import percentile, run_benchmark, seed_dataset
+
+
+class TestPercentile(TestCase):
+    def test_percentile_interpolates(self):
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertAlmostEqual(percentile([10, 20], 95), 19.5)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+@pytest.mark.benchmark
+class TestBenchmark(TestCase):
+    """Прогон замеров на маленьком наборе данных"""
+
+    def setUp(self):
+        self.dataset = seed_dataset(posts=15, categories=2, tags=5)
+
+    def test_report_covers_hot_paths(self):
+        report = run_benchmark(iterations=2, warmup=0, dataset=self.dataset)
+
+        expected = {
+            'post_list', 'post_detail', 'category_posts', 'tag_posts',
+            'search', 'api_post_list', 'api_post_detail',
+        }
+        self.assertTrue(expected <= set(report['routes']))
+        for name, row in report['routes'].items():
+            self.assertEqual(row['status'], 200, name)
+            self.assertGreater(row['bytes'], 0, name)
+            self.assertGreater(row['queries'], 0, name)
+            self.assertLessEqual(row['median_ms'], row['p95_ms'] + 1e-9, name)
+        self.assertEqual(report['meta']['dataset']['posts'], 15)
+
+    def test_command_writes_json_report(self):
+        out = StringIO()
+        call_command(
+            'benchmark', '--existing-db', '--iterations', '1', '--warmup', '0',
+            '--route', 'post_list', stdout=out, stderr=StringIO(),
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(list(report['routes']), ['post_list'])
@@ -0,0 +1,142 @@
+"""
+Тесты сборки CSS standalone-бинарником Tailwind
+"""
+import hashlib
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import textwrap
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog import tailwind
+
+# Заменитель CLI: пишет в --output список файлов из --content
+FAKE_CLI = textwrap.dedent("""\
+    #!{python}
+    import sys
+    args = dict(zip(sys.argv[1::2], sys.argv[2::2]))
+    if 'fail' in args['--content']:
+        sys.exit('ошибка сборки')
+    names = sorted(path.rsplit('/templates/', 1)[-1] for path in args['--content'].split(','))
+    with open(args['--output'], 'w') as f:
+        f.write('/* ' + ' '.join(names) + ' */')
+""")
+
+
+class BuildCssCommandTestCase(TestCase):
+    """Команда build_css запускает CLI по всем шаблонам"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.output = Path(self.tmp) / 'css'
+        cli = Path(self.tmp) / 'tailwindcss'
+        cli.write_text(FAKE_CLI.format(python=sys.executable))
+        cli.chmod(cli.stat().st_mode | stat.S_IEXEC)
+        override = self.settings(TAILWIND_CLI=str(cli))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def build(self, *args):
+        call_command('build_css', '--output-dir', str(self.output), *args, stdout=StringIO())
+
+    def test_writes_site_css(self):
+        self.build()
+        self.assertEqual([path.name for path in self.output.iterdir()], ['site.css'])
+        css = (self.output / 'site.css').read_text()
+        self.assertIn('base.html', css)
+        self.assertIn('blog/post_detail.html', css)
+
+        self.build('--check')
+
+    def test_check_fails_when_stale(self):
+        with self.assertRaises(CommandError):
+            self.build('--check')
+        self.assertFalse(self.output.exists())
+
+    def test_cli_error(self):
+        with self.settings(CSS_CONTENT_DIRS=[self.tmp]):
+            (Path(self.tmp) / 'fail.html').write_text('<p class="flex"></p>')
+            with self.assertRaisesMessage(CommandError, 'ошибка сборки'):
+                self.build()
+
+
+class InstallTestCase(TestCase):
+    """Скачивание закреплённого бинарника с проверкой sha256"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        override = self.settings(TAILWIND_CLI='', TAILWIND_CLI_DIR=self.dir, TAILWIND_CLI_SHA256={})
+        override.enable()
+        self.addCleanup(override.disable)
+        platform_patch = mock.patch.object(tailwind, 'asset_name', return_value='tailwindcss-linux-x64')
+        platform_patch.start()
+        self.addCleanup(platform_patch.stop)
+
+    def fake_fetch(self, binary, sums):
+        def fetch(asset, source=None):
+            return sums if asset['path'] == 'sha256sums.txt' else binary
+        return mock.patch.object(tailwind.vendor, 'fetch', side_effect=fetch)
+
+    def test_verified_by_release_sums(self):
+        digest = hashlib.sha256(b'binary').hexdigest()
+        sums = f'{"0" * 64}  ./tailwindcss-macos-x64\n{digest}  ./tailwindcss-linux-x64\n'.encode()
+        with self.fake_fetch(b'binary', sums) as fetch:
+            path = tailwind.install()
+            self.assertEqual(path.read_bytes(), b'binary')
+            self.assertTrue(os.access(path, os.X_OK))
+            # Уже скачанный бинарник повторно не скачивается
+            self.assertEqual(tailwind.install(), path)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertTrue(path.name.endswith(settings.TAILWIND_VERSION))
+
+    def test_checksum_mismatch(self):
+        sums = f'{"0" * 64}  tailwindcss-linux-x64\n'.encode()
+        with self.fake_fetch(b'tampered', sums):
+            with self.assertRaises(tailwind.TailwindError):
+                tailwind.install()
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_pinned_hash_skips_sums(self):
+        pinned = {'tailwindcss-linux-x64': hashlib.sha256(b'binary').hexdigest()}
+        with self.settings(TAILWIND_CLI_SHA256=pinned), self.fake_fetch(b'binary', b'') as fetch:
+            tailwind.install()
+        self.assertEqual(fetch.call_count, 1)
+
+
+class AssetNameTestCase(TestCase):
+    """Имя файла релиза по платформе"""
+
+    def test_platforms(self):
+        with mock.patch('platform.system', return_value='Linux'), mock.patch('platform.machine', return_value='aarch64'):
+            self.assertEqual(tailwind.asset_name(), 'tailwindcss-linux-arm64')
+        with mock.patch('platform.system', return_value='Plan9'):
+            with self.assertRaises(tailwind.TailwindError):
+                tailwind.asset_name()
+
+
+class StaticTagsTestCase(TestCase):
+    """Тег static_url и подключение site.css"""
+
+    def test_static_url_without_manifest(self):
+        html = Template("{% load static_tags %}{% static_url 'css/site.css' %}").render(Context())
+        self.assertTrue(html.startswith(settings.STATIC_URL))
+        self.assertTrue(html.endswith('.css'))
+
+    @override_settings(DEBUG=False)
+    def test_base_template_has_no_runtime_compiler(self):
+        response = self.client.get(reverse('blog:post_list'), secure=True)
+        self.assertNotContains(response, 'cdn.tailwindcss.com')
+        self.assertContains(response, '<link rel="stylesheet" href="/static/css/site.css">', html=True)
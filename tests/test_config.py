@@ -89,7 +89,7 @@ class TestProjectConfiguration(TestCase):
         """Проверка middleware"""
         required_middleware = [
             'django.middleware.security.SecurityMiddleware',
-            'whitenoise.middleware.WhiteNoiseMiddleware',
+            'blog.middleware.StaticFilesMiddleware',
             'django.contrib.sessions.middleware.SessionMiddleware',
             'django.middleware.common.CommonMiddleware',
             'django.middleware.csrf.CsrfViewMiddleware',
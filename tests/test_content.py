@@ -0,0 +1,151 @@
+"""
+Тесты предварительной отрисовки содержимого статей
+"""
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from blog import content
+from blog.models import Post
+
+
+class SanitizeTestCase(TestCase):
+    """Очистка HTML из редактора"""
+
+    def render(self, source):
+        return content.render_content(source)[0]
+
+    def test_scripts_and_handlers_removed(self):
+        html = self.render('<p onclick="x()">Текст<script>alert(1)</script></p><style>p{}</style>')
+        self.assertEqual(html, '<p>Текст</p>')
+
+    def test_dangerous_urls_removed(self):
+        html = self.render('<a href="javascript:alert(1)">a</a><a href="https://example.com">b</a>')
+        self.assertNotIn('javascript', html)
+        self.assertIn('href="https://example.com"', html)
+        self.assertIn('rel="noopener nofollow"', html)
+
+    def test_unknown_tags_unwrapped(self):
+        self.assertEqual(self.render('<div><p>Текст</p></div>'), '<p>Текст</p>')
+
+    def test_text_escaped_and_tags_closed(self):
+        self.assertEqual(self.render('<p>&lt;b&gt; <strong>жирный'), '<p>&lt;b&gt; <strong>жирный</strong></p>')
+
+
+class HighlightTestCase(TestCase):
+    """Подсветка блоков кода"""
+
+    def test_code_block_highlighted(self):
+        html = content.render_content('<pre><code class="language-python">def f():\n    return 1</code></pre>')[0]
+        self.assertIn('<pre class="highlight"><code class="language-python">', html)
+        self.assertIn('<span class="k">def</span>', html)
+
+    def test_unknown_language_is_plain_text(self):
+        html = content.render_content('<pre><code class="language-nope">&lt;x&gt;</code></pre>')[0]
+        self.assertIn('&lt;x&gt;', html)
+        self.assertNotIn('<span class="k">', html)
+
+    def test_pygments_css(self):
+        self.assertIn('.highlight .k', content.pygments_css())
+
+
+class HeadingsTestCase(TestCase):
+    """Якоря заголовков и оглавление"""
+
+    def test_toc_and_unique_ids(self):
+        html, toc = content.render_content('<h2>Введение</h2><h3>Детали <em>важно</em></h3><h2>Введение</h2>')
+        self.assertEqual([item['id'] for item in toc], ['vvedenie', 'detali-vazhno', 'vvedenie-2'])
+        self.assertEqual([item['level'] for item in toc], [2, 3, 2])
+        self.assertEqual(toc[1]['title'], 'Детали важно')
+        self.assertIn('<h2 id="vvedenie">Введение<a class="heading-anchor" href="#vvedenie"', html)
+        self.assertIn('<h3 id="detali-vazhno">Детали <em>важно</em>', html)
+
+
+class ImagesTestCase(TestCase):
+    """Ленивая загрузка и размеры картинок"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def test_local_image_gets_dimensions(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30)).save(buffer, 'PNG')
+        with override_settings(MEDIA_ROOT=self.media_root):
+            name = default_storage.save('uploads/pic.png', ContentFile(buffer.getvalue()))
+            html = content.render_content(f'<img src="/media/{name}" alt="x">')[0]
+        self.assertIn('width="40"', html)
+        self.assertIn('height="30"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_external_image_only_lazy(self):
+        html = content.render_content('<img src="https://example.com/a.png" onerror="x()">')[0]
+        self.assertEqual(html, '<img src="https://example.com/a.png" loading="lazy" decoding="async">')
+
+
+class PostContentTestCase(TestCase):
+    """HTML строится при сохранении и выводится на странице статьи"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='contentauthor', password='pass')
+
+    def make_post(self, **kwargs):
+        defaults = dict(
+            title='Статья', author=self.user, excerpt='e', status='published',
+            content='<h2>Первый</h2><p>a</p><h2>Второй</h2><pre><code class="language-python">x = 1</code></pre>',
+        )
+        defaults.update(kwargs)
+        return Post.objects.create(**defaults)
+
+    def test_rendered_on_save(self):
+        post = self.make_post()
+        self.assertIn('<pre class="highlight">', post.content_html)
+        self.assertEqual(len(post.content_toc), 2)
+
+        post.content = '<p>Новое</p>'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, '<p>Новое</p>')
+        self.assertEqual(post.content_toc, [])
+
+    def test_reading_time_stored(self):
+        post = self.make_post(content='<p>' + 'слово ' * 450 + '</p>')
+        self.assertEqual(post.reading_time, 4)
+        post.content = '<p>Коротко</p>'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.reading_time, 2)
+
+        response = self.client.get(reverse('blog:post_detail', kwargs={'slug': post.slug}), secure=True)
+        self.assertContains(response, '2 мин')
+
+    def test_detail_page(self):
+        post = self.make_post()
+        response = self.client.get(reverse('blog:post_detail', kwargs={'slug': post.slug}), secure=True)
+        self.assertContains(response, 'aria-label="Оглавление"')
+        self.assertContains(response, 'href="#pervyi"')
+        self.assertContains(response, 'css/pygments.css')
+        self.assertNotContains(response, 'highlight.min.js')
+
+    def test_render_content_command(self):
+        post = self.make_post()
+        Post.objects.filter(pk=post.pk).update(content_html='', content_toc=[])
+        out = StringIO()
+        call_command('render_content', '--dry-run', stdout=out)
+        self.assertIn('Будет обновлено статей: 1', out.getvalue())
+        self.assertEqual(Post.objects.get(pk=post.pk).content_html, '')
+
+        call_command('render_content', stdout=StringIO())
+        self.assertIn('<pre class="highlight">', Post.objects.get(pk=post.pk).content_html)
+
+        Post.objects.filter(pk=post.pk).update(reading_time=99)
+        call_command('render_content', stdout=StringIO())
+        self.assertEqual(Post.objects.get(pk=post.pk).reading_time, 2)
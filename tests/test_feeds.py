@@ -0,0 +1,110 @@
+"""
+Тесты лент RSS, Atom и JSON Feed
+"""
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Category, Post
+
+
+@override_settings(PAGE_CACHE=True, FEED_ITEMS=3)
+class FeedTestCase(TestCase):
+    """Форматы, выборка статей и условные запросы"""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='author', password='pass', first_name='Анна')
+        self.python = Category.objects.create(name='Python', slug='python')
+        self.other = Category.objects.create(name='Другое', slug='other')
+        self.posts = []
+        for i in range(5):
+            post = Post.objects.create(
+                title=f'Статья {i}', slug=f'post-{i}', author=user,
+                content=f'<p>Полный текст {i}</p>', excerpt=f'Кратко о статье {i}',
+                category=self.python if i % 2 else self.other, status='published',
+            )
+            post.tags.add('django')
+            self.posts.append(post)
+        Post.objects.create(title='Черновик', slug='draft', author=user, content='x', excerpt='x', status='draft')
+
+    def get(self, url, **headers):
+        return self.client.get(url, secure=True, headers=headers)
+
+    def test_formats(self):
+        rss = self.get('/feed.xml')
+        self.assertEqual(rss['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertIn('<rss', rss.content.decode())
+        atom = self.get('/feed.atom')
+        self.assertEqual(atom['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertIn('xmlns="http://www.w3.org/2005/Atom"', atom.content.decode())
+
+        data = json.loads(self.get('/feed.json').content)
+        self.assertEqual(data['version'], 'https://jsonfeed.org/version/1.1')
+        self.assertEqual(data['feed_url'], 'https://testserver/feed.json')
+        item = data['items'][0]
+        self.assertEqual(item['url'], 'https://testserver/post/post-4/')
+        self.assertEqual(item['summary'], 'Кратко о статье 4')
+        self.assertEqual(item['authors'], [{'name': 'Анна'}])
+        self.assertEqual(item['tags'], ['django'])
+
+        self.assertEqual(self.get('/feed.txt').status_code, 404)
+
+    def test_items(self):
+        data = json.loads(self.get('/feed.json').content)
+        # Последние FEED_ITEMS опубликованных, без черновиков
+        self.assertEqual([item['title'] for item in data['items']], ['Статья 4', 'Статья 3', 'Статья 2'])
+
+        data = json.loads(self.get('/category/python/feed.json').content)
+        self.assertEqual([item['title'] for item in data['items']], ['Статья 3', 'Статья 1'])
+        data = json.loads(self.get('/tag/django/feed.json').content)
+        self.assertEqual(len(data['items']), 3)
+        self.assertEqual(self.get('/category/missing/feed.xml').status_code, 404)
+        self.assertEqual(self.get('/tag/missing/feed.xml').status_code, 404)
+
+    def test_excerpt_without_content(self):
+        """В ленте — excerpt, сам текст статьи из БД не читается"""
+        with CaptureQueriesContext(connection) as queries:
+            content = self.get('/feed.xml').content.decode()
+        self.assertIn('Кратко о статье 4', content)
+        self.assertNotIn('Полный текст', content)
+        post_queries = [query['sql'] for query in queries if 'FROM "blog_post"' in query['sql']]
+        self.assertTrue(post_queries)
+        self.assertFalse([sql for sql in post_queries if '"blog_post"."content_html"' in sql])
+
+    def test_conditional_get(self):
+        response = self.get('/feed.xml')
+        tag = response['ETag']
+        self.assertTrue(response['Last-Modified'])
+        self.assertIn('public', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get('/feed.xml', if_none_match=tag).status_code, 304)
+            not_modified = self.get('/feed.xml', if_modified_since=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], tag)
+
+        # Комментарий ленту не меняет — снова 304
+        self.posts[0].comments.create(author_name='Читатель', author_email='r@example.com', content='Спасибо')
+        self.assertEqual(self.get('/feed.xml', if_none_match=tag).status_code, 304)
+
+        # Кэш после публикации сбрасывает обработчик события, после фиксации
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(
+                title='Новая', slug='new', author=self.posts[0].author, content='x', excerpt='Новое',
+                status='published',
+            )
+        response = self.get('/feed.xml', if_none_match=tag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], tag)
+        self.assertIn('Новая', response.content.decode())
+
+    def test_alternate_links(self):
+        content = self.get('/category/python/').content.decode()
+        self.assertIn('href="/category/python/feed.xml"', content)
+        self.assertIn('href="/feed.atom"', content)
+        self.assertIn('href="/tag/django/feed.json"', self.get('/tag/django/').content.decode())
@@ -0,0 +1,147 @@
+"""
+Тесты кэширующего прокси внешних обложек
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from blog import imageproxy
+
+
+def png_bytes(width=1600, height=900):
+    buffer = BytesIO()
+    Image.new('RGBA', (width, height), (10, 200, 90, 255)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Заменитель удалённого хоста: /cover.png — картинка, остальное — 404"""
+    hits = []
+    body = png_bytes()
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.path == '/cover.png':
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(self.body)))
+            self.end_headers()
+            self.wfile.write(self.body)
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageProxyTestCase(TestCase):
+    """Прокси скачивает оригинал один раз и отдаёт уменьшенную копию из кэша"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.origin = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StandInHandler.hits.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        override = override_settings(IMAGE_PROXY_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_fetches_once_and_resizes(self):
+        """Первый запрос идёт на источник, последующие — из кэша"""
+        url = imageproxy.proxy_url(f'{self.origin}/cover.png', 640)
+        response = self.client.get(url, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertEqual(Image.open(BytesIO(response.content)).size, (640, 360))
+
+        again = self.client.get(url, secure=True)
+        self.assertEqual(again.content, response.content)
+        self.assertEqual(StandInHandler.hits, ['/cover.png'])
+
+    def test_conditional_get(self):
+        """Совпадающий If-None-Match даёт 304 без тела"""
+        url = imageproxy.proxy_url(f'{self.origin}/cover.png', 320)
+        etag = self.client.get(url, secure=True)['ETag']
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_tampered_token(self):
+        """Подделанный токен — 404, на источник не ходим"""
+        url = imageproxy.proxy_url(f'{self.origin}/cover.png', 320)
+        response = self.client.get(url.replace('/img-proxy/', '/img-proxy/x'), secure=True)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(StandInHandler.hits, [])
+
+    def test_unavailable_source_redirects(self):
+        """Если источник недоступен, браузер уходит на оригинал"""
+        source = f'{self.origin}/missing.png'
+        response = self.client.get(imageproxy.proxy_url(source, 320), secure=True)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], source)
+        self.assertEqual(imageproxy.get_cache().size(), 0)
+
+
+class DiskLRUCacheTestCase(TestCase):
+    """Вытеснение давно не читанных записей при переполнении"""
+
+    def test_evicts_least_recently_used(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        cache = imageproxy.DiskLRUCache(directory, max_bytes=250)
+
+        cache.set('aa1', b'1' * 100)
+        cache.set('bb2', b'2' * 100)
+        past = time.time() - 60
+        os.utime(cache.path('aa1'), (past, past))
+        os.utime(cache.path('bb2'), (past + 1, past + 1))
+        self.assertIsNotNone(cache.get('aa1'))  # чтение освежает запись
+
+        cache.set('cc3', b'3' * 100)
+        self.assertIsNone(cache.get('bb2'))
+        self.assertEqual(cache.get('aa1'), b'1' * 100)
+        self.assertEqual(cache.get('cc3'), b'3' * 100)
+        self.assertLessEqual(cache.size(), 250)
+
+    def test_directory_walked_only_when_needed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        cache = imageproxy.DiskLRUCache(directory, max_bytes=1000)
+        cache.set('aa1', b'1' * 100)  # первая запись: размер каталога ещё не известен
+
+        with mock.patch.object(cache, 'entries', wraps=cache.entries) as entries:
+            for i in range(5):
+                cache.set(f'b{i}', b'2' * 100)
+            entries.assert_not_called()
+            # Перезапись ключа не раздувает оценку
+            cache.set('aa1', b'1' * 100)
+            entries.assert_not_called()
+
+            cache.set('cc1', b'3' * 500)
+            entries.assert_called_once()
+        self.assertLessEqual(cache.size(), 900)
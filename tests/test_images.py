@@ -0,0 +1,151 @@
+"""
+Тесты вариантов обложек статей
+"""
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+
+from blog.models import Post
+
+
+def make_upload(width=1500, height=1000, fmt='PNG', name='cover.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (120, 40, 200)).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANT_WIDTHS=[320, 640, 1280])
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_user(username='imageauthor', password='pass')
+
+    def make_post(self, **kwargs):
+        defaults = dict(title='Обложка', author=self.user, excerpt='e', content='c', status='published')
+        defaults.update(kwargs)
+        return Post.objects.create(**defaults)
+
+
+class FeaturedImageVariantsTestCase(MediaRootMixin, TestCase):
+    """Варианты строятся при сохранении и выводятся в шаблонах"""
+
+    def test_variants_generated_on_save(self):
+        """WebP и JPEG для каждой ширины меньше оригинала, с размерами и заглушкой"""
+        post = self.make_post(featured_image=make_upload())
+        post.refresh_from_db()
+        data = post.featured_image_variants
+
+        self.assertEqual(data['source'], post.featured_image.name)
+        self.assertEqual((data['width'], data['height']), (1500, 1000))
+        self.assertTrue(data['placeholder'].startswith('data:image/jpeg;base64,'))
+        self.assertLess(len(data['placeholder']), 2000)
+        self.assertEqual(
+            sorted((v['format'], v['width'], v['height']) for v in data['variants']),
+            [('jpeg', 320, 213), ('jpeg', 640, 427), ('jpeg', 1280, 853),
+             ('webp', 320, 213), ('webp', 640, 427), ('webp', 1280, 853)],
+        )
+        for variant in data['variants']:
+            with post.featured_image.storage.open(variant['name']) as f:
+                self.assertEqual(Image.open(f).width, variant['width'])
+
+    def test_small_image_not_upscaled(self):
+        """Узкое изображение не увеличивается"""
+        post = self.make_post(featured_image=make_upload(200, 100))
+        post.refresh_from_db()
+        self.assertEqual({v['width'] for v in post.featured_image_variants['variants']}, {200})
+
+    def test_broken_image_does_not_break_save(self):
+        """Битый файл не мешает сохранению статьи"""
+        upload = SimpleUploadedFile('broken.png', b'not an image', content_type='image/png')
+        post = self.make_post(featured_image=upload)
+        post.refresh_from_db()
+        self.assertEqual(post.featured_image_variants, {})
+
+    def test_replacing_image_removes_old_variants(self):
+        """При замене обложки старые варианты удаляются"""
+        post = self.make_post(featured_image=make_upload())
+        post.refresh_from_db()  # варианты строит фоновая задача
+        old = [v['name'] for v in post.featured_image_variants['variants']]
+        post.featured_image = make_upload(800, 600, name='other.png')
+        post.save()
+        post.refresh_from_db()
+
+        storage = post.featured_image.storage
+        self.assertFalse(any(storage.exists(name) for name in old))
+        self.assertEqual(post.featured_image_variants['source'], post.featured_image.name)
+
+    def test_responsive_image_tag(self):
+        """Тег выводит <picture> с srcset, размерами и заглушкой"""
+        post = self.make_post(featured_image=make_upload())
+        post.refresh_from_db()
+        html = Template('{% load image_tags %}{% responsive_image post sizes="50vw" %}').render(Context({'post': post}))
+
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('320w', html)
+        self.assertIn('1280w', html)
+        self.assertIn('width="1500" height="1000"', html)
+        self.assertIn('data:image/jpeg;base64,', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_external_url_takes_priority(self):
+        """Внешняя ссылка важнее загруженного файла и идёт через прокси"""
+        post = self.make_post(featured_image=make_upload(), featured_image_url='https://example.com/a.png')
+        html = Template('{% load image_tags %}{% responsive_image post %}').render(Context({'post': post}))
+        self.assertIn('/img-proxy/', html)
+        self.assertNotIn('<picture>', html)
+
+        with override_settings(IMAGE_PROXY_ENABLED=False):
+            html = Template('{% load image_tags %}{% responsive_image post %}').render(Context({'post': post}))
+        self.assertIn('src="https://example.com/a.png"', html)
+        self.assertNotIn('srcset', html)
+
+    def test_list_page_uses_variants(self):
+        """Лента отдаёт srcset вместо оригинала"""
+        self.make_post(featured_image=make_upload())
+        response = self.client.get('/', secure=True)
+        self.assertContains(response, '640w')
+
+
+class BuildImageVariantsCommandTestCase(MediaRootMixin, TransactionTestCase):
+    """Параллельная дозаливка вариантов для существующих загрузок"""
+
+    def test_backfill(self):
+        """Команда строит варианты для статей без них"""
+        posts = [self.make_post(title=f'Обложка {i}', featured_image=make_upload(name=f'c{i}.png')) for i in range(3)]
+        Post.objects.update(featured_image_variants={})
+
+        out = StringIO()
+        call_command('build_image_variants', '--workers', '2', stdout=out)
+        self.assertIn('Готово: 3, ошибок: 0', out.getvalue())
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.featured_image_variants['source'], post.featured_image.name)
+
+        out = StringIO()
+        call_command('build_image_variants', '--dry-run', stdout=out)
+        self.assertIn('для обработки: 0', out.getvalue())
+
+    def test_shared_source_variants_kept(self):
+        """Варианты прежней обложки, которую использует другая статья, не удаляются"""
+        other = self.make_post(title='Общая', featured_image=make_upload(name='shared.png'))
+        post = self.make_post(title='Новая', featured_image=make_upload(name='new.png', width=900))
+        other.refresh_from_db()
+        Post.objects.filter(pk=post.pk).update(featured_image_variants=other.featured_image_variants)
+
+        call_command('build_image_variants', '--workers', '1', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.featured_image_variants['source'], post.featured_image.name)
+        storage = other.featured_image.storage
+        for variant in other.featured_image_variants['variants']:
+            self.assertTrue(storage.exists(variant['name']), variant['name'])
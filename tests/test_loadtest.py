@@ -0,0 +1,96 @@
+"""
+Тесты генератора нагрузки
+"""
+import asyncio
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from blog.loadtest import compare_reports, parse_access_log, parse_mix, run_mix, run_replay
+from blog.models import Category, Post
+
+
+ACCESS_LOG = '''\
+127.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET / HTTP/1.1" 200 5120 "-" "Mozilla/5.0"
+127.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "POST /api/posts/x/comment/ HTTP/1.1" 201 10 "-" "curl"
+127.0.0.1 - - [19/Oct/2026:10:00:01 +0000] "GET /search/?q=python HTTP/1.1" 200 2048 "-" "Mozilla/5.0"
+garbage line
+127.0.0.1 - - [19/Oct/2026:10:00:02 +0000] "GET /api/posts/ HTTP/1.1" 200 700 "-" "Mozilla/5.0"
+'''
+
+
+class TestAccessLogParsing(SimpleTestCase):
+    def test_parses_get_requests_in_order(self):
+        entries = parse_access_log(ACCESS_LOG.splitlines())
+
+        self.assertEqual([path for _, _, path in entries], ['/', '/search/?q=python', '/api/posts/'])
+        self.assertEqual(entries[2][0] - entries[0][0], 2)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('list=2,api=1'), {'list': 2.0, 'api': 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix('unknown=1')
+
+    def test_compare_reports(self):
+        report = {
+            'throughput_rps': 10, 'error_count': 0,
+            'latency': {'p50_ms': 1, 'p95_ms': 2, 'p99_ms': 3, 'requests': 5},
+            'groups': {'list': {'p95_ms': 2}},
+        }
+        rows = dict(compare_reports([('a', report), ('b', dict(report, throughput_rps=20))]))
+        self.assertEqual(rows['throughput_rps'], [10, 20])
+        self.assertEqual(rows['list p95_ms'], [2, 2])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TestLoadAgainstLiveServer(LiveServerTestCase):
+    """Прогоны против живого сервера разработки"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='author', password='pass12345')
+        category = Category.objects.create(name='Python')
+        for i in range(3):
+            Post.objects.create(
+                title=f'Load post {i}', author=user, category=category,
+                excerpt='Excerpt', content='<p>python</p>', status='published',
+            )
+
+    def test_mix_run_reports_latency_and_throughput(self):
+        report = asyncio.run(run_mix(self.live_server_url, concurrency=2, requests=12, duration=30))
+
+        self.assertEqual(report['latency']['requests'], 12)
+        self.assertEqual(report['error_count'], 0)
+        self.assertEqual(report['meta']['detail_slugs'], 3)
+        self.assertGreater(report['throughput_rps'], 0)
+        self.assertTrue(set(report['groups']) <= {'list', 'detail', 'search', 'api'})
+
+    def test_replay_keeps_inter_arrival_timing(self):
+        entries = parse_access_log(ACCESS_LOG.splitlines())
+        report = asyncio.run(run_replay(self.live_server_url, entries, speed=10))
+
+        self.assertEqual(report['latency']['requests'], 3)
+        # Лог длится 2 секунды, при ускорении x10 — не меньше 0.2 секунды
+        self.assertGreaterEqual(report['elapsed_s'], 0.19)
+        self.assertEqual(report['statuses'], {'200': 3})
+
+    def test_command_saves_and_compares_reports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = os.path.join(directory, 'a.json')
+            second = os.path.join(directory, 'b.json')
+            for path in (first, second):
+                call_command(
+                    'loadtest', '--url', self.live_server_url, '-c', '2', '-n', '4',
+                    '--mix', 'list=1,api=1', '--output', path, stdout=StringIO(),
+                )
+            with open(first, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['latency']['requests'], 4)
+
+            out = StringIO()
+            call_command('loadtest', '--compare', first, second, stdout=out)
+            self.assertIn('throughput_rps', out.getvalue())
+            self.assertIn('a.json', out.getvalue())
@@ -0,0 +1,168 @@
+"""
+Тесты дедупликации медиафайлов и сборки мусора
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import MediaBlob, Post
+
+
+def png(color=(200, 20, 20), size=(300, 200)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class MediaDedupTestCase(TestCase):
+    """Одинаковое содержимое хранится один раз"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='dedup', password='pass')
+
+    def files_on_disk(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, files in os.walk(self.media_root) for name in files
+        )
+
+    def test_same_bytes_stored_once(self):
+        """Повторная загрузка под другим именем возвращает тот же файл"""
+        first = default_storage.save('posts/2024/01/shot.png', ContentFile(png()))
+        second = default_storage.save('uploads/copy-of-shot.png', ContentFile(png()))
+
+        self.assertEqual(first, second)
+        # Расширение может смениться оптимизатором (PNG -> WebP)
+        self.assertEqual(os.path.splitext(first)[0], f'posts/2024/01/{hashlib.sha256(png()).hexdigest()}')
+        self.assertEqual(self.files_on_disk(), [first])
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.refcount, 2)
+        self.assertEqual(blob.sha256, hashlib.sha256(png()).hexdigest())
+
+    def test_delete_drops_one_reference(self):
+        """Файл физически удаляется вместе с последней ссылкой"""
+        name = default_storage.save('a.png', ContentFile(png()))
+        default_storage.save('b.png', ContentFile(png()))
+
+        default_storage.delete(name)
+        self.assertTrue(default_storage.exists(name))
+        default_storage.delete(name)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_stored_file_without_record_reused(self):
+        """Файл с тем же содержимым уже в хранилище, а записи нет — копия с суффиксом не пишется"""
+        first = default_storage.save('posts/2024/01/shot.png', ContentFile(png()))
+        MediaBlob.objects.all().delete()  # например, запись откатилась вместе с транзакцией
+
+        second = default_storage.save('posts/2024/01/again.png', ContentFile(png()))
+        self.assertEqual(second, first)
+        self.assertEqual(self.files_on_disk(), [first])
+        self.assertEqual((MediaBlob.objects.get().name, MediaBlob.objects.get().refcount), (first, 1))
+
+    def test_record_pointing_elsewhere_repaired(self):
+        """Запись ссылается на пропавший файл в другой папке — берётся файл, что уже лежит на месте"""
+        first = default_storage.save('posts/2024/01/shot.png', ContentFile(png()))
+        MediaBlob.objects.update(name='posts/2023/12/gone.png')
+
+        second = default_storage.save('posts/2024/01/again.png', ContentFile(png()))
+        self.assertEqual(second, first)
+        self.assertEqual(self.files_on_disk(), [first])
+        blob = MediaBlob.objects.get()
+        self.assertEqual((blob.name, blob.refcount), (first, 2))
+
+    def test_featured_images_share_blob(self):
+        """Одна и та же обложка у двух статей — один файл и одни варианты"""
+        posts = [
+            Post.objects.create(
+                title=f'Статья {i}', author=self.user, excerpt='e', content='c',
+                featured_image=SimpleUploadedFile('cover.png', png((10, 10, 200), (800, 500))),
+            )
+            for i in range(2)
+        ]
+        self.assertEqual(posts[0].featured_image.name, posts[1].featured_image.name)
+        self.assertEqual(MediaBlob.objects.get().refcount, 2)
+
+        # Замена обложки у первой статьи не удаляет варианты, нужные второй
+        posts[0].featured_image = SimpleUploadedFile('other.png', png((0, 120, 0), (700, 400)))
+        posts[0].save()
+        posts[1].refresh_from_db()
+        for variant in posts[1].featured_image_variants['variants']:
+            self.assertTrue(default_storage.exists(variant['name']))
+
+    def test_ckeditor_upload_hashed_while_streaming(self):
+        """Загрузка через CKEditor: хэш считает обработчик загрузки, дубликат не пишется"""
+        User.objects.create_user(username='editor', password='pass', is_staff=True)
+        self.client.login(username='editor', password='pass')
+
+        urls = []
+        for name in ('one.png', 'two.png'):
+            response = self.client.post(
+                '/ckeditor5/image_upload/', {'upload': SimpleUploadedFile(name, png(), 'image/png')}, secure=True,
+            )
+            urls.append(response.json()['url'])
+
+        self.assertEqual(urls[0], urls[1])
+        self.assertIn(hashlib.sha256(png()).hexdigest(), urls[0])
+        self.assertEqual(len(self.files_on_disk()), 1)
+
+
+class GcMediaTestCase(TestCase):
+    """gc_media удаляет блобы без ссылок из статей после льготного периода"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='gc', password='pass')
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_media', *args, stdout=out)
+        return out.getvalue()
+
+    def test_gc(self):
+        cover = default_storage.save('cover.png', ContentFile(png((1, 1, 1))))
+        inline = default_storage.save('inline.png', ContentFile(png((2, 2, 2))))
+        orphan = default_storage.save('orphan.png', ContentFile(png((3, 3, 3))))
+        fresh = default_storage.save('fresh.png', ContentFile(png((4, 4, 4))))
+        Post.objects.create(
+            title='Ссылки', author=self.user, excerpt='e', featured_image=cover,
+            content=f'<p><img src="{default_storage.url(inline)}"></p>',
+        )
+        MediaBlob.objects.filter(name=orphan).update(unreferenced_since=timezone.now() - timedelta(days=2))
+
+        output = self.gc('--dry-run')
+        self.assertIn(orphan, output)
+        self.assertTrue(default_storage.exists(orphan))
+
+        self.gc()
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(cover))
+        self.assertTrue(default_storage.exists(inline))
+        # Свежий файл без ссылок только помечается
+        self.assertTrue(default_storage.exists(fresh))
+        self.assertIsNotNone(MediaBlob.objects.get(name=fresh).unreferenced_since)
+        self.assertEqual(MediaBlob.objects.get(name=cover).refcount, 1)
+
+        self.gc('--grace', '0')
+        self.assertFalse(default_storage.exists(fresh))
@@ -0,0 +1,112 @@
+"""
+Тесты отдачи медиафайлов приложением (blog.views.serve_media)
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+from django.test import TestCase, override_settings
+
+from blog.benchmark import compare_media_serving
+
+HASHED = 'posts/2024/01/' + 'ab' * 32 + '.png'
+
+
+class MediaServeTestCase(TestCase):
+    """Range, ETag и кэширование"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.data = bytes(range(256)) * 40
+        for name in ('notes/file.bin', HASHED):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(self.data)
+
+    def get(self, name, **headers):
+        return self.client.get(f'/media/{name}', secure=True, **headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_full_response(self):
+        response = self.get('notes/file.bin')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.data)
+        self.assertEqual(response['Content-Length'], str(len(self.data)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_hashed_name_is_immutable(self):
+        """Файлы с хэшем в имени кэшируются навсегда, ETag — этот хэш"""
+        response = self.get(HASHED)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['ETag'], '"%s"' % ('ab' * 32))
+
+    def test_if_none_match(self):
+        etag = self.get('notes/file.bin')['ETag']
+        response = self.get('notes/file.bin', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.body(response), b'')
+
+    def test_range(self):
+        """Одиночный диапазон, суффикс и открытый конец"""
+        for header, start, end in (('bytes=100-199', 100, 199), ('bytes=-50', 10190, 10239), ('bytes=10000-', 10000, 10239)):
+            with self.subTest(header=header):
+                response = self.get('notes/file.bin', HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(self.body(response), self.data[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{len(self.data)}')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+    def test_unsatisfiable_range(self):
+        response = self.get('notes/file.bin', HTTP_RANGE='bytes=999999-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.data)}')
+
+    def test_if_range_mismatch_returns_full_file(self):
+        response = self.get('notes/file.bin', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.body(response)), len(self.data))
+
+    def test_head(self):
+        response = self.client.head('/media/notes/file.bin', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(self.data)))
+
+    def test_not_found_and_traversal(self):
+        self.assertEqual(self.get('notes/missing.bin').status_code, 404)
+        self.assertEqual(self.get('notes').status_code, 404)
+        self.assertEqual(self.get('../config/settings.py').status_code, 404)
+        self.assertEqual(self.get('%2e%2e/config/settings.py').status_code, 404)
+
+
+@pytest.mark.benchmark
+class MediaServeBenchmarkTestCase(TestCase):
+    """serve_media против django.views.static.serve на файле в 8 МБ"""
+
+    def test_compare_with_static_serve(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with open(os.path.join(media_root, 'big.bin'), 'wb') as f:
+            f.write(os.urandom(8 * 1024 * 1024))
+
+        with override_settings(MEDIA_ROOT=media_root):
+            report = compare_media_serving('big.bin', iterations=5)
+
+        for scenario, row in report.items():
+            print(f"\n{scenario}: serve_media {row['serve_media']['median_ms']} мс "
+                  f"({row['serve_media']['status']}), static.serve {row['static_serve']['median_ms']} мс")
+        self.assertEqual(report['revalidate']['serve_media']['status'], 304)
+        self.assertEqual(report['range']['serve_media']['bytes'], 65536)
+        self.assertLess(report['range']['serve_media']['median_ms'], report['range']['static_serve']['median_ms'])
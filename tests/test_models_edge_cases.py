@@ -1,7 +1,10 @@
 """
 Тесты edge cases для моделей блога
 """
-from django.test import TestCase
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -459,6 +462,13 @@ class TestPostEdgeCases(TestCase):
         # Для теста изображения используем SimpleUploadedFile
         from django.core.files.uploadedfile import SimpleUploadedFile
 
+        # Файлы — во временный каталог, а не в MEDIA_ROOT проекта
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
         # Создаем тестовое изображение
         image_content = b'fake image content'
         image = SimpleUploadedFile(
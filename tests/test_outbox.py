@@ -0,0 +1,249 @@
+"""
+Тесты исходящего ящика событий (blog/outbox.py) с локальным приёмником вебхуков
+"""
+import hashlib
+import hmac
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blog import outbox, taskqueue
+from blog.models import Comment, OutboxEvent, Post, Task
+
+handled = []
+handlers_before = dict(outbox.HANDLERS)
+
+
+def audit_publication(event):
+    # Побочный эффект в БД: должен случиться ровно один раз
+    handled.append(event.payload['slug'])
+    Task.objects.create(name='tests.published', key=event.payload['slug'])
+
+
+class WebhookReceiver(ThreadingHTTPServer):
+    """HTTP-сервер на 127.0.0.1: запоминает тела запросов, первые fail ответов — 500"""
+
+    def __init__(self):
+        self.requests = []
+        self.fail = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(handler):
+                body = handler.rfile.read(int(handler.headers['Content-Length']))
+                if self.fail:
+                    self.fail -= 1
+                    handler.send_response(500)
+                else:
+                    self.requests.append((dict(handler.headers), json.loads(body), body))
+                    handler.send_response(204)
+                handler.end_headers()
+
+            def log_message(handler, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/hook'
+
+    def received(self):
+        return [event for _, body, _ in self.requests for event in body['events']]
+
+
+@override_settings(TASKS_EAGER=False, TASK_SCHEDULE={}, TASK_RETRY_DELAY=10, OUTBOX_MAX_ATTEMPTS=3)
+class OutboxTestCase(TestCase):
+    """Запись событий в транзакции изменения и доставка обработчикам и вебхукам"""
+
+    def setUp(self):
+        handled.clear()
+        # Только тестовый обработчик: обработчики блога проверяются отдельно
+        handlers = mock.patch.dict(outbox.HANDLERS, clear=True)
+        handlers.start()
+        self.addCleanup(handlers.stop)
+        outbox.handler('tests.audit', events=[outbox.POST_PUBLISHED])(audit_publication)
+        self.receiver = WebhookReceiver()
+        thread = threading.Thread(target=self.receiver.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.receiver.server_close)
+        self.addCleanup(self.receiver.shutdown)
+        webhooks = [{'name': 'local', 'url': self.receiver.url, 'secret': 's3cret', 'events': ['*']}]
+        settings_override = self.settings(OUTBOX_WEBHOOKS=webhooks)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='author', password='pass')
+        self.post = Post.objects.create(title='Черновик', slug='draft', author=self.user, content='c')
+
+    def publish(self, post):
+        post.status = 'published'
+        post.save()
+
+    def test_published_once(self):
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.publish(self.post)
+        self.post.title = 'Правка'
+        self.post.save()
+        self.publish(Post.objects.get(pk=self.post.pk))
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.event_type, event.aggregate), (outbox.POST_PUBLISHED, f'blog.post:{self.post.pk}'))
+        self.assertEqual(event.payload['url'], '/post/draft/')
+        # Доставка поставлена в очередь одной задачей
+        self.assertEqual(Task.objects.filter(name='blog.dispatch_outbox').count(), 1)
+
+    def test_created_published(self):
+        Post.objects.create(title='Сразу', slug='now', author=self.user, content='c', status='published')
+        Post.objects.create(title='Нет', slug='no', author=self.user, content='c')
+        self.assertEqual(list(OutboxEvent.objects.values_list('payload__slug', flat=True)), ['now'])
+
+    def test_update_fields_without_status(self):
+        self.post.status = 'published'
+        self.post.save(update_fields=['title'])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_rolled_back_with_change(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.publish(self.post)
+                raise ValueError
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_comment_approved(self):
+        comment = Comment.objects.create(post=self.post, author_name='Гость', author_email='g@example.com', content='!')
+        self.assertFalse(OutboxEvent.objects.exists())
+        comment.is_approved = True
+        comment.save()
+        comment.save()
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.event_type, outbox.COMMENT_APPROVED)
+        self.assertEqual(event.aggregate, f'blog.post:{self.post.pk}')
+        self.assertEqual(event.payload['post_id'], self.post.pk)
+
+    def test_dispatch_to_handler_and_webhook(self):
+        self.publish(self.post)
+        taskqueue.work(burst=True)
+
+        event = OutboxEvent.objects.get()
+        self.assertIsNotNone(event.dispatched_at)
+        self.assertEqual(event.delivered, ['handler:tests.audit', 'webhook:local'])
+        self.assertEqual(handled, ['draft'])
+        self.assertTrue(Task.objects.filter(name='tests.published', key='draft').exists())
+
+        [(headers, body, raw)] = self.receiver.requests
+        [payload] = body['events']
+        self.assertEqual((payload['id'], payload['type']), (str(event.uuid), outbox.POST_PUBLISHED))
+        self.assertEqual(payload['data']['slug'], 'draft')
+        expected = hmac.new(b's3cret', raw, hashlib.sha256).hexdigest()
+        self.assertEqual(headers['X-Outbox-Signature'], f'sha256={expected}')
+
+        # Повторный запуск ничего не доставляет заново
+        self.assertEqual(outbox.dispatch(), 0)
+        self.assertEqual((len(handled), len(self.receiver.requests)), (1, 1))
+
+    def test_batches_and_order_per_aggregate(self):
+        posts = [
+            Post.objects.create(title=f'Статья {i}', slug=f'post-{i}', author=self.user, content='c', status='published')
+            for i in range(3)
+        ]
+        Comment.objects.create(
+            post=posts[0], author_name='Гость', author_email='g@example.com', content='!', is_approved=True,
+        )
+        self.assertEqual(outbox.dispatch(batch_size=10), 4)
+
+        # Первая пачка — по одному событию от каждой статьи, комментарий — следом за своей статьёй
+        self.assertEqual([len(body['events']) for _, body, _ in self.receiver.requests], [3, 1])
+        received = self.receiver.received()
+        self.assertEqual([event['type'] for event in received][-1], outbox.COMMENT_APPROVED)
+        self.assertEqual([event['sequence'] for event in received], sorted(event['sequence'] for event in received))
+
+    def test_webhook_failure_retried_without_redelivery(self):
+        self.publish(self.post)
+        Comment.objects.create(
+            post=self.post, author_name='Гость', author_email='g@example.com', content='!', is_approved=True,
+        )
+        self.receiver.fail = 1
+        self.assertEqual(outbox.dispatch(), 0)
+
+        first, second = OutboxEvent.objects.order_by('id')
+        self.assertEqual((first.attempts, first.delivered), (1, ['handler:tests.audit']))
+        self.assertIn('500', first.last_error)
+        self.assertGreater(first.next_attempt_at, timezone.now() + timedelta(seconds=5))
+        # Следующее событие статьи ждёт, пока не доставлено предыдущее
+        self.assertIsNone(second.dispatched_at)
+        self.assertEqual(outbox.dispatch(), 0)
+
+        OutboxEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.dispatch(), 2)
+        self.assertEqual([event['type'] for event in self.receiver.received()], [
+            outbox.POST_PUBLISHED, outbox.COMMENT_APPROVED,
+        ])
+        # Обработчик при повторе не вызывался второй раз
+        self.assertEqual(handled, ['draft'])
+
+    def test_gives_up_after_max_attempts(self):
+        self.publish(self.post)
+        self.receiver.fail = 10
+        for _ in range(3):
+            OutboxEvent.objects.update(next_attempt_at=timezone.now())
+            outbox.dispatch()
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 3)
+        self.assertIsNotNone(event.failed_at)
+        self.assertIsNone(event.dispatched_at)
+
+    def test_claim_is_exclusive(self):
+        self.publish(self.post)
+        self.assertEqual(len(outbox.claim(10)), 1)
+        self.assertEqual(outbox.claim(10), [])
+        OutboxEvent.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(outbox.claim(10)), 1)
+
+    @override_settings(OUTBOX_RETENTION_DAYS=30)
+    def test_prune_outbox(self):
+        self.publish(self.post)
+        outbox.dispatch()
+        OutboxEvent.objects.update(dispatched_at=timezone.now() - timedelta(days=31))
+        taskqueue.enqueue('blog.prune_outbox')
+        taskqueue.work(burst=True)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    @override_settings(FEED_WARM_HOST='testserver')
+    def test_publication_refreshes_pages_without_dispatcher(self):
+        outbox.HANDLERS['blog.refresh_published'] = handlers_before['blog.refresh_published']
+        with mock.patch('blog.pagecache.invalidate') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.publish(self.post)
+                # До фиксации кэш не трогается
+                invalidate.assert_not_called()
+            # Страницы (pagecache.GENERATION_KEY) и карта сайта — сразу после фиксации,
+            # событие ещё не доставлено
+            self.assertEqual(invalidate.call_count, 2)
+            self.assertIsNone(OutboxEvent.objects.get().dispatched_at)
+
+            Comment.objects.create(
+                post=self.post, author_name='Гость', author_email='g@example.com', content='!', is_approved=True,
+            )
+            taskqueue.work(burst=True)
+        # Доставка события и одобрение комментария кэш повторно не сбрасывают
+        self.assertEqual(invalidate.call_count, 2)
+        self.assertIn('handler:blog.refresh_published', OutboxEvent.objects.order_by('id').first().delivered)
+        self.assertTrue(Task.objects.filter(name='blog.warm_feeds').exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_dispatch_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.publish(self.post)
+            self.assertEqual(self.receiver.requests, [])
+        # Отправка событий, сброс кэша страниц и карты сайта
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(len(self.receiver.requests), 1)
+        self.assertIsNotNone(OutboxEvent.objects.get().dispatched_at)
@@ -0,0 +1,244 @@
+"""
+Тесты минификации HTML и кэша страниц
+"""
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from blog import htmlmin, outbox, pagecache
+from blog.benchmark import compare_html_minify
+from blog.middleware import HTMLMinifyMiddleware
+from blog.models import Category, Comment, Post
+
+PAGE = '''<!DOCTYPE html>
+<html>
+  <head>
+    <title> Страница </title>
+    <!-- комментарий шаблона -->
+  </head>
+  <body class="  bg-gray-950
+        text-gray-100 ">
+    <p>Привет,   <strong>мир</strong>!</p>
+    <pre><code class="language-python">def f():
+    return   1
+</code></pre>
+    <textarea>  как
+  есть</textarea>
+    <span>a</span> <span>b</span>
+    <input
+       type="text"   value="a   b" >
+    <script>if (a < b) {  run(); }</script>
+  </body>
+</html>'''
+
+PAGE_CACHE_SETTINGS = dict(
+    PAGE_CACHE=True,
+    PAGE_CACHE_ALIAS='pages',
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pages-tests'},
+    },
+)
+
+
+class MinifyTestCase(TestCase):
+    """Минификатор"""
+
+    def test_whitespace_and_comments(self):
+        html = htmlmin.minify(PAGE)
+        self.assertTrue(html.startswith('<!DOCTYPE html><html><head><title>Страница</title></head>'))
+        self.assertIn('<body class="bg-gray-950 text-gray-100">', html)
+        self.assertIn('<p>Привет, <strong>мир</strong>!</p>', html)
+        self.assertNotIn('комментарий', html)
+        # Пробел между строчными элементами влияет на отрисовку и остаётся
+        self.assertIn('<span>a</span> <span>b</span>', html)
+        self.assertIn('<input type="text" value="a   b">', html)
+
+    def test_preformatted_content_preserved(self):
+        html = htmlmin.minify(PAGE)
+        self.assertIn('def f():\n    return   1\n</code></pre>', html)
+        self.assertIn('<textarea>  как\n  есть</textarea>', html)
+        self.assertIn('<script>if (a < b) {  run(); }</script>', html)
+
+    def test_streaming_matches_whole_document(self):
+        expected = htmlmin.minify(PAGE)
+        for i in range(len(PAGE)):
+            minifier = htmlmin.HTMLMinifier()
+            self.assertEqual(minifier.feed(PAGE[:i]) + minifier.feed(PAGE[i:]) + minifier.close(), expected, i)
+
+        data = PAGE.encode()
+        chunks = [data[i:i + 7] for i in range(0, len(data), 7)]  # режет и многобайтовые символы
+        self.assertEqual(b''.join(htmlmin.minify_stream(chunks)).decode(), expected)
+
+    def test_lone_angle_bracket_in_text(self):
+        self.assertEqual(htmlmin.minify('<p>1 < 2  и  3 > 2</p>'), '<p>1 < 2 и 3 > 2</p>')
+
+
+class MiddlewareTestCase(TestCase):
+    """HTMLMinifyMiddleware"""
+
+    def run_middleware(self, response, path='/'):
+        return HTMLMinifyMiddleware(lambda request: response)(RequestFactory().get(path))
+
+    def test_html_minified(self):
+        response = self.run_middleware(HttpResponse(PAGE))
+        self.assertEqual(response.content.decode(), htmlmin.minify(PAGE))
+
+    def test_streaming_html_minified(self):
+        response = self.run_middleware(StreamingHttpResponse(iter([PAGE[:50].encode(), PAGE[50:].encode()])))
+        self.assertEqual(b''.join(response.streaming_content).decode(), htmlmin.minify(PAGE))
+
+    def test_other_content_untouched(self):
+        json_response = self.run_middleware(HttpResponse('{"a":  1}', content_type='application/json'))
+        self.assertEqual(json_response.content, b'{"a":  1}')
+        admin_response = self.run_middleware(HttpResponse(PAGE), path='/admin/')
+        self.assertEqual(admin_response.content.decode(), PAGE)
+
+    @override_settings(HTML_MINIFY=False)
+    def test_disabled(self):
+        self.assertEqual(self.run_middleware(HttpResponse(PAGE)).content.decode(), PAGE)
+
+
+@override_settings(**PAGE_CACHE_SETTINGS)
+class PageCacheTestCase(TestCase):
+    """Кэш минифицированных страниц"""
+
+    def setUp(self):
+        pagecache.get_cache().clear()
+        self.user = User.objects.create_user(username='cacheauthor', password='pass')
+        self.category = Category.objects.create(name='Кэш')
+        self.post = Post.objects.create(
+            title='Кэшируемая статья', author=self.user, category=self.category, excerpt='e',
+            content='<p>Текст</p>', status='published',
+        )
+
+    def get(self, url):
+        return self.client.get(url, secure=True)
+
+    def test_second_request_is_cached_and_minified(self):
+        url = reverse('blog:post_list')
+        first = self.get(url)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        self.assertNotIn(b'>\n    <', first.content)
+
+        with self.assertNumQueries(0):
+            second = self.get(url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+
+    def test_minified_once_per_generation(self):
+        url = reverse('blog:post_list')
+        calls = []
+        original = htmlmin.minify
+        with mock.patch('blog.htmlmin.minify', side_effect=lambda html: calls.append(1) or original(html)):
+            self.get(url)
+            self.get(url)
+            self.get(url)
+        self.assertEqual(len(calls), 1)
+
+    def test_invalidated_on_change(self):
+        url = reverse('blog:post_list')
+        self.get(url)
+        self.post.title = 'Правка'
+        self.post.save()
+        response = self.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Правка')
+
+    def test_invalidated_after_publication_commit(self):
+        url = reverse('blog:post_list')
+        self.get(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Post.objects.create(
+                title='Новая статья', author=self.user, excerpt='e', content='c', status='published',
+            )
+        # До фиксации страница прежняя
+        self.assertEqual(self.get(url)['X-Page-Cache'], 'hit')
+        # Сброс — при фиксации, а не при доставке события исходящего ящика
+        with mock.patch.dict(outbox.HANDLERS, clear=True):
+            for callback in callbacks:
+                callback()
+        response = self.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Новая статья')
+
+    def test_comment_does_not_invalidate(self):
+        url = reverse('blog:post_list')
+        self.get(url)
+        Comment.objects.create(
+            post=self.post, author_name='Гость', author_email='g@example.com', content='!', is_approved=True,
+        )
+        self.assertEqual(self.get(url)['X-Page-Cache'], 'hit')
+
+    def test_key_ignores_unknown_query_params(self):
+        url = reverse('blog:post_list')
+        self.get(url)
+        self.assertEqual(self.get(f'{url}?utm_source=x')['X-Page-Cache'], 'hit')
+        self.assertEqual(self.get(f'{url}?page=1')['X-Page-Cache'], 'miss')
+        self.assertEqual(self.get(f'{url}?page=1&ref=y')['X-Page-Cache'], 'hit')
+
+    def test_view_headers_replayed(self):
+        def view(request):
+            response = HttpResponse('<p>x</p>')
+            response['Cache-Control'] = 'max-age=60'
+            response['Vary'] = 'Accept-Language'
+            return response
+
+        cached = pagecache.cached_page(view)
+        request = RequestFactory().get('/headers/')
+        request.user = mock.Mock(is_authenticated=False)
+        self.assertEqual(cached(request)['X-Page-Cache'], 'miss')
+        hit = cached(request)
+        self.assertEqual(hit['X-Page-Cache'], 'hit')
+        self.assertEqual((hit['Cache-Control'], hit['Vary']), ('max-age=60', 'Accept-Language'))
+        self.assertEqual(hit['Content-Type'], 'text/html; charset=utf-8')
+
+    def test_view_counter_keeps_counting(self):
+        url = self.post.get_absolute_url()
+        self.get(url)
+        response = self.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.force_login(self.user)
+        url = reverse('blog:post_list')
+        self.get(url)
+        self.assertFalse(self.get(url).has_header('X-Page-Cache'))
+
+    def test_errors_not_cached(self):
+        url = reverse('blog:post_detail', kwargs={'slug': 'net-takoy'})
+        self.assertEqual(self.get(url).status_code, 404)
+        self.assertEqual(self.get(url).status_code, 404)
+        pages = [key for key in pagecache.get_cache()._cache
+                 if 'pagecache:' in key and pagecache.GENERATION_KEY not in key]
+        self.assertEqual(pages, [])  # только номер поколения
+
+
+@pytest.mark.benchmark
+@override_settings(**PAGE_CACHE_SETTINGS)
+class HTMLMinifyBenchmarkTestCase(TestCase):
+    """Байты и время, сэкономленные минификацией и кэшем на post_list и post_detail"""
+
+    def test_report(self):
+        user = User.objects.create_user(username='benchauthor', password='pass')
+        category = Category.objects.create(name='Бенчмарк')
+        for i in range(12):
+            Post.objects.create(
+                title=f'Статья {i}', author=user, category=category, excerpt='Описание ' * 10,
+                content='<h2>Раздел</h2><p>Текст</p>' * 20, status='published',
+            )
+
+        report = compare_html_minify(iterations=3)
+
+        for name, row in report.items():
+            print(f"\n{name}: {row['bytes']} → {row['minified_bytes']} байт "
+                  f"(gzip {row['gzip_bytes']} → {row['gzip_minified_bytes']}), минификация {row['minify_ms']} мс, "
+                  f"без кэша {row['miss_ms']} мс, из кэша {row['hit_ms']} мс")
+            self.assertGreater(row['saved_bytes'], 0)
+            self.assertLess(row['hit_ms'], row['miss_ms'])
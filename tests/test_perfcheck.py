@@ -0,0 +1,88 @@
+"""
+Тесты истории замеров и команды perfcheck
+"""
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from blog import perfhistory
+
+
+def make_report(median=10.0, p95=12.0, queries=3, size=5000, iterations=20):
+    routes = {
+        name: {'url': '/', 'status': 200, 'median_ms': median, 'p95_ms': p95,
+               'mean_ms': median, 'queries': queries, 'bytes': size}
+        for name in perfhistory.DEFAULT_ROUTES
+    }
+    return {
+        'meta': {'database': 'sqlite', 'iterations': iterations, 'dataset': {'posts': 200}},
+        'routes': routes,
+    }
+
+
+class PerfHistoryTestCase(SimpleTestCase):
+    """Тесты хранения истории и поиска регрессий"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        os.remove(self.path)
+        self.addCleanup(lambda: os.path.exists(self.path) and os.remove(self.path))
+
+    def seed_history(self, count=5):
+        for i in range(count):
+            perfhistory.append(make_report(median=10.0 + i * 0.1), self.path)
+
+    def test_append_and_load(self):
+        """Отчёты дописываются построчно и читаются в том же порядке"""
+        self.seed_history(3)
+        with open(self.path, 'a') as f:
+            f.write('не json\n')
+        reports = perfhistory.load(self.path)
+        self.assertEqual(len(reports), 3)
+        self.assertEqual(reports[0]['routes']['post_list']['median_ms'], 10.0)
+
+    def test_noise_is_not_regression(self):
+        """Отклонение в пределах допуска не считается регрессией"""
+        self.seed_history()
+        rows, regressions = perfhistory.check(make_report(median=10.8), perfhistory.load(self.path))
+        self.assertTrue(rows)
+        self.assertEqual(regressions, [])
+
+    def test_latency_regression(self):
+        """Заметный рост медианы — регрессия"""
+        self.seed_history()
+        _, regressions = perfhistory.check(make_report(median=20.0), perfhistory.load(self.path))
+        self.assertIn(('post_list', 'median_ms'), [row[:2] for row in regressions])
+
+    def test_extra_query_is_regression(self):
+        """Любой лишний запрос к БД — регрессия"""
+        self.seed_history()
+        _, regressions = perfhistory.check(make_report(queries=4), perfhistory.load(self.path))
+        self.assertEqual({row[1] for row in regressions}, {'queries'})
+
+    def test_incomparable_runs_ignored(self):
+        """Прогоны с другими параметрами не входят в базу"""
+        self.seed_history()
+        rows, regressions = perfhistory.check(make_report(median=50.0, iterations=5), perfhistory.load(self.path))
+        self.assertEqual(rows, [])
+        self.assertEqual(regressions, [])
+
+    def test_command_exit_code(self):
+        """perfcheck завершается ошибкой при регрессии и успешно без неё"""
+        self.seed_history()
+        perfhistory.append(make_report(median=10.2), self.path)
+        call_command('perfcheck', '--history-file', self.path, stdout=StringIO())
+
+        perfhistory.append(make_report(median=30.0), self.path)
+        with self.assertRaises(CommandError):
+            call_command('perfcheck', '--history-file', self.path, stdout=StringIO())
+
+    def test_command_empty_history(self):
+        """Пустая история — понятная ошибка"""
+        with self.assertRaises(CommandError):
+            call_command('perfcheck', '--history-file', self.path)
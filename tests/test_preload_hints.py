@@ -0,0 +1,145 @@
+"""
+Тесты подсказок загрузки: заголовок Link и 103 Early Hints
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog import hints
+from blog.models import Category, Post
+
+from .test_pagecache import PAGE_CACHE_SETTINGS
+
+
+@override_settings(IMAGE_PROXY_ENABLED=False)
+class PreloadHintsTestCase(TestCase):
+    """Заголовок Link"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author', password='pass')
+        self.category = Category.objects.create(name='Python')
+        self.post = Post.objects.create(
+            title='Обложка', author=self.user, category=self.category,
+            content='<p>Текст</p>', status='published',
+            featured_image_url='https://images.example.com/cover.jpg',
+        )
+
+    def get(self, url, **extra):
+        return self.client.get(url, secure=True, **extra)
+
+    def links(self, response):
+        return response.get('Link', '').split(', ')
+
+    def test_link_format(self):
+        self.assertEqual(hints.link('/static/a.css', as_='style'), '</static/a.css>; rel=preload; as=style')
+        self.assertEqual(
+            hints.link('/a.woff2', as_='font', type='font/woff2', crossorigin=True, media=''),
+            '</a.woff2>; rel=preload; as=font; type="font/woff2"; crossorigin',
+        )
+        self.assertEqual(hints.link('/обложка.jpg'), '</%D0%BE%D0%B1%D0%BB%D0%BE%D0%B6%D0%BA%D0%B0.jpg>; rel=preload')
+
+    def test_critical_assets_on_every_page(self):
+        links = self.links(self.get(reverse('blog:post_list')))
+        self.assertIn('</static/css/site.css>; rel=preload; as=style', links)
+        self.assertIn(
+            '</static/vendor/inter/inter-cyrillic-wght-normal.woff2>; rel=preload; as=font; '
+            'type="font/woff2"; crossorigin',
+            links,
+        )
+        self.assertNotIn('</static/css/pygments.css>; rel=preload; as=style', links)
+
+    def test_post_detail_preloads_featured_image(self):
+        links = self.links(self.get(self.post.get_absolute_url()))
+        self.assertIn('</static/css/pygments.css>; rel=preload; as=style', links)
+        self.assertIn('<https://images.example.com/cover.jpg>; rel=preload; as=image; fetchpriority=high', links)
+
+    @override_settings(IMAGE_PROXY_ENABLED=True)
+    def test_proxied_image_preloads_srcset(self):
+        link = self.get(self.post.get_absolute_url())['Link']
+        self.assertEqual(link.count('as=image'), 1)
+        # Запятые srcset внутри кавычек — часть параметра, а не разделитель ссылок
+        self.assertRegex(link, r'</img-proxy/[^>]+>; rel=preload; as=image; fetchpriority=high; '
+                               r'imagesrcset="/img-proxy/[^"]+ 320w, [^"]+ 1280w"; '
+                               r'imagesizes="\(min-width: 896px\) 896px, 100vw"')
+
+    def test_post_list_prefetches_next_page(self):
+        for i in range(10):
+            Post.objects.create(title=f'Статья {i}', author=self.user, content='x', status='published')
+        url = reverse('blog:post_list')
+        self.assertIn('</page/2/>; rel=prefetch', self.links(self.get(url)))
+        self.assertNotIn('rel=prefetch', self.get('/page/2/')['Link'])
+
+    def test_no_extra_queries(self):
+        url = self.post.get_absolute_url()
+        self.get(url)  # первый запрос сбрасывает буфер аудита
+        with CaptureQueriesContext(connection) as with_hints:
+            self.get(url)
+        with self.settings(PRELOAD_HINTS=False), CaptureQueriesContext(connection) as without_hints:
+            response = self.get(url)
+        self.assertFalse(response.has_header('Link'))
+        self.assertEqual(len(with_hints), len(without_hints))
+
+    def test_excluded_and_non_html(self):
+        self.assertFalse(hints.enabled(RequestFactory().get('/admin/login/')))
+        self.assertFalse(hints.enabled(RequestFactory().post(reverse('blog:post_list'))))
+        self.assertFalse(self.get(reverse('blog:post_detail', args=['net-takoy'])).has_header('Link'))
+
+    @override_settings(PRELOAD_PRECONNECT=['https://res.cloudinary.com'])
+    def test_preconnect(self):
+        links = self.links(self.get(reverse('blog:post_list')))
+        self.assertEqual(links[0], '<https://res.cloudinary.com>; rel=preconnect; crossorigin')
+
+
+@override_settings(IMAGE_PROXY_ENABLED=False)
+class EarlyHintsTestCase(TestCase):
+    """103 Early Hints через функцию сервера в environ"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='author', password='pass')
+        self.post = Post.objects.create(
+            title='Ранние подсказки', author=user, content='x', status='published',
+            featured_image_url='https://images.example.com/early.jpg',
+        )
+        self.sent = []
+
+    def get(self, url):
+        return self.client.get(url, secure=True, **{'wsgi.early_hints': self.sent.extend})
+
+    def test_sent_before_view_and_remembers_view_hints(self):
+        url = self.post.get_absolute_url()
+        self.get(url)
+        name, value = self.sent[0]
+        self.assertEqual(name, 'Link')
+        self.assertIn('</static/css/site.css>; rel=preload; as=style', value)
+        # Обложку знает только представление — в первый раз её в 103 нет
+        self.assertNotIn('early.jpg', value)
+
+        self.get(url)
+        self.assertIn('<https://images.example.com/early.jpg>; rel=preload', self.sent[1][1])
+
+    def test_server_errors_are_ignored(self):
+        def broken(headers):
+            raise OSError('соединение закрыто')
+
+        response = self.client.get(reverse('blog:post_list'), secure=True, **{'wsgi.early_hints': broken})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Link'))
+
+
+@override_settings(IMAGE_PROXY_ENABLED=False, **PAGE_CACHE_SETTINGS)
+class CachedPageHintsTestCase(TestCase):
+    """Страница из кэша отдаёт те же подсказки, что и при рендере"""
+
+    def test_hints_restored_on_cache_hit(self):
+        user = User.objects.create_user(username='author', password='pass')
+        post = Post.objects.create(
+            title='Из кэша', author=user, content='x', status='published',
+            featured_image_url='https://images.example.com/cached.jpg',
+        )
+        first = self.client.get(post.get_absolute_url(), secure=True)
+        second = self.client.get(post.get_absolute_url(), secure=True)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(first['Link'], second['Link'])
+        self.assertIn('cached.jpg', second['Link'])
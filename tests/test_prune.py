@@ -0,0 +1,96 @@
+"""
+Тесты команды prune
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.admin.models import LogEntry, CHANGE
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from blog.audit import writer
+from blog.models import AuditRecord
+
+
+class TestPruneCommand(TestCase):
+    """Тесты пакетной очистки"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='admin', password='pass12345')
+        content_type = ContentType.objects.get_for_model(User)
+        writer.flush()
+        now = timezone.now()
+
+        entries = [
+            LogEntry.objects.create(
+                user=user, content_type=content_type, object_id=str(i),
+                object_repr='x', action_flag=CHANGE,
+            )
+            for i in range(12)
+        ]
+        # Первые 10 записей делаем старыми
+        old_ids = [entry.pk for entry in entries[:10]]
+        LogEntry.objects.filter(pk__in=old_ids).update(action_time=now - timedelta(days=400))
+
+        AuditRecord.objects.all().delete()
+        AuditRecord.objects.bulk_create(
+            [AuditRecord(username='admin', action='LOGIN', created_at=now - timedelta(days=400))
+             for _ in range(5)]
+            + [AuditRecord(username='admin', action='LOGIN')]
+        )
+
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{i:03d}', session_data='',
+                     expire_date=now - timedelta(days=1)) for i in range(7)]
+            + [Session(session_key='alive', session_data='', expire_date=now + timedelta(days=1))]
+        )
+
+    def run_prune(self, *args):
+        out = StringIO()
+        call_command('prune', '--sleep', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_deletes_nothing(self):
+        output = self.run_prune('--days', '30', '--dry-run')
+
+        self.assertIn('Будет удалено записей: 22', output)
+        self.assertEqual(LogEntry.objects.count(), 12)
+        self.assertEqual(Session.objects.count(), 8)
+
+    def test_prunes_admin_log_in_batches(self):
+        output = self.run_prune('admin_log', '--days', '30', '--batch-size', '3')
+
+        self.assertEqual(LogEntry.objects.count(), 2)
+        # 10 строк при пачке в 3 ключа — не меньше четырёх итераций
+        self.assertGreaterEqual(output.count('django_admin_log: pk'), 4)
+        self.assertIn('Удалено записей: 10', output)
+
+    def test_skips_empty_pk_ranges(self):
+        """Разреженные id: пустые диапазоны между ними не обходятся"""
+        AuditRecord.objects.all().delete()
+        old = timezone.now() - timedelta(days=400)
+        AuditRecord.objects.bulk_create([
+            AuditRecord(pk=pk, username='admin', action='LOGIN', created_at=old)
+            for pk in (1, 2, 100000, 100001)
+        ])
+        output = self.run_prune('audit', '--days', '30', '--batch-size', '2')
+
+        self.assertFalse(AuditRecord.objects.exists())
+        self.assertEqual(output.count('журнал аудита: pk'), 2)
+
+    def test_prunes_audit_records(self):
+        self.run_prune('audit', '--days', '30', '--batch-size', '2')
+        self.assertEqual(AuditRecord.objects.count(), 1)
+
+    def test_prunes_only_expired_sessions(self):
+        self.run_prune('sessions', '--batch-size', '3')
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['alive'])
+
+    def test_nothing_to_prune(self):
+        output = self.run_prune('admin_log', '--days', '1000')
+        self.assertIn('нечего удалять', output)
+        self.assertEqual(LogEntry.objects.count(), 12)
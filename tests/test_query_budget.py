@@ -0,0 +1,117 @@
+"""
+Регрессии по числу SQL-запросов и планам выполнения для всех маршрутов
+"""
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from rest_framework.pagination import PageNumberPagination
+
+from blog import views
+from blog.querycheck import capture, checked_routes, route_url, sequential_scans
+from blog.seed import seed_blog
+
+
+# Максимум запросов на один ответ. Новый маршрут без бюджета роняет тест
+QUERY_BUDGETS = {
+    'blog:post_list': 3,        # count, страница, теги
+    'blog:post_list_page': 3,
+    'blog:post_detail': 4,      # статья, +1 просмотр, теги, похожие статьи
+    'blog:category_posts': 4,   # категория, count, страница, теги
+    'blog:category_posts_page': 4,
+    'blog:tag_posts': 4,        # тег, count, страница, теги
+    'blog:tag_posts_page': 4,
+    'blog:feed': 2,             # статьи с авторами и категориями, теги
+    'blog:category_feed': 3,    # категория, статьи, теги
+    'blog:tag_feed': 3,         # тег, статьи, теги
+    'blog:search': 3,
+    'blog:offline': 0,
+    'blog:service_worker': 1,   # последние статьи для офлайна и версии воркера
+    'blog:web_manifest': 0,
+    'api-root': 0,
+    'post-list': 3,
+    'post-detail': 2,
+    'post-comments': 2,
+    'post-comment': 2,          # POST: статья и вставка комментария
+    'category-list': 2,
+    'category-detail': 1,
+}
+
+# Маршруты, которым последовательное сканирование разрешено осознанно
+SEQ_SCAN_ALLOWED = {
+    # icontains по тексту статьи не использует B-tree индексы
+    'blog:search': {'blog_post'},
+}
+
+# Списки, число запросов которых не должно зависеть от размера страницы
+PAGINATED_ROUTES = ['blog:post_list', 'blog:category_posts', 'blog:tag_posts',
+                    'blog:search', 'post-list']
+
+
+class QueryBudgetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_blog(posts=60, tags=30, comments=200, authors=3, categories=3)
+
+    def request(self, name, params):
+        url = route_url(name, params)
+        if name == 'post-comment':
+            # Единственный маршрут только для POST
+            data = {'author_name': 'Читатель', 'author_email': 'r@example.com', 'content': 'Спасибо'}
+            return capture(self.client, url, method='post', data=data)
+        return capture(self.client, url)
+
+
+class TestQueryBudgets(QueryBudgetTestCase):
+    """Каждый маршрут укладывается в свой бюджет запросов"""
+
+    def test_every_route_has_a_budget(self):
+        routes = {name for name, _ in checked_routes()}
+        self.assertEqual(routes - set(QUERY_BUDGETS), set())
+
+    def test_routes_fit_query_budget(self):
+        for name, params in checked_routes():
+            with self.subTest(route=name):
+                response, queries = self.request(name, params)
+                self.assertLess(response.status_code, 400, name)
+                self.assertLessEqual(
+                    len(queries), QUERY_BUDGETS[name],
+                    f'{name}: {len(queries)} запросов\n' + '\n'.join(queries),
+                )
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN проверяется только на PostgreSQL')
+    def test_no_sequential_scans_on_large_tables(self):
+        for name, params in checked_routes():
+            with self.subTest(route=name):
+                _, queries = self.request(name, params)
+                for sql in queries:
+                    scans = set(sequential_scans(sql)) - SEQ_SCAN_ALLOWED.get(name, set())
+                    self.assertFalse(scans, f'{name}: Seq Scan по {scans}\n{sql}')
+
+
+class TestQueriesDoNotGrowWithPageSize(QueryBudgetTestCase):
+    """Число запросов списка не зависит от числа статей на странице (нет N+1)"""
+
+    def count_queries(self, name, params, page_size):
+        patches = [
+            mock.patch.object(view, 'paginate_by', page_size)
+            for view in (views.PostListView, views.CategoryPostsView,
+                         views.TagPostsView, views.SearchView)
+        ]
+        patches.append(mock.patch.object(PageNumberPagination, 'page_size', page_size))
+        for patch in patches:
+            patch.start()
+        try:
+            _, queries = self.request(name, params)
+        finally:
+            for patch in patches:
+                patch.stop()
+        return len(queries)
+
+    def test_list_queries_are_constant(self):
+        routes = dict(checked_routes())
+        for name in PAGINATED_ROUTES:
+            with self.subTest(route=name):
+                small = self.count_queries(name, routes[name], 2)
+                large = self.count_queries(name, routes[name], 20)
+                self.assertEqual(small, large, name)
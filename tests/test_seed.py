@@ -0,0 +1,103 @@
+"""
+Тесты генератора синтетических данных
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+from taggit.models import Tag
+
+from blog.models import Category, Comment, Post
+from blog.seed import BlogSeeder, clear_seeded, zipf_cum_weights
+
+
+class TestBlogSeeder(TestCase):
+    """Тесты BlogSeeder"""
+
+    def seed(self, seed=7):
+        return BlogSeeder(seed=seed, batch_size=25).run(
+            posts=60, tags=40, comments=300, authors=3, categories=4
+        )
+
+    def snapshot(self):
+        return list(
+            Post.objects.filter(slug__startswith='seed-')
+            .order_by('slug').values_list('slug', 'title', 'content', 'status')
+        )
+
+    def test_creates_requested_volumes(self):
+        sizes = self.seed()
+
+        self.assertEqual(sizes['posts'], 60)
+        self.assertEqual(Post.objects.filter(slug__startswith='seed-').count(), 60)
+        self.assertEqual(Tag.objects.filter(name__startswith='seed-').count(), 40)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertEqual(Category.objects.count(), 4)
+
+    def test_same_seed_gives_same_data(self):
+        self.seed(seed=7)
+        first = self.snapshot()
+        clear_seeded()
+        self.assertEqual(Post.objects.count(), 0)
+
+        self.seed(seed=7)
+        self.assertEqual(self.snapshot(), first)
+
+        clear_seeded()
+        self.seed(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_bodies_look_like_ckeditor_html(self):
+        self.seed()
+        content = ''.join(post[2] for post in self.snapshot())
+        self.assertIn('<h2>', content)
+        self.assertIn('<p>', content)
+        self.assertIn('<pre><code class="language-python">', content)
+
+    def test_content_is_prerendered(self):
+        """Как после Post.save(): страницы и бенчмарки читают готовый content_html"""
+        self.seed()
+        post = Post.objects.filter(slug__startswith='seed-').first()
+        self.assertTrue(post.content_html)
+        self.assertNotIn('<pre><code class="language-python">', post.content_html)
+        self.assertFalse(Post.objects.filter(slug__startswith='seed-', content_html='').exists())
+
+    def test_tags_follow_zipf_distribution(self):
+        self.seed()
+        usage = list(
+            Tag.objects.filter(name__startswith='seed-')
+            .annotate(uses=Count('taggit_taggeditem_items'))
+            .order_by('id').values_list('uses', flat=True)
+        )
+        # Самый частый тег используется заметно чаще хвоста
+        self.assertGreater(usage[0], 3 * max(sum(usage[-10:]) / 10, 1))
+
+    def test_zipf_weights_are_cumulative(self):
+        weights = zipf_cum_weights(4, exponent=1)
+        self.assertAlmostEqual(weights[0], 1.0)
+        self.assertAlmostEqual(weights[-1], 1 + 1 / 2 + 1 / 3 + 1 / 4)
+
+
+class TestSeedBlogCommand(TestCase):
+    """Тесты команды seed_blog"""
+
+    def run_seed(self, *args):
+        out = StringIO()
+        call_command(
+            'seed_blog', '--posts', '20', '--tags', '10', '--comments', '50',
+            '--authors', '2', '--categories', '2', *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def test_command_seeds_and_refuses_duplicates(self):
+        output = self.run_seed()
+        self.assertIn('Готово', output)
+        self.assertEqual(Post.objects.count(), 20)
+
+        with self.assertRaises(CommandError):
+            self.run_seed()
+
+        self.run_seed('--clear')
+        self.assertEqual(Post.objects.count(), 20)
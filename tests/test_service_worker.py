@@ -0,0 +1,106 @@
+"""
+Тесты сервис-воркера и манифеста веб-приложения
+"""
+import json
+import re
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Category, Post
+
+
+@override_settings(SERVICE_WORKER=True, SW_OFFLINE_POSTS=2)
+class ServiceWorkerTestCase(TestCase):
+    """/sw.js и /manifest.webmanifest"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author', password='pass')
+        self.posts = [
+            Post.objects.create(title=f'Статья {i}', author=self.user, content='x', status='published')
+            for i in range(3)
+        ]
+        Post.objects.create(title='Черновик', author=self.user, content='x', status='draft')
+
+    def get(self, url, **extra):
+        return self.client.get(url, secure=True, **extra)
+
+    def precache(self, response):
+        return json.loads(re.search(r'const PRECACHE_URLS = (.*);', response.content.decode()).group(1))
+
+    def test_service_worker_script(self):
+        response = self.get('/sw.js')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/javascript; charset=utf-8')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        urls = self.precache(response)
+        self.assertEqual(urls[:2], ['/', '/offline/'])
+        self.assertIn('/static/css/site.css', urls)
+        self.assertIn('/static/vendor/inter/inter-cyrillic-wght-normal.woff2', urls)
+        # Только N последних опубликованных статей
+        recent = [url for url in urls if url.startswith('/post/')]
+        self.assertEqual(recent, [self.posts[2].get_absolute_url(), self.posts[1].get_absolute_url()])
+
+    def test_conditional_request(self):
+        tag = self.get('/sw.js')['ETag']
+        response = self.get('/sw.js', HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_built_once_per_version(self):
+        self.get('/sw.js')
+        with mock.patch('blog.pwa.render_to_string') as render, self.assertNumQueries(1):
+            self.get('/sw.js')
+        render.assert_not_called()
+
+    def test_unrelated_change_keeps_version(self):
+        tag = self.get('/sw.js')['ETag']
+        Category.objects.create(name='Новая категория')
+        self.posts[0].title = 'Правка старой статьи'
+        self.posts[0].save()
+        self.assertEqual(self.get('/sw.js')['ETag'], tag)
+
+    def test_editing_precached_post_changes_version(self):
+        tag = self.get('/sw.js')['ETag']
+        self.posts[2].title = 'Правка'
+        self.posts[2].save()
+        self.assertNotEqual(self.get('/sw.js')['ETag'], tag)
+
+    def test_publishing_changes_version(self):
+        first = self.get('/sw.js')
+        post = Post.objects.create(title='Новая', author=self.user, content='x', status='published')
+        second = self.get('/sw.js')
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(self.precache(second)[2:3], ['/static/css/site.css'])
+        self.assertIn(post.get_absolute_url(), self.precache(second))
+
+    def test_web_manifest(self):
+        response = self.get('/manifest.webmanifest')
+        self.assertEqual(response['Content-Type'], 'application/manifest+json')
+        data = json.loads(response.content)
+        self.assertEqual(data['start_url'], '/')
+        self.assertEqual(data['display'], 'standalone')
+        self.assertEqual(data['icons'][0]['src'], '/static/icons/icon.svg')
+
+    def test_registered_in_pages(self):
+        html = self.get(reverse('blog:post_list')).content.decode()
+        self.assertIn('<link rel="manifest" href="/manifest.webmanifest">', html)
+        self.assertIn("navigator.serviceWorker.register('/sw.js')", html)
+        self.assertEqual(self.get(reverse('blog:offline')).status_code, 200)
+
+    @override_settings(SERVICE_WORKER=False)
+    def test_disabled(self):
+        self.assertEqual(self.get('/sw.js').status_code, 404)
+        self.assertNotIn('serviceWorker', self.get(reverse('blog:post_list')).content.decode())
+
+    def test_precache_is_not_a_view(self):
+        post = self.posts[0]
+        headers = {'HTTP_X_SW_PRECACHE': '1'}
+        self.get(post.get_absolute_url(), **headers)
+        with self.settings(PAGE_CACHE=True):
+            self.get(post.get_absolute_url(), **headers)
+            self.get(post.get_absolute_url(), **headers)
+        post.refresh_from_db()
+        self.assertEqual(post.views, 0)
@@ -0,0 +1,105 @@
+"""
+Тесты карты сайта и robots.txt
+"""
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import sitemaps
+from blog.models import Category, Post
+
+
+@override_settings(SITEMAP_CHUNK_SIZE=3, SITEMAP_BATCH_SIZE=2)
+class SitemapTestCase(TestCase):
+    """/sitemap.xml и части"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='author', password='pass')
+        self.category = Category.objects.create(name='Python', slug='python')
+        self.posts = []
+        for i in range(5):
+            post = Post.objects.create(
+                title=f'Статья {i}', slug=f'post-{i}', author=user, content='x',
+                category=self.category, status='published',
+            )
+            post.tags.add('django')
+            self.posts.append(post)
+        Post.objects.create(title='Черновик', slug='draft', author=user, content='x', status='draft')
+
+    def get(self, url):
+        return self.client.get(url, secure=True)
+
+    def locs(self, response):
+        return re.findall(r'<loc>([^<]+)</loc>', response.content.decode())
+
+    def test_index_and_chunks(self):
+        response = self.get('/sitemap.xml')
+        self.assertEqual(response['Content-Type'], 'application/xml; charset=utf-8')
+        self.assertIn('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">', response.content.decode())
+        self.assertEqual(self.locs(response), [
+            'https://testserver/sitemap-posts-1.xml',
+            'https://testserver/sitemap-posts-2.xml',
+            'https://testserver/sitemap-categories-1.xml',
+            'https://testserver/sitemap-tags-1.xml',
+        ])
+
+        first = self.locs(self.get('/sitemap-posts-1.xml'))
+        second = self.locs(self.get('/sitemap-posts-2.xml'))
+        self.assertEqual(len(first), 3)
+        self.assertEqual(first + second, [f'https://testserver/post/post-{i}/' for i in range(5)])
+        self.assertEqual(self.locs(self.get('/sitemap-categories-1.xml')), ['https://testserver/category/python/'])
+        self.assertEqual(self.locs(self.get('/sitemap-tags-1.xml')), ['https://testserver/tag/django/'])
+
+    def test_lastmod_from_updated_at(self):
+        updated = timezone.now() + timedelta(days=1)
+        Post.objects.filter(pk=self.posts[4].pk).update(updated_at=updated)
+        sitemaps.invalidate()  # update() не шлёт сигналов
+        stamp = updated.isoformat(timespec='seconds')
+        self.assertIn(f'<lastmod>{stamp}</lastmod>', self.get('/sitemap-posts-2.xml').content.decode())
+        # Для категории и тега — самая свежая статья
+        self.assertIn(f'<lastmod>{stamp}</lastmod>', self.get('/sitemap-categories-1.xml').content.decode())
+        self.assertIn(f'<lastmod>{stamp}</lastmod>', self.get('/sitemap-tags-1.xml').content.decode())
+
+    def test_keyset_iteration(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get('/sitemap.xml')
+        sql = [query['sql'] for query in queries]
+        self.assertFalse([q for q in sql if 'OFFSET' in q.upper()])
+        # 5 статей пачками по 2: три запроса, со второго — условие по id
+        post_queries = [q for q in sql if '"blog_post"."slug"' in q and 'MAX(' not in q]
+        self.assertEqual(len(post_queries), 3)
+        self.assertIn('"blog_post"."id" > 2', post_queries[1])
+
+    def test_no_queries_at_steady_state(self):
+        self.get('/sitemap.xml')
+        with self.assertNumQueries(0):
+            self.get('/sitemap.xml')
+            self.get('/sitemap-posts-2.xml')
+            self.assertEqual(self.get('/sitemap-posts-9.xml').status_code, 404)
+
+    def test_invalidated_by_relevant_changes_only(self):
+        self.get('/sitemap.xml')
+        # Просмотры и комментарии карту не меняют
+        post = self.posts[0]
+        post.views += 1
+        post.save(update_fields=['views'])
+        post.comments.create(author_name='Читатель', author_email='r@example.com', content='Спасибо')
+        with self.assertNumQueries(0):
+            self.get('/sitemap.xml')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(
+                title='Новая', slug='new', author=post.author, content='x', status='published',
+            )
+        self.assertIn('https://testserver/post/new/', self.locs(self.get('/sitemap-posts-2.xml')))
+
+    def test_robots_txt(self):
+        response = self.get('/robots.txt')
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertIn('Disallow: /admin/', response.content.decode())
+        self.assertIn('Sitemap: https://testserver/sitemap.xml', response.content.decode())
@@ -0,0 +1,163 @@
+"""
+Тесты статической выгрузки сайта (manage.py build_static_site)
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blog import staticsite
+from blog.models import Category, Post
+
+
+@override_settings(SERVICE_WORKER=True)
+class StaticSiteTestCase(TestCase):
+    """Полная и инкрементальная сборка"""
+
+    def setUp(self):
+        self.output = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.output)
+        self.user = User.objects.create_user(username='author', password='pass')
+        self.python = Category.objects.create(name='Python', slug='python')
+        self.django = Category.objects.create(name='Django', slug='django')
+        now = timezone.now()
+        self.posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                title=f'Статья {i}', slug=f'post-{i}', author=self.user, content=f'<p>Текст {i}</p>',
+                category=self.python if i % 2 else self.django, status='published',
+                published_at=now - timedelta(hours=12 - i),
+            )
+            post.tags.add('общее')
+            self.posts.append(post)
+        self.posts[0].tags.add('редкий')
+
+    def build(self, **kwargs):
+        return staticsite.build(self.output, workers=1, **kwargs)
+
+    def touch(self, post, **fields):
+        """Изменение статьи «после» прошлой сборки"""
+        fields.setdefault('updated_at', timezone.now() + timedelta(minutes=1))
+        Post.objects.filter(pk=post.pk).update(**fields)
+
+    def test_output_paths(self):
+        self.assertEqual(staticsite.output_path('/'), 'index.html')
+        self.assertEqual(staticsite.output_path('/post/a/'), 'post/a/index.html')
+        self.assertEqual(staticsite.output_path('/sw.js'), 'sw.js')
+        self.assertEqual(staticsite.output_path('/tag/%D1%82%D0%B5%D0%B3/'), 'tag/тег/index.html')
+
+    def test_full_build(self):
+        report = self.build()
+        self.assertEqual(len(report['rendered']), report['total'])
+        for path in ('index.html', 'page/2/index.html', 'post/post-0/index.html',
+                     'category/python/index.html', 'tag/общее/index.html', 'tag/общее/page/2/index.html',
+                     'offline/index.html', 'sw.js', 'manifest.webmanifest',
+                     'feed.xml', 'feed.atom', 'feed.json', 'category/python/feed.xml', 'tag/общее/feed.json'):
+            self.assertTrue((self.output / path).exists(), path)
+
+        index = (self.output / 'index.html').read_text()
+        self.assertIn('Статья 11', index)
+        self.assertIn('href="/page/2/"', index)
+        self.assertIn('</article><article', index)  # минифицировано тем же middleware
+        self.assertIn('<title>Статья 11</title>', (self.output / 'feed.xml').read_text())
+        # Выгрузка не считается просмотром
+        self.assertEqual(sum(Post.objects.values_list('views', flat=True)), 0)
+
+    def test_nothing_changed(self):
+        self.build()
+        report = self.build()
+        self.assertEqual((report['rendered'], report['deleted']), ([], []))
+
+    def test_edit_rerenders_dependent_pages_only(self):
+        self.build()
+        post = self.posts[5]  # Python, вторая страница ленты не затронута
+        self.touch(post, title='Новый заголовок')
+        report = self.build()
+        self.assertCountEqual(report['rendered'], [
+            '/post/post-5/',
+            '/',                            # лента, где статья выведена
+            '/category/python/',
+            '/tag/%D0%BE%D0%B1%D1%89%D0%B5%D0%B5/',
+            # Ленты тех же списков во всех форматах
+            '/feed.xml', '/feed.atom', '/feed.json',
+            '/category/python/feed.xml', '/category/python/feed.atom', '/category/python/feed.json',
+            '/tag/%D0%BE%D0%B1%D1%89%D0%B5%D0%B5/feed.xml', '/tag/%D0%BE%D0%B1%D1%89%D0%B5%D0%B5/feed.atom',
+            '/tag/%D0%BE%D0%B1%D1%89%D0%B5%D0%B5/feed.json',
+            # Статьи, где она в «похожих» (первые три той же категории)
+            '/post/post-11/', '/post/post-9/', '/post/post-7/',
+            '/sw.js',
+        ])
+        self.assertIn('Новый заголовок', (self.output / 'post/post-5/index.html').read_text())
+
+    @override_settings(FEED_ITEMS=3)
+    def test_feed_depends_on_its_items_only(self):
+        self.build()
+        self.touch(self.posts[1], title='Старая правка')  # Python, не среди трёх последних
+        rendered = self.build()['rendered']
+        self.assertIn('/category/python/', rendered)
+        self.assertFalse([url for url in rendered if '/feed.' in url])
+
+        self.touch(self.posts[11], title='Свежая правка')
+        rendered = self.build()['rendered']
+        self.assertIn('/feed.json', rendered)
+        self.assertIn('/category/python/feed.atom', rendered)
+        self.assertIn('Свежая правка', (self.output / 'feed.json').read_text())
+
+    def test_new_post_shifts_pagination(self):
+        self.build()
+        Post.objects.create(
+            title='Свежая', slug='fresh', author=self.user, content='x', category=self.python,
+            status='published', published_at=timezone.now(),
+        )
+        report = self.build()
+        self.assertIn('/post/fresh/', report['rendered'])
+        self.assertIn('/page/2/', report['rendered'])
+        self.assertIn('/category/python/', report['rendered'])
+        self.assertNotIn('/category/django/', report['rendered'])
+
+    def test_unpublished_post_is_deleted(self):
+        self.build()
+        self.touch(self.posts[0], status='draft')
+        report = self.build()
+        self.assertIn('/post/post-0/', report['deleted'])
+        self.assertIn('/tag/%D1%80%D0%B5%D0%B4%D0%BA%D0%B8%D0%B9/', report['deleted'])
+        self.assertFalse((self.output / 'post' / 'post-0').exists())
+        self.assertFalse((self.output / 'tag' / 'редкий').exists())
+
+    def test_shared_data_change_rebuilds_everything(self):
+        """Переименование категории или тега и смена имени автора видны на всех страницах"""
+        total = self.build()['total']
+        changes = [
+            lambda: Category.objects.filter(pk=self.python.pk).update(name='Питон'),
+            lambda: self.posts[0].tags.filter(name='редкий').update(name='редчайший'),
+            lambda: User.objects.filter(pk=self.user.pk).update(first_name='Иван'),
+        ]
+        for change in changes:
+            change()
+            self.assertEqual(len(self.build()['rendered']), total)
+            self.assertEqual(self.build()['rendered'], [])
+        page = (self.output / 'post/post-1/index.html').read_text()
+        self.assertIn('Питон', page)
+        self.assertIn('Иван', page)
+
+    def test_pool_receives_batches(self):
+        with mock.patch('blog.staticsite.ProcessPoolExecutor') as pool:
+            pool.return_value.__enter__.return_value.map.return_value = [3, 2]
+            self.assertEqual(staticsite.render_all(['/a/', '/b/', '/c/', '/d/', '/e/'], self.output, workers=2), 5)
+        batches = pool.return_value.__enter__.return_value.map.call_args.args[1]
+        self.assertEqual(sum(batches, []), ['/a/', '/b/', '/c/', '/d/', '/e/'])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('build_static_site', output_dir=str(self.output), workers=1, stdout=out)
+        self.assertIn('Отрисовано страниц', out.getvalue())
+        out = StringIO()
+        call_command('build_static_site', output_dir=str(self.output), dry_run=True, full=True, stdout=out)
+        self.assertIn('+ /post/post-0/', out.getvalue())
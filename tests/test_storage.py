@@ -0,0 +1,116 @@
+"""
+Тесты оптимизирующего хранилища медиафайлов
+"""
+import random
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from blog.storage import OptimizingFileSystemStorage, PreparedFile
+
+
+def screenshot_png(width=3000, height=1800):
+    """PNG-«скриншот»: градиентный фон, сглаженные блоки «текста»"""
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    image = Image.blend(image, Image.effect_noise((width, height), 8).convert('RGB'), 0.3)
+    rng = random.Random(1)
+    for _ in range(200):
+        x, y = rng.randrange(width - 200), rng.randrange(height - 30)
+        image.paste((rng.randrange(60), rng.randrange(60), rng.randrange(60)), (x, y, x + 180, y + 12))
+    buffer = BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def photo_jpeg(width=1600, height=1200, orientation=None):
+    """JPEG-«фото» с EXIF (модель камеры, при необходимости — поворот)"""
+    rng = random.Random(2)
+    image = Image.effect_noise((width, height), 40).convert('RGB')
+    image = Image.merge('RGB', [band.point(lambda v, k=k: (v + k * 40) % 256) for k, band in enumerate(image.split())])
+    exif = Image.Exif()
+    exif[0x0110] = 'TestCam %d' % rng.randrange(100)
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=95, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class OptimizingStorageTestCase(TestCase):
+    """Метаданные удаляются, размеры ограничиваются, формат выбирается по размеру"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.storage = OptimizingFileSystemStorage(location=self.media_root)
+
+    def save(self, name, data):
+        with self.assertLogs('blog.storage', 'INFO') as logs:
+            saved = self.storage.save(name, SimpleUploadedFile(name, data))
+        size = self.storage.size(saved)
+        # Отчёт об экономии попадает в вывод теста
+        print(f'\n{name}: {len(data)} → {size} байт, сэкономлено {len(data) - size} ({logs.output[0]})')
+        return saved, size
+
+    def open(self, name):
+        with self.storage.open(name) as f:
+            image = Image.open(f)
+            image.load()
+        return image
+
+    def test_large_png_screenshot(self):
+        """Большой PNG уменьшается до предела и становится меньше"""
+        data = screenshot_png()
+        saved, size = self.save('uploads/shot.png', data)
+        image = self.open(saved)
+
+        self.assertLessEqual(max(image.size), 2560)
+        self.assertLess(size, len(data))
+
+    def test_photo_loses_exif_and_keeps_orientation(self):
+        """EXIF удаляется, а поворот из него применяется к пикселям"""
+        data = photo_jpeg(1200, 800, orientation=6)
+        saved, size = self.save('uploads/photo.jpg', data)
+        image = self.open(saved)
+
+        self.assertEqual(image.size, (800, 1200))
+        self.assertEqual(len(image.getexif()), 0)
+        self.assertLess(size, len(data))
+
+    @override_settings(MEDIA_OPTIMIZE_SPOOL_SIZE=1024)
+    def test_large_output_spooled_to_disk(self):
+        """Результат крупнее порога буферизации пишется через временный файл"""
+        data = photo_jpeg(800, 600)
+        saved, size = self.save('uploads/spooled.jpg', data)
+        self.assertGreater(size, 1024)
+        self.assertEqual(self.open(saved).size, (800, 600))
+
+    def test_small_clean_image_kept(self):
+        """Маленький файл без метаданных, который не ужать, остаётся как есть"""
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), (1, 2, 3)).save(buffer, 'WEBP', quality=50)
+        data = buffer.getvalue()
+        saved = self.storage.save('uploads/tiny.webp', SimpleUploadedFile('tiny.webp', data))
+        self.assertEqual(saved, 'uploads/tiny.webp')
+        with self.storage.open(saved) as f:
+            self.assertEqual(f.read(), data)
+
+    def test_non_images_and_prepared_files_untouched(self):
+        """Не-картинки и подготовленные файлы сохраняются побайтно"""
+        saved = self.storage.save('uploads/notes.txt', ContentFile(b'plain text'))
+        self.assertEqual(self.storage.size(saved), 10)
+
+        data = screenshot_png(400, 300)
+        saved = self.storage.save('uploads/prepared.png', PreparedFile(data))
+        self.assertEqual(self.storage.size(saved), len(data))
+
+    @override_settings(MEDIA_OPTIMIZE=False)
+    def test_can_be_disabled(self):
+        data = photo_jpeg(300, 200)
+        saved = self.storage.save('uploads/raw.jpg', ContentFile(data))
+        self.assertEqual(self.storage.size(saved), len(data))
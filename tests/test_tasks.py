@@ -0,0 +1,286 @@
+"""
+Тесты очереди фоновых задач (blog/taskqueue.py) и задач блога
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from blog import taskqueue, viewcount
+from blog.models import Post, Task
+
+calls = []
+
+
+@taskqueue.task('tests.record')
+def record_call(value):
+    calls.append(value)
+
+
+@taskqueue.task('tests.fail', max_attempts=3)
+def fail():
+    raise RuntimeError('сбой')
+
+
+@override_settings(TASKS_EAGER=False, TASK_RETRY_DELAY=10, TASK_RETRY_MAX_DELAY=25, TASK_SCHEDULE={})
+class TaskQueueTestCase(TestCase):
+    """Постановка, выборка, повторы и периодические задачи"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_work(self):
+        task = taskqueue.enqueue('tests.record', value=1)
+        self.assertEqual((task.status, task.kwargs), (Task.QUEUED, {'value': 1}))
+        taskqueue.enqueue('tests.record', value=2)
+        self.assertEqual(taskqueue.work(burst=True), 2)
+        self.assertEqual(calls, [1, 2])
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.DONE, 1))
+        self.assertIsNotNone(task.finished_at)
+
+    def test_unknown_task(self):
+        with self.assertRaises(taskqueue.TaskError):
+            taskqueue.enqueue('tests.missing')
+
+    def test_dedupe_key(self):
+        self.assertIsNotNone(taskqueue.enqueue('tests.record', key='k', value=1))
+        self.assertIsNone(taskqueue.enqueue('tests.record', key='k', value=2))
+        self.assertIsNotNone(taskqueue.enqueue('tests.record', key='other', value=3))
+        taskqueue.work(burst=True)
+        # Выполненная задача ключ освобождает
+        self.assertIsNotNone(taskqueue.enqueue('tests.record', key='k', value=4))
+
+    def test_enqueue_is_transactional(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                taskqueue.enqueue('tests.record', value=1)
+                raise ValueError
+        self.assertFalse(Task.objects.exists())
+
+    def test_delay(self):
+        taskqueue.enqueue('tests.record', delay=60, value=1)
+        self.assertEqual(taskqueue.work(burst=True), 0)
+        Task.objects.update(run_at=timezone.now())
+        self.assertEqual(taskqueue.work(burst=True), 1)
+
+    def test_claim_is_exclusive(self):
+        taskqueue.enqueue('tests.record', value=1)
+        first = taskqueue.claim('a')
+        self.assertEqual((first.status, first.locked_by, first.attempts), (Task.RUNNING, 'a', 1))
+        self.assertIsNone(taskqueue.claim('b'))
+
+    def test_claim_skip_locked_path(self):
+        """Ветка SELECT … FOR UPDATE SKIP LOCKED (на SQLite FOR UPDATE не добавляется)"""
+        taskqueue.enqueue('tests.record', value=1)
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', True):
+            task = taskqueue.claim('a')
+            self.assertEqual((task.status, task.locked_by), (Task.RUNNING, 'a'))
+            self.assertIsNone(taskqueue.claim('b'))
+
+    def test_retry_with_backoff(self):
+        task = taskqueue.enqueue('tests.fail')
+        self.assertEqual(task.max_attempts, 3)
+        delays = []
+        for attempt in range(3):
+            started = timezone.now()
+            taskqueue.work(burst=True)
+            task.refresh_from_db()
+            self.assertEqual(task.attempts, attempt + 1)
+            self.assertIn('сбой', task.last_error)
+            if task.status == Task.QUEUED:
+                delays.append(round((task.run_at - started).total_seconds()))
+                Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        self.assertEqual(delays, [10, 20])
+        self.assertEqual(task.status, Task.FAILED)
+        # Предел паузы
+        self.assertEqual(taskqueue.backoff(5), timedelta(seconds=25))
+
+    def test_retry_superseded_by_queued_duplicate(self):
+        taskqueue.enqueue('tests.fail', key='k')
+        task = taskqueue.claim('a')
+        taskqueue.enqueue('tests.fail', key='k')
+        taskqueue.execute(task)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(Task.objects.filter(key='k', status=Task.QUEUED).count(), 1)
+
+    @override_settings(TASK_LOCK_TIMEOUT=60)
+    def test_reap_stale(self):
+        taskqueue.enqueue('tests.record', value=1)
+        task = taskqueue.claim('dead')
+        self.assertEqual(taskqueue.reap(), 0)
+        Task.objects.filter(pk=task.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(taskqueue.reap(), 1)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.locked_by), (Task.QUEUED, ''))
+        taskqueue.work(burst=True)
+        self.assertEqual(calls, [1])
+
+    @override_settings(TASK_SCHEDULE={'tick': {'task': 'tests.record', 'every': 300, 'kwargs': {'value': 'tick'}}})
+    def test_schedule(self):
+        taskqueue.schedule()
+        taskqueue.schedule()
+        self.assertEqual(Task.objects.filter(key='periodic:tick').count(), 1)
+        taskqueue.work(burst=True)
+        self.assertEqual(calls, ['tick'])
+
+        taskqueue.schedule()
+        upcoming = Task.objects.get(key='periodic:tick', status=Task.QUEUED)
+        finished = Task.objects.get(key='periodic:tick', status=Task.DONE).finished_at
+        self.assertEqual(upcoming.run_at, finished + timedelta(seconds=300))
+        self.assertEqual(taskqueue.work(burst=True), 0)
+
+    def test_run_worker_command(self):
+        taskqueue.enqueue('tests.record', value=1)
+        out = StringIO()
+        call_command('run_worker', burst=True, stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+        self.assertEqual(calls, [1])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager(self):
+        self.assertIsNone(taskqueue.enqueue('tests.record', value=1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+
+def make_upload():
+    buffer = BytesIO()
+    Image.new('RGB', (800, 600), (10, 20, 30)).save(buffer, 'PNG')
+    return SimpleUploadedFile('cover.png', buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(TASKS_EAGER=False, TASK_SCHEDULE={})
+class BlogTasksTestCase(TestCase):
+    """Задачи, которые ставят сигналы и расписание блога"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='pass')
+        self.post = Post.objects.create(
+            title='Статья', slug='post', author=self.user, excerpt='e', content='c', status='published',
+        )
+
+    def test_image_variants_queued(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_WIDTHS=[320]):
+            self.post.featured_image = make_upload()
+            self.post.save()
+            self.post.save()
+            task = Task.objects.get(name='blog.build_image_variants')
+            self.assertEqual((task.key, task.kwargs), (f'image-variants:{self.post.pk}', {'post_id': self.post.pk}))
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.featured_image_variants, {})
+
+            taskqueue.work(burst=True)
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.featured_image_variants['source'], self.post.featured_image.name)
+
+    @override_settings(VIEWS_FLUSH_INTERVAL=60)
+    def test_views_buffered_and_flushed(self):
+        for _ in range(3):
+            self.client.get('/post/post/', secure=True)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        self.assertEqual(cache.get(viewcount.pending_key('post')), 3)
+
+        taskqueue.enqueue('blog.flush_views')
+        taskqueue.work(burst=True)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 3)
+        self.assertEqual(cache.get(viewcount.pending_key('post')), 0)
+
+    @override_settings(VIEWS_FLUSH_INTERVAL=60)
+    def test_flush_reads_only_dirty_posts(self):
+        other = Post.objects.create(title='Другая', slug='other', author=self.user, content='c', status='published')
+        for i in range(50):
+            Post.objects.create(title='Тихая', slug=f'quiet-{i}', author=self.user, content='c', status='published')
+        for slug in ('post', 'post', 'other'):
+            viewcount.record(slug)
+        with self.assertNumQueries(2):  # по UPDATE на статью с просмотрами, без SELECT всех slug
+            self.assertEqual(viewcount.flush(), 3)
+        other.refresh_from_db()
+        self.assertEqual(other.views, 1)
+        self.assertEqual(viewcount.flush(), 0)
+
+        # После сброса первый просмотр снова отмечает статью
+        viewcount.record('other')
+        self.assertEqual(viewcount.flush(), 1)
+
+    @override_settings(VIEWS_FLUSH_INTERVAL=60)
+    def test_views_during_flush_are_kept(self):
+        viewcount.record('post')
+        original = cache.get_many
+
+        def get_many(keys):
+            values = original(keys)
+            if viewcount.pending_key('post') in keys:
+                viewcount.record('post')  # просмотр между чтением и decr
+            return values
+
+        with mock.patch.object(cache, 'get_many', side_effect=get_many):
+            self.assertEqual(viewcount.flush(), 1)
+        self.assertEqual(viewcount.flush(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    @override_settings(
+        VIEWS_FLUSH_INTERVAL=60, VIEWS_CACHE_ALIAS='files',
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'files': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/nonexistent'},
+        },
+    )
+    def test_no_atomic_incr_writes_directly(self):
+        self.assertIsNone(viewcount.get_cache())
+        viewcount.record('post')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+        self.assertEqual(viewcount.flush(), 0)
+
+    @override_settings(VIEWS_FLUSH_INTERVAL=60, PAGE_CACHE=True)
+    def test_cached_view_needs_no_queries(self):
+        self.client.get('/post/post/', secure=True)
+        with self.assertNumQueries(0):
+            response = self.client.get('/post/post/', secure=True)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(cache.get(viewcount.pending_key('post')), 2)
+
+    @override_settings(FEED_WARM_HOST='testserver', PAGE_CACHE=True)
+    def test_feeds_warmed_after_change(self):
+        self.post.title = 'Новый заголовок'
+        self.post.save()
+        self.post.save()
+        # Несколько сохранений подряд — одна отложенная пересборка
+        task = Task.objects.get(name='blog.warm_feeds')
+        self.assertGreater(task.run_at, timezone.now())
+        Task.objects.update(run_at=timezone.now())
+        taskqueue.work(burst=True)
+        with self.assertNumQueries(0):
+            response = self.client.get('/feed.xml', secure=True)
+        self.assertIn('Новый заголовок', response.content.decode())
+
+    @override_settings(TASK_RETENTION_DAYS=7)
+    def test_prune_tasks(self):
+        Task.objects.all().delete()  # доставка события публикации из setUp
+        old = timezone.now() - timedelta(days=8)
+        Task.objects.create(name='blog.flush_views', status=Task.DONE, finished_at=old)
+        Task.objects.create(name='blog.flush_views', status=Task.QUEUED)
+        taskqueue.enqueue('blog.prune_tasks')
+        taskqueue.work(burst=True)
+        self.assertEqual(
+            sorted(Task.objects.values_list('name', 'status')),
+            [('blog.flush_views', Task.DONE), ('blog.prune_tasks', Task.DONE)],
+        )
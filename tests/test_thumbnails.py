@@ -0,0 +1,104 @@
+"""
+Тесты миниатюр по подписанным адресам /img/<подпись>/<w>x<h>/<путь>
+"""
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from blog import thumbnails
+
+
+class ThumbnailTestCase(TestCase):
+    """Ресайз по запросу, выбор формата и кэширование"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, THUMBNAIL_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (30, 60, 90)).save(buffer, 'JPEG')
+        self.path = default_storage.save('uploads/photo.jpg', ContentFile(buffer.getvalue()))
+
+    def get(self, url, accept='image/avif,image/webp,*/*', **extra):
+        return self.client.get(url, secure=True, HTTP_ACCEPT=accept, **extra)
+
+    def test_resize_and_negotiate(self):
+        """WebP для браузеров, которые его принимают, JPEG для остальных"""
+        url = thumbnails.thumbnail_url(self.path, 600)
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('Accept', response['Vary'])
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertEqual(Image.open(BytesIO(response.content)).size, (600, 400))
+
+        response = self.get(url, accept='image/*')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+    def test_avif_when_supported(self):
+        """AVIF выбирается, только если его умеет кодировать Pillow"""
+        with mock.patch.object(thumbnails, 'avif_supported', return_value=True):
+            self.assertEqual(thumbnails.negotiate('image/avif,image/webp'), 'avif')
+        with mock.patch.object(thumbnails, 'avif_supported', return_value=False):
+            self.assertEqual(thumbnails.negotiate('image/avif,image/webp'), 'webp')
+        self.assertEqual(thumbnails.negotiate('image/*'), 'legacy')
+
+    def test_crop_and_no_upscale(self):
+        """Оба размера — обрезка по центру; больше оригинала не растягиваем"""
+        response = self.get(thumbnails.thumbnail_url(self.path, 300, 300))
+        self.assertEqual(Image.open(BytesIO(response.content)).size, (300, 300))
+        response = self.get(thumbnails.thumbnail_url(self.path, 2400))
+        self.assertEqual(Image.open(BytesIO(response.content)).size, (1200, 800))
+
+    def test_signature_required(self):
+        """Без верной подписи размеры менять нельзя"""
+        url = thumbnails.thumbnail_url(self.path, 600)
+        self.assertEqual(self.get(url.replace('/600x0/', '/601x0/')).status_code, 404)
+        self.assertEqual(self.get(url.replace('/img/', '/img/0')).status_code, 404)
+        self.assertEqual(self.get(thumbnails.thumbnail_url('uploads/missing.jpg', 600)).status_code, 404)
+        self.assertEqual(self.get(thumbnails.thumbnail_url('../config/settings.py', 600)).status_code, 404)
+
+    def test_conditional_get(self):
+        url = thumbnails.thumbnail_url(self.path, 320)
+        etag = self.get(url)['ETag']
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_concurrent_first_requests_coalesced(self):
+        """Одновременные первые запросы строят миниатюру один раз"""
+        calls = []
+        real_encode = thumbnails.encode
+
+        def slow_encode(image, fmt):
+            calls.append(fmt)
+            time.sleep(0.2)
+            return real_encode(image, fmt)
+
+        results = []
+        with mock.patch.object(thumbnails, 'encode', slow_encode):
+            threads = [
+                threading.Thread(target=lambda: results.append(
+                    thumbnails.get_thumbnail(self.path, 400, 0, 'image/webp')
+                ))
+                for _ in range(6)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(calls, ['webp'])
+        self.assertEqual(len({data for data, _ in results}), 1)
@@ -0,0 +1,133 @@
+"""
+Тесты закреплённых сторонних ресурсов (без сети: файлы из локального каталога)
+"""
+import base64
+import hashlib
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog import vendor
+
+
+class VendorAssetsTestCase(TestCase):
+    def setUp(self):
+        self.fixtures = Path(tempfile.mkdtemp())
+        self.static = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.fixtures, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.static, ignore_errors=True)
+        for asset in settings.VENDOR_ASSETS:
+            path = self.fixtures / asset['path']
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b'wOF2' + asset['path'].encode())
+
+    def run_command(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command('vendor_assets', '--source', str(self.fixtures), '--static-dir', str(self.static),
+                     *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def pinned(self):
+        return [
+            dict(asset, sha256=hashlib.sha256((self.fixtures / asset['path']).read_bytes()).hexdigest())
+            for asset in settings.VENDOR_ASSETS
+        ]
+
+    def test_installs_fonts_and_css(self):
+        with mock.patch('urllib.request.urlopen') as urlopen:
+            out, err = self.run_command()
+        urlopen.assert_not_called()
+        for asset in settings.VENDOR_ASSETS:
+            self.assertTrue((self.static / asset['path']).exists())
+        css = (self.static / settings.VENDOR_FONT_CSS).read_text(encoding='utf-8')
+        self.assertEqual(css.count('@font-face'), 2)
+        self.assertIn("url('./inter-cyrillic-wght-normal.woff2')", css)
+        self.assertIn('U+0400-045F', css)
+        self.assertIn('font-display: swap', css)
+        self.assertIn('Хэш не закреплён', err)
+
+    def test_existing_files_not_downloaded_again(self):
+        self.run_command()
+        out, _ = self.run_command()
+        self.assertNotIn('скачан', out)
+        self.assertIn('на месте', out)
+
+    def test_pinned_hash_verified(self):
+        with override_settings(VENDOR_ASSETS=self.pinned()):
+            _, err = self.run_command()
+            self.assertNotIn('Хэш не закреплён', err)
+
+            (self.fixtures / settings.VENDOR_ASSETS[0]['path']).write_bytes(b'tampered')
+            with self.assertRaises(CommandError):
+                self.run_command('--force')
+
+    def test_missing_source_file(self):
+        (self.fixtures / settings.VENDOR_ASSETS[0]['path']).unlink()
+        with self.assertRaises(CommandError):
+            self.run_command()
+
+    def test_fetch_from_network(self):
+        response = mock.MagicMock()
+        response.__enter__.return_value.read.return_value = b'font'
+        with mock.patch('urllib.request.urlopen', return_value=response) as urlopen:
+            self.assertEqual(vendor.fetch(settings.VENDOR_ASSETS[0]), b'font')
+        self.assertIn(settings.INTER_VERSION, urlopen.call_args[0][0].full_url)
+
+
+class PublishedChecksumTestCase(TestCase):
+    """Без закреплённого sha256 скачанный файл сверяется с хэшем, опубликованным jsDelivr"""
+
+    def setUp(self):
+        self.static = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.static, ignore_errors=True)
+        self.addCleanup(vendor._published.clear)
+        self.asset = settings.VENDOR_ASSETS[0]
+
+    def serve(self, body, listing_body):
+        listing = json.dumps({'files': [{'name': self.asset['checksum_name'], 'hash': listing_body}]}).encode()
+
+        def urlopen(request, timeout=None):
+            response = mock.MagicMock()
+            data = listing if request.full_url == self.asset['checksums'] else body
+            response.__enter__.return_value.read.return_value = data
+            return response
+        return mock.patch('urllib.request.urlopen', side_effect=urlopen)
+
+    def test_matching_file_installed(self):
+        digest = base64.b64encode(hashlib.sha256(b'font').digest()).decode()
+        with self.serve(b'font', digest):
+            status, _ = vendor.install(self.asset, self.static)
+        self.assertEqual(status, 'скачан')
+        self.assertEqual((self.static / self.asset['path']).read_bytes(), b'font')
+
+    def test_tampered_file_rejected(self):
+        digest = base64.b64encode(hashlib.sha256(b'font').digest()).decode()
+        with self.serve(b'tampered', digest):
+            with self.assertRaises(vendor.VendorError):
+                vendor.install(self.asset, self.static)
+        self.assertFalse((self.static / self.asset['path']).exists())
+
+    def test_unverifiable_download_refused(self):
+        asset = {'path': 'vendor/x.woff2', 'url': 'https://example.com/x.woff2', 'sha256': ''}
+        with mock.patch('urllib.request.urlopen') as urlopen:
+            with self.assertRaises(vendor.VendorError):
+                vendor.install(asset, self.static)
+        urlopen.assert_not_called()
+
+
+class BaseTemplateFontsTestCase(TestCase):
+    def test_no_third_party_font_origins(self):
+        response = self.client.get(reverse('blog:post_list'), secure=True)
+        self.assertNotContains(response, 'fonts.googleapis.com')
+        self.assertNotContains(response, 'fonts.gstatic.com')
+        self.assertContains(response, 'vendor/inter/inter.css')
+        self.assertContains(response, 'as="font" type="font/woff2" crossorigin')